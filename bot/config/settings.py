@@ -2,6 +2,13 @@ class Settings:
     #showing object detection overlay
     DEBUG: bool = True
     DEBUG_DIR: str = "debug_frames"  # Add this line
+    DEBUG_SAMPLE = "every"        # Debug frames to keep: "every" (every Nth) or "target_change"
+    DEBUG_SAMPLE_EVERY = 30       # N for "every"
+    DEBUG_SCALE = 0.5             # Debug frames are downscaled by this before drawing/encoding
+    DEBUG_FORMAT = "jpg"          # "jpg", "webp" or "png" (lossless, slow)
+    DEBUG_QUALITY = 80            # JPEG/WebP quality (0-100)
+    DEBUG_MAX_QUEUE = 8           # Frames waiting for the writer; the oldest is dropped beyond this
+    DEBUG_MAX_DISK_MB = 500       # Oldest debug frames are deleted to stay under this
     
     
     # Screen capture
@@ -11,6 +18,29 @@ class Settings:
         "width": 2560,
         "height": 1600
     }
+    FRAME_BUFFER_SIZE = 4   # Recent frames kept by ScreenCapturer's ring buffer
+    FRAME_POOL_SPARE = 6    # Extra pooled frame buffers for consumers holding frames
+
+    # Recording / replay (offline runs)
+    RECORDING_CODEC = "mjpg"      # "mjpg" (small, lossy video) or "raw" (memory-mapped .npy)
+    RECORDING_CHUNK_SIZE = 300    # Frames per chunk file
+    RECORDING_RAW_CHUNK_MB = 512  # "raw" chunks are preallocated, so they also stay under this size
+    RECORDING_MAX_QUEUE = 32      # Frames waiting to be written before new ones are dropped
+
+    # Dataset capture (scripts/dataset_capture.py)
+    DATASET_DIR = "train_data"
+    DATASET_REGION = {"top": 100, "left": 0, "width": 1920, "height": 980}  # Screen area captured (excludes the UI)
+    DATASET_INTERVAL = 0.25       # Min seconds between frames considered in continuous mode
+    DATASET_SHARD_SIZE = 1000     # Images per shard directory
+    DATASET_FORMAT = "jpg"        # "jpg", "webp" or "png"
+    DATASET_QUALITY = 95          # JPEG/WebP quality (0-100)
+    DATASET_ENCODERS = 4          # Encoder threads
+    DATASET_MAX_PENDING = 16      # Frames waiting for an encoder before new ones are dropped
+    DATASET_DEDUP_THRESHOLD = 6   # Max perceptual-hash bit difference for a near-duplicate (-1 = keep all)
+    DATASET_DEDUP_WINDOW = 500    # Kept frames each new frame is compared against
+    DATASET_VARIANTS = ()         # Extra copies, e.g. (("half", "scale", 0.5), ("center", "crop", (640, 400, 1280, 800)))
+    REPLAY_MODE = "original"      # "original" timing, "fixed" FPS or "fast" as possible
+    REPLAY_FPS = 30               # Used when REPLAY_MODE == "fixed"
     
     # Object detection
     CONFIDENCE_THRESHOLD = 0.2
@@ -18,18 +48,56 @@ class Settings:
     CLASS_NAMES = ["trunk"]  # Uncommented and corrected
     PRIORITY_TARGETS = ["trunk"]
     INPUT_SIZE = 640    # Model input size
+    LETTERBOX = False   # Keep aspect ratio and pad instead of squashing to INPUT_SIZE
+    LETTERBOX_PAD_VALUE = 114   # Gray border used by YOLO letterboxing
     IOU_THRESHOLD = 0.3    # Non-max suppression threshold
+
+    # Inference region: "full" screen, a horizon "band", or overlapping "tiles" around the centre
+    INFERENCE_REGION = "full"
+    INFERENCE_BAND = (0.25, 0.75)     # Band top/bottom as fractions of the screen height
+    TILE_SIZE = 640                   # Tile side in screen pixels (= INPUT_SIZE for 1:1 scale)
+    TILE_GRID = (3, 2)                # Tile columns, rows
+    TILE_OVERLAP = 0.2                # Fraction of a tile shared with its neighbour
+    TILE_CONTAINMENT_THRESHOLD = 0.8  # Drop tile-edge fragments this much inside a bigger box
     OVERLAY_ALPHA = 0.7 # Bounding box transparency    
 
+    # Inference backend: "opencv" (cv2.dnn) or "onnxruntime"
+    INFERENCE_BACKEND = "opencv"
+    ORT_INTRA_OP_THREADS = 0        # 0 = let ONNX Runtime decide
+    ORT_INTER_OP_THREADS = 0
+    ORT_GRAPH_OPTIMIZATION = "all"  # "disable", "basic", "extended" or "all"
+
     
     # Target selection
     ROTATION_THRESHOLD = 30       # Pixels from center to trigger rotation
+    ROTATION_GAIN = 1.5           # Initial drag pixels per screen pixel of offset (learned per session)
+    ROTATION_GAIN_LEARNING_RATE = 0.5   # How far each observed drag moves the gain estimate
+    ROTATION_GAIN_LIMITS = (0.5, 5.0)   # Learned gain is clamped to this range
+    ROTATION_MIN_LEARN_OFFSET = 20      # Pixels a drag must correct before it teaches the gain
+    ROTATION_REACQUIRE_FRACTION = 0.5   # Target lost after a drag: look this fraction of the offset around the centre
+    STEER_THRESHOLD = 15          # Pixels off center that trigger a correction while walking
+    STEER_DURATION = 0.08         # Seconds a steering drag moves for
+    STEER_STEPS = 20              # Mouse moves per steering drag
+    STEER_PRESS_DELAY = 0.05      # Right button held this long before a steering drag moves
     MIN_TARGET_WIDTH = 40         # Minimum width (pixels) to initiate interaction
     MAX_TRACKING_TIME = 15        # Seconds before abandoning a target
 
+    # Multi-object tracker (Kalman filter + IoU/centroid association)
+    TRACKER_IOU_THRESHOLD = 0.3           # Min IoU for an overlap match
+    TRACKER_MAX_CENTROID_DISTANCE = 0.5   # Fallback match gate, in box widths
+    TRACKER_MAX_MISSES = 5                # Updates a track may go unmatched before it's dropped
+    TRACKER_MIN_HITS = 2                  # Matches before a track counts as confirmed
+    TRACKER_PROCESS_NOISE = 0.05          # Motion noise, as a fraction of box size
+    TRACKER_MEASUREMENT_NOISE = 0.05      # Detector box noise, as a fraction of box size
+
     ICON_TEMPLATE_PATH = r"C:\Python Projects\gaming-bot\Icons\interaction.png"
     ICON_SEARCH_REGION = (1100, 1170, 100, 130)  # (x, y, w, h)
     ICON_COLOR = (26, 26, 26)     # RGB color to detect for interaction prompt
+    ICON_DETECTION = "template"   # "template" (match ICON_TEMPLATE_PATH) or "pixel" (probe one pixel)
+    ICON_MATCH_THRESHOLD = 0.8    # Min normalised correlation for a template match
+    ICON_PYRAMID_LEVELS = 1       # Coarse-to-fine levels for template matching (0 = full resolution only)
+    ICON_PROBE_PIXEL = (1192, 1222)  # (x, y) screen pixel checked in "pixel" mode
+    ICON_COLOR_TOLERANCE = 12     # Max per-channel difference from ICON_COLOR
 
     ZONE_BOUNDARIES = {
         'left': 0.33,
@@ -40,8 +108,10 @@ class Settings:
     TARGET_SCORE_WEIGHTS = (0.5, 0.2, 0.3) 
     
     # Interaction Timing
-    MAX_WALK_TIME = 10.0          # From _perform_interaction()
+    MAX_WALK_TIME = 10.0          # Give up walking towards a target after this long
+    INTERACT_KEY_DELAY = 0.5      # Seconds between releasing W and pressing 'F'
     POST_INTERACTION_DELAY = 15   # Seconds after pressing 'F'
+    STATE_TICK_INTERVAL = 0.05    # Timer tick while approaching / interacting / cooling down (s)
     
     
     # Controls
@@ -52,6 +122,45 @@ class Settings:
 
     # Main loop
     MAX_DETECTION_WORKERS = 4
+    PREDICTION_MAX_STALENESS = 0.5  # Ignore predictions from frames older than this (s)
+    PREDICTION_WAIT_TIMEOUT = 1.0   # Max time to block waiting for fresh predictions (s)
+    ACTION_SETTLE_TIME = 0.05       # Frames captured within this long after an action are skipped (s)
+    ACTION_SPIN_TIME = 0.002        # Busy-wait this last part of a timed input wait instead of sleeping (s)
+
+    # Batched inference: workers share one engine and their frames are run together
+    DETECTION_BATCHING = False
+    DETECTION_BATCH_SIZE = 4        # Max frames per forward pass (capped at the worker count)
+    DETECTION_BATCH_MAX_WAIT = 0.01 # Seconds the first frame may wait for the batch to fill
+
+    # Run each detection worker in its own process (frames shared via shared memory)
+    DETECTION_USE_PROCESSES = False
+    DETECTION_WORKER_TIMEOUT = 2.0  # Seconds a worker process gets per frame before it's restarted
+
+    # Autoscaling: the active worker count moves between AUTOSCALE_MIN_WORKERS and MAX_DETECTION_WORKERS
+    DETECTION_AUTOSCALE = False     # Opt-in: otherwise all MAX_DETECTION_WORKERS stay active
+    AUTOSCALE_MIN_WORKERS = 1
+    AUTOSCALE_INTERVAL = 2.0        # Seconds of measurements behind each decision
+    AUTOSCALE_TARGET_AGE = 0.06     # Frame age at publish to stay under (s)
+    AUTOSCALE_TOLERANCE = 0.1       # Revert a change that makes frame age this much worse
+    AUTOSCALE_HOLD = 5              # Intervals to hold still after a revert
+    DETECTION_IDLE_INTERVAL = 0.5   # Seconds between frames in low duty (e.g. interaction waits)
+
+    # Change gate: reuse the previous detections when the frame barely changed
+    CHANGE_GATE_ENABLED = False       # Opt-in: skipped frames republish the previous detections
+    CHANGE_GATE_THRESHOLD = 2.0       # Mean abs gray-level difference (0-255) below which inference is skipped
+    CHANGE_GATE_THUMB_SIZE = (80, 50) # Thumbnail (width, height) the comparison runs on
+    CHANGE_GATE_MAX_SKIP_TIME = 1.0   # Force inference at least this often (s)
+
+    # Live metrics (counters/histograms; near-zero cost when disabled)
+    METRICS_ENABLED = False
+    METRICS_PORT = 9108               # Prometheus text endpoint at http://127.0.0.1:PORT/metrics
+    METRICS_SUMMARY_INTERVAL = 10.0   # Seconds between console summaries (0 = off)
+
+    # Per-frame tracing (Chrome/Perfetto trace-event JSON, flushed on TRACE_HOTKEY)
+    TRACE_ENABLED = False
+    TRACE_BUFFER_EVENTS = 200000      # Oldest events are dropped beyond this
+    TRACE_DIR = "traces"
+    TRACE_HOTKEY = "f11"
     
     # Debug
 
@@ -0,0 +1,183 @@
+"""
+ACTION SCHEDULER MODULE
+-----------------------
+Runs input actions (drags, key presses) on their own thread so the
+decision loop never blocks on them.
+
+Jobs run one at a time, in due-time order (FIFO for equal times), so
+inputs never interleave. Each job can carry a delay, an on_done
+callback that runs on the scheduler thread right after it succeeds, and
+an on_finish callback that runs however it ends: succeeded, failed, or
+cancelled before it started (then on the cancelling thread).
+
+Timing is against absolute perf_counter deadlines: sleep_until() lets
+the OS sleep for the bulk of a wait and busy-waits the last
+ACTION_SPIN_TIME, because OS sleeps overshoot by up to a scheduler
+tick. play() runs a timed sequence of input events (e.g. the steps of
+a drag) this way, so the error doesn't accumulate from step to step.
+"""
+import heapq
+import itertools
+import threading
+import time
+from bot.config.settings import settings
+from bot.core.metrics import metrics
+from bot.core.tracing import tracer
+
+_m_lateness = metrics.histogram("action_event_lateness_seconds", "How late timed input events went out")
+
+
+def sleep_until(deadline, spin=None):
+    """Return at perf_counter() >= deadline: OS sleep, then spin for the last `spin` seconds."""
+    spin = settings.ACTION_SPIN_TIME if spin is None else spin
+    remaining = deadline - time.perf_counter()
+    if remaining > spin:
+        time.sleep(remaining - spin)
+    while time.perf_counter() < deadline:
+        pass
+
+
+def play(offsets, fn, args, start=None):
+    """
+    Call fn(*args[i]) at start + offsets[i] for each i (start defaults to now).
+    Returns the worst lateness in seconds.
+    """
+    start = time.perf_counter() if start is None else start
+    worst = 0.0
+    for offset, event_args in zip(offsets, args):
+        deadline = start + offset
+        sleep_until(deadline)
+        fn(*event_args)
+        late = time.perf_counter() - deadline
+        _m_lateness.observe(late)
+        worst = max(worst, late)
+    return worst
+
+
+class ActionJob:
+    __slots__ = ("name", "fn", "args", "kwargs", "due", "frame", "on_done", "on_finish",
+                 "done", "cancelled", "result", "error", "started_at", "finished_at")
+
+    def __init__(self, name, fn, args, kwargs, due, frame=None, on_done=None, on_finish=None):
+        self.name = name
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.due = due              # perf_counter time it may start
+        self.frame = frame          # frame the decision was made on (for tracing)
+        self.on_done = on_done
+        self.on_finish = on_finish
+        self.done = threading.Event()
+        self.cancelled = False
+        self.result = None
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+
+    def __repr__(self):
+        return f"ActionJob({self.name}, done={self.done.is_set()})"
+
+
+class ActionScheduler:
+    def __init__(self):
+        self._jobs = []  # heap of (due, seq, job)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._current = None
+        self.running = False
+        self.thread = None
+        self.jobs_run = 0
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join()
+
+    @property
+    def busy(self):
+        """True while a job is running or waiting to run."""
+        return self._current is not None or bool(self._jobs)
+
+    def submit(self, name, fn, *args, delay=0.0, on_done=None, on_finish=None, **kwargs):
+        """Queue fn(*args, **kwargs) to run `delay` seconds from now (after anything already due)."""
+        job = ActionJob(name, fn, args, kwargs, time.perf_counter() + delay,
+                        frame=tracer.current_frame(), on_done=on_done, on_finish=on_finish)
+        with self._cond:
+            heapq.heappush(self._jobs, (job.due, next(self._seq), job))
+            self._cond.notify_all()
+        return job
+
+    def cancel_pending(self):
+        """Drop every job that hasn't started yet. The running one (if any) finishes."""
+        with self._cond:
+            cancelled = [job for _, _, job in self._jobs]
+            self._jobs.clear()
+        for job in cancelled:
+            job.cancelled = True
+            self._finish(job)
+
+    def wait_idle(self, timeout=None):
+        """Block until nothing is running or queued. False on timeout."""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while self.busy:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while self.running:
+                    if self._jobs:
+                        wait = self._jobs[0][0] - time.perf_counter()
+                        if wait <= settings.ACTION_SPIN_TIME:
+                            break  # close enough: spin the rest outside the lock
+                        self._cond.wait(wait - settings.ACTION_SPIN_TIME)
+                    else:
+                        self._cond.wait()
+                if not self.running:
+                    return
+                _, _, job = heapq.heappop(self._jobs)
+                self._current = job
+            sleep_until(job.due)
+            self._run(job)
+
+    def _run(self, job):
+        job.started_at = time.perf_counter()
+        try:
+            job.result = job.fn(*job.args, **job.kwargs)
+        except Exception as e:
+            job.error = e
+            print(f"[ACTIONS] {job.name} failed: {e}")
+        job.finished_at = time.perf_counter()
+        tracer.record(job.name, job.started_at, job.finished_at, job.frame)
+        self.jobs_run += 1
+        if job.error is None:
+            _callback(job, job.on_done)
+        self._current = None
+        self._finish(job)
+
+    @staticmethod
+    def _finish(job):
+        _callback(job, job.on_finish)
+        job.done.set()
+
+
+def _callback(job, fn):
+    """Run a job callback; a raising one is logged, not allowed to kill the scheduler thread."""
+    if fn is None:
+        return
+    try:
+        fn(job)
+    except Exception as e:
+        print(f"[ACTIONS] {job.name} callback failed: {e!r}")
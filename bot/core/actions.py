@@ -2,19 +2,59 @@
 ACTIONS MODULE
 --------------
 Handles mouse/keyboard actions with human-like randomization.
+Low-level events go to a pluggable input sink (see input_sinks); with a
+RecordingSink nothing reaches the OS and event timing can be inspected.
+NullActions is a drop-in sink that only records calls (benchmarks, Linux CI).
+
+Smooth moves are precomputed: drag_trajectory() turns a distance, step
+count and easing into integer per-step moves (cached), which are then
+played against absolute deadlines (see action_scheduler.play).
 """
 
-import pyautogui
 import random
 import time
-import win32api
-import win32con
+from functools import lru_cache
+import numpy as np
+from bot.config.settings import settings
+from bot.core.action_scheduler import play, sleep_until
+from bot.core.input_sinks import Win32InputSink
+
+try:
+    import pyautogui
+except Exception:  # no Windows input stack (or no display): only NullActions / RecordingSink work here
+    pyautogui = None
+
+
+def linear(t):
+    return t
+
+
+def ease_out_quad(t):
+    """
+    Ease-out quadratic tween function.
+    t should be in the range [0, 1].
+    """
+    return 1 - (1 - t) * (1 - t)
+
+
+@lru_cache(maxsize=512)
+def drag_trajectory(dx, dy, steps, easing=linear):
+    """
+    Integer (dx, dy) moves, one row per step, that add up to exactly (dx, dy)
+    along the eased path. Rounding the cumulative position (not each step)
+    keeps fractional pixels from being lost. Read-only and cached.
+    """
+    eased = easing(np.arange(1, steps + 1) / steps)
+    path = np.rint(np.outer(eased, (dx, dy))).astype(np.int32)
+    moves = np.diff(path, axis=0, prepend=np.zeros((1, 2), dtype=np.int32))
+    moves.flags.writeable = False
+    return moves
+
 
 class Actions:
-    def __init__(self):
-        # Disable pyautogui's failsafe (use with caution!)
-        pyautogui.FAILSAFE = False
-        self.screen_width, self.screen_height = pyautogui.size()
+    def __init__(self, sink=None):
+        self.sink = sink or Win32InputSink()
+        self.screen_width, self.screen_height = self.sink.screen_size()
         self.MOUSE_SENSITIVITY = 1.0  # Pixels per ms of movement (needs calibration)
 
     def human_move(self, x: int, y: int):
@@ -37,10 +77,25 @@ class Actions:
     def press_key(self, key: str, repeats: int = 1):
         """Presses a key with human-like timing."""
         for _ in range(repeats):
-            pyautogui.keyDown(key)
+            self.sink.key_down(key)
             time.sleep(random.uniform(0.05, 0.1))
-            pyautogui.keyUp(key)
+            self.sink.key_up(key)
             time.sleep(random.uniform(0.1, 0.3))
+
+    def key_down(self, key: str):
+        self.sink.key_down(key)
+
+    def key_up(self, key: str):
+        self.sink.key_up(key)
+
+    def tap(self, key: str):
+        """Single press with no added delays."""
+        self.sink.press(key)
+
+    def read_pixel(self, x: int, y: int):
+        """RGB tuple of one screen pixel."""
+        return self.sink.read_pixel(x, y)
+
     def rotate(self, direction, duration):
         """Perform human-like rotation"""
         key = 'D' if direction == 'right' else 'A'
@@ -49,54 +104,45 @@ class Actions:
     def _human_key_press(self, key, duration):
         """Press key with human-like variance"""
         actual_duration = duration * random.uniform(0.8, 1.2)
-        pyautogui.keyDown(key)
+        self.sink.key_down(key)
         time.sleep(actual_duration)
-        pyautogui.keyUp(key)
+        self.sink.key_up(key)
         time.sleep(random.uniform(0.1, 0.3))
         
     def right_click_down(self):
         """Simulate pressing the right mouse button down."""
-        win32api.mouse_event(win32con.MOUSEEVENTF_RIGHTDOWN, 0, 0, 0, 0)
+        self.sink.right_down()
 
     def right_click_up(self):
         """Simulate releasing the right mouse button."""
-        win32api.mouse_event(win32con.MOUSEEVENTF_RIGHTUP, 0, 0, 0, 0)
+        self.sink.right_up()
 
     def move_mouse_relative(self, dx, dy):
         """
         Move the mouse by a relative amount.
         dx and dy should be integers.
         """
-        win32api.mouse_event(win32con.MOUSEEVENTF_MOVE, int(dx), int(dy), 0, 0)
+        self.sink.move_relative(dx, dy)
 
     def ease_out_quad(self, t):
         """
         Ease-out quadratic tween function.
         t should be in the range [0, 1].
         """
-        return 1 - (1 - t) * (1 - t)
+        return ease_out_quad(t)
 
-    def smooth_move_relative(self, dx, dy, duration, steps, easing_func=None):
+    def smooth_move_relative(self, dx, dy, duration, steps, easing_func=None, start=None):
         """
         Move the mouse smoothly by dx, dy over the specified duration and steps.
-        An easing function can be provided for non-linear movement.
+        An easing function can be provided for non-linear movement (it must
+        work on numpy arrays). Step i goes out at start + i * duration / steps
+        (start defaults to now) and the call returns at start + duration.
         """
-        if easing_func is None:
-            easing_func = lambda t: t
-
-        cumulative_x = 0.0
-        cumulative_y = 0.0
-        for step in range(1, steps + 1):
-            t = step / steps
-            eased_t = easing_func(t)
-            target_x = dx * eased_t
-            target_y = dy * eased_t
-            move_dx = target_x - cumulative_x
-            move_dy = target_y - cumulative_y
-            self.move_mouse_relative(move_dx, move_dy)
-            cumulative_x = target_x
-            cumulative_y = target_y
-            time.sleep(duration / steps)
+        moves = drag_trajectory(int(round(dx)), int(round(dy)), steps, easing_func or linear)
+        start = time.perf_counter() if start is None else start
+        interval = duration / steps
+        play((i * interval for i in range(steps)), self.sink.move_relative, moves.tolist(), start)
+        sleep_until(start + duration)
 
     def mouse_drag(self, direction, distance):
         """
@@ -107,9 +153,11 @@ class Actions:
         """
 
         print(f"Performing a {direction} drag by {distance} pixels...")
+        # One timeline for the whole drag, so waits don't add up their sleep overshoot
+        start = time.perf_counter()
         # Press and hold the right mouse button
         self.right_click_down()
-        time.sleep(0.15)  # Allow time for click registration
+        press_delay = 0.15  # Allow time for click registration
 
         # Determine horizontal movement (negative for left drag)
         dx = distance if direction.lower() == 'right' else -distance
@@ -121,8 +169,37 @@ class Actions:
         duration = 0.30#random.uniform(0.30 , 0.35)
 
         # Perform smooth movement with an ease-out quadratic effect
-        self.smooth_move_relative(dx, dy, duration, num_steps, easing_func=self.ease_out_quad)
+        self.smooth_move_relative(dx, dy, duration, num_steps, easing_func=ease_out_quad,
+                                  start=start + press_delay)
 
         # Release the right mouse button
         self.right_click_up()
-        time.sleep(random.uniform(0.2, 0.4))
\ No newline at end of file
+        sleep_until(start + press_delay + duration + random.uniform(0.2, 0.4))
+
+    def steer(self, dx):
+        """
+        Short right-click drag by dx pixels (signed, positive = right) for small
+        corrections while walking; no settle pause afterwards.
+        """
+        start = time.perf_counter()
+        self.right_click_down()
+        self.smooth_move_relative(dx, 0, settings.STEER_DURATION, settings.STEER_STEPS,
+                                  easing_func=ease_out_quad, start=start + settings.STEER_PRESS_DELAY)
+        self.right_click_up()
+
+
+class NullActions:
+    """Same interface as Actions, but nothing reaches the OS. Calls are counted."""
+    def __init__(self):
+        self.screen_width, self.screen_height = 0, 0
+        self.calls = {}
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def record(*args, **kwargs):
+            self.calls[name] = self.calls.get(name, 0) + 1
+            if name == "read_pixel":
+                return (0, 0, 0)
+        return record
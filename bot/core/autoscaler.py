@@ -0,0 +1,111 @@
+"""
+AUTOSCALER MODULE
+-----------------
+Grows or shrinks DetectionManager's active worker set at runtime.
+
+Every AUTOSCALE_INTERVAL seconds the controller looks at what the
+workers achieved in that window: mean frame age when predictions were
+published and how many frames were published compared to captured.
+  - Already keeping up with capture: try one worker fewer (less CPU,
+    less contention, often lower latency).
+  - Falling behind and frames are older than AUTOSCALE_TARGET_AGE:
+    try one worker more.
+  - Comfortably under target: try one worker fewer.
+A change that makes frame age worse by more than AUTOSCALE_TOLERANCE,
+or stops the workers keeping up with capture, is reverted in the next
+window, and the controller then holds still for AUTOSCALE_HOLD windows,
+so it settles instead of oscillating.
+"""
+import threading
+import time
+from collections import deque
+from bot.config.settings import settings
+from bot.core.metrics import metrics
+
+
+class WorkerAutoscaler:
+    def __init__(self, manager, min_workers=None, max_workers=None, interval=None,
+                 target_age=None, tolerance=None, hold=None):
+        self.manager = manager
+        self.min_workers = max(1, min_workers or settings.AUTOSCALE_MIN_WORKERS)
+        self.max_workers = max_workers or manager.num_workers
+        self.interval = interval or settings.AUTOSCALE_INTERVAL
+        self.target_age = target_age or settings.AUTOSCALE_TARGET_AGE
+        self.tolerance = settings.AUTOSCALE_TOLERANCE if tolerance is None else tolerance
+        self.hold = settings.AUTOSCALE_HOLD if hold is None else hold
+
+        self._trial = None  # (worker count, age, keeping up) before the last change
+        self._holding = 0
+        self.decisions = deque(maxlen=100)  # (perf_counter, old, new, reason)
+        self._stop = threading.Event()
+        self.thread = None
+
+        metrics.gauge("detection_active_workers", "Workers currently running detection",
+                      fn=lambda: self.manager.active_workers)
+        self._m_decisions = {
+            direction: metrics.counter("detection_autoscale_decisions", "Worker count changes", direction=direction)
+            for direction in ("up", "down", "revert")
+        }
+
+    def start(self):
+        self._stop.clear()
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self.thread:
+            self.thread.join()
+
+    def _loop(self):
+        last_frame = self.manager.capturer.frame_number
+        last_time = time.perf_counter()
+        self.manager.take_window()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            frame = self.manager.capturer.frame_number
+            window = self.manager.take_window()
+            elapsed, captured = now - last_time, frame - last_frame
+            last_frame, last_time = frame, now
+
+            paused = self.manager.paused_flag and self.manager.paused_flag()
+            if paused or self.manager.low_duty_active or window["published"] == 0:
+                self._trial = None  # measurements from this window say nothing about scaling
+                continue
+            self.step(window["mean_age"], window["published"] / elapsed, captured / elapsed)
+
+    def step(self, age, publish_rate, capture_rate):
+        """One decision from a window's mean frame age (s) and publish/capture rates (frames/s)."""
+        current = self.manager.active_workers
+        keeping_up = capture_rate > 0 and publish_rate >= 0.9 * capture_rate
+
+        if self._trial is not None:
+            previous_count, previous_age, was_keeping_up = self._trial
+            self._trial = None
+            if age > previous_age * (1 + self.tolerance) or (was_keeping_up and not keeping_up):
+                self._holding = self.hold
+                self._apply(previous_count, "revert",
+                            f"age {previous_age * 1000:.0f}ms -> {age * 1000:.0f}ms", age, publish_rate, capture_rate)
+                return
+        if self._holding:
+            self._holding -= 1
+            return
+
+        if keeping_up and current > self.min_workers:
+            target, reason = current - 1, "keeping up with capture"
+        elif age > self.target_age and current < self.max_workers:
+            target, reason = current + 1, "frames too old"
+        elif age < self.target_age / 2 and current > self.min_workers:
+            target, reason = current - 1, "well under target age"
+        else:
+            return
+        self._trial = (current, age, keeping_up)
+        self._apply(target, "up" if target > current else "down", reason, age, publish_rate, capture_rate)
+
+    def _apply(self, count, direction, reason, age, publish_rate, capture_rate):
+        old = self.manager.active_workers
+        self.manager.set_active_workers(count)
+        self.decisions.append((time.perf_counter(), old, count, reason))
+        self._m_decisions[direction].inc()
+        print(f"[AUTOSCALE] {old} -> {count} workers ({reason}; age {age * 1000:.0f}ms, "
+              f"{publish_rate:.1f}/s published of {capture_rate:.1f} fps captured)")
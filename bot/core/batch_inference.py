@@ -0,0 +1,126 @@
+"""
+BATCH INFERENCE MODULE
+----------------------
+Lets several detection workers share one inference engine.
+Workers submit single preprocessed blobs; a collector thread stacks them
+into an NCHW batch (up to batch_size, or whatever arrived before the
+max_wait deadline), runs one forward pass and hands each worker its row.
+"""
+import queue
+import threading
+import time
+import numpy as np
+
+from bot.config.settings import settings
+from bot.core.inference_backends import InferenceBackend, create_backend, infer_chunked
+
+
+class _BatchRequest:
+    __slots__ = ("blob", "output", "error", "done")
+
+    def __init__(self, blob):
+        self.blob = blob
+        self.output = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class BatchedInference(InferenceBackend):
+    """
+    InferenceBackend that batches concurrent infer() calls onto a shared engine.
+    Pass it as the backend of each worker's ObjectDetector.
+    """
+    name = "batched"
+
+    def __init__(self, engine=None, batch_size=None, max_wait=None):
+        self.engine = engine or create_backend()
+        self.batch_size = batch_size or settings.DETECTION_BATCH_SIZE
+        self.max_wait = settings.DETECTION_BATCH_MAX_WAIT if max_wait is None else max_wait
+
+        self.requests = queue.Queue()
+        self._batch = None  # (batch_size, 3, S, S), allocated on first use
+        self.running = False
+        self.thread = None
+
+        # Simple counters for tuning batch_size / max_wait
+        self.batches_run = 0
+        self.frames_run = 0
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._collector_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join()
+        # Don't leave any worker waiting on a batch that will never run
+        while not self.requests.empty():
+            request = self.requests.get_nowait()
+            request.error = RuntimeError("BatchedInference stopped")
+            request.done.set()
+
+    @property
+    def mean_batch_size(self):
+        return self.frames_run / self.batches_run if self.batches_run else 0.0
+
+    def infer(self, blob):
+        """
+        Queue each (1, 3, S, S) row of `blob` (one frame, or several tiles of
+        one frame) and block until all of them have run.
+        """
+        requests = [_BatchRequest(blob[i:i + 1]) for i in range(len(blob))]
+        for request in requests:
+            self.requests.put(request)
+        for request in requests:
+            request.done.wait()
+            if request.error is not None:
+                raise request.error
+        if len(requests) == 1:
+            return requests[0].output
+        return np.concatenate([request.output for request in requests])
+
+    def _collector_loop(self):
+        while self.running:
+            try:
+                pending = [self.requests.get(timeout=0.1)]
+            except queue.Empty:
+                continue
+
+            # Fill the batch until it is full or the oldest frame has waited long enough
+            deadline = time.perf_counter() + self.max_wait
+            while len(pending) < self.batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    pending.append(self.requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._run_batch(pending)
+
+    def _run_batch(self, pending):
+        try:
+            first = pending[0].blob
+            if self._batch is None or self._batch.shape[1:] != first.shape[1:]:
+                self._batch = np.empty((self.batch_size,) + first.shape[1:], dtype=np.float32)
+
+            count = len(pending)
+            for i, request in enumerate(pending):
+                self._batch[i] = request.blob[0]
+
+            outputs = infer_chunked(self.engine, self._batch[:count])
+            for i, request in enumerate(pending):
+                request.output = outputs[i:i + 1]
+
+            self.batches_run += 1
+            self.frames_run += count
+        except Exception as e:
+            print(f"Batch inference failed: {e}")
+            for request in pending:
+                request.error = e
+        finally:
+            for request in pending:
+                request.done.set()
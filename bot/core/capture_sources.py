@@ -0,0 +1,239 @@
+"""
+CAPTURE SOURCES MODULE
+----------------------
+Where ScreenCapturer gets its frames from.
+  - DxcamSource:   live desktop capture (Windows only).
+  - ReplaySource:  plays back a recording at original speed, a fixed FPS,
+                   or as fast as possible, so the pipeline can run offline.
+  - FrameRecorder: writes frames + capture timestamps to a recording.
+
+A recording is a directory:
+    meta.json          shape, codec, chunk size, frame count
+    timestamps.npy     original perf_counter capture times (float64)
+    chunk_00000.npy    "raw" codec: (N, H, W, 3) uint8, memory-mapped on replay
+                       (N is capped so a chunk stays under RECORDING_RAW_CHUNK_MB)
+    chunk_00000.avi    "mjpg" codec: motion-JPEG video chunk (much smaller, lossy)
+"""
+import json
+import os
+import queue
+import threading
+import time
+import cv2
+import numpy as np
+from bot.config.settings import settings
+
+CODECS = ("raw", "mjpg")
+
+
+class CaptureSource:
+    """Base interface: grab() returns a BGR frame, or None if nothing new is available."""
+    finished = False  # True once a finite source has run out of frames
+
+    def grab(self, region=None):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class DxcamSource(CaptureSource):
+    def __init__(self):
+        import dxcam  # Windows-only, so only imported for live capture
+        self.camera = dxcam.create(output_color="BGR")
+
+    def grab(self, region=None):
+        return self.camera.grab(region=region)
+
+    def close(self):
+        self.camera.release()
+
+
+def _chunk_path(path, index, codec):
+    return os.path.join(path, f"chunk_{index:05d}.{'npy' if codec == 'raw' else 'avi'}")
+
+
+class FrameRecorder:
+    """
+    Records frames on a background thread so capture isn't slowed by disk
+    or JPEG encoding. write() takes a CapturedFrame reference (released once
+    written); when the queue is full the frame is dropped and counted.
+    """
+    def __init__(self, path, codec=None, chunk_size=None, fps_hint=None, max_queue=None,
+                 raw_chunk_mb=None):
+        self.path = path
+        self.codec = codec or settings.RECORDING_CODEC
+        if self.codec not in CODECS:
+            raise ValueError(f"Unknown recording codec '{self.codec}' (choose from {CODECS})")
+        self.chunk_size = chunk_size or settings.RECORDING_CHUNK_SIZE
+        self.raw_chunk_bytes = (raw_chunk_mb or settings.RECORDING_RAW_CHUNK_MB) * 1024 * 1024
+        self.fps_hint = fps_hint or 60  # only used for the video container header
+        os.makedirs(path, exist_ok=True)
+
+        self.queue = queue.Queue(maxsize=max_queue or settings.RECORDING_MAX_QUEUE)
+        self.timestamps = []
+        self.shape = None
+        self.frames_dropped = 0
+        self._chunk = None
+        self._chunk_index = -1
+        self._chunk_fill = 0
+
+        self.thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self.thread.start()
+
+    @property
+    def frames_written(self):
+        return len(self.timestamps)
+
+    def write(self, captured):
+        try:
+            self.queue.put_nowait(captured.acquire())
+        except queue.Full:
+            captured.release()
+            self.frames_dropped += 1
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+        self._close_chunk()
+        np.save(os.path.join(self.path, "timestamps.npy"), np.asarray(self.timestamps, dtype=np.float64))
+        with open(os.path.join(self.path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "codec": self.codec,
+                "shape": list(self.shape) if self.shape else None,
+                "chunk_size": self.chunk_size,
+                "frames": self.frames_written,
+                "frames_dropped": self.frames_dropped,
+            }, f, indent=2)
+        print(f"[RECORDER] {self.frames_written} frames written to {self.path} "
+              f"({self.frames_dropped} dropped)")
+
+    def _writer_loop(self):
+        while True:
+            captured = self.queue.get()
+            if captured is None:
+                break
+            with captured:
+                self._append(captured.image, captured.timestamp)
+
+    def _append(self, image, timestamp):
+        if self.shape is None:
+            self.shape = image.shape
+            if self.codec == "raw":
+                # A raw chunk is a full-size memmap from the start: bound it by bytes, not just frames
+                self.chunk_size = max(1, min(self.chunk_size, self.raw_chunk_bytes // image.nbytes))
+        if self._chunk is None or self._chunk_fill == self.chunk_size:
+            self._open_chunk()
+
+        if self.codec == "raw":
+            self._chunk[self._chunk_fill] = image
+        else:
+            self._chunk.write(image)
+        self._chunk_fill += 1
+        self.timestamps.append(timestamp)
+
+    def _open_chunk(self):
+        self._close_chunk()
+        self._chunk_index += 1
+        self._chunk_fill = 0
+        path = _chunk_path(self.path, self._chunk_index, self.codec)
+        if self.codec == "raw":
+            self._chunk = np.lib.format.open_memmap(
+                path, mode="w+", dtype=np.uint8, shape=(self.chunk_size,) + tuple(self.shape))
+        else:
+            h, w = self.shape[:2]
+            self._chunk = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), self.fps_hint, (w, h))
+
+    def _close_chunk(self):
+        if self._chunk is None:
+            return
+        if self.codec == "raw":
+            self._chunk.flush()
+            del self._chunk
+        else:
+            self._chunk.release()
+        self._chunk = None
+
+
+class ReplaySource(CaptureSource):
+    """
+    Plays back a FrameRecorder directory.
+      mode="original": keep the recorded inter-frame timing
+      mode="fixed":    pace at `fps`
+      mode="fast":     return frames as fast as they are requested
+    """
+    MODES = ("original", "fixed", "fast")
+
+    def __init__(self, path, mode=None, fps=None, loop=False):
+        self.path = path
+        self.mode = mode or settings.REPLAY_MODE
+        if self.mode not in self.MODES:
+            raise ValueError(f"Unknown replay mode '{self.mode}' (choose from {self.MODES})")
+        self.fps = fps or settings.REPLAY_FPS
+        self.loop = loop
+
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.codec = self.meta["codec"]
+        self.chunk_size = self.meta["chunk_size"]
+        self.timestamps = np.load(os.path.join(path, "timestamps.npy"))
+        self.frame_count = len(self.timestamps)
+
+        self.index = 0
+        self._chunk = None
+        self._chunk_index = -1
+        self._start = None
+
+    def __len__(self):
+        return self.frame_count
+
+    def grab(self, region=None):
+        if self.index >= self.frame_count:
+            if not self.loop or self.frame_count == 0:
+                self.finished = True
+                return None
+            self.index = 0
+            self._start = None
+            self.close()  # rewind video chunks
+
+        self._wait_for_due_time()
+        frame = self._read(self.index)
+        self.index += 1
+        return frame
+
+    def _wait_for_due_time(self):
+        now = time.perf_counter()
+        if self._start is None:
+            self._start = now
+        if self.mode == "fast":
+            return
+        if self.mode == "original":
+            due = self._start + (self.timestamps[self.index] - self.timestamps[0])
+        else:
+            due = self._start + self.index / self.fps
+        if due > now:
+            time.sleep(due - now)
+
+    def _read(self, index):
+        chunk_index, offset = divmod(index, self.chunk_size)
+        if chunk_index != self._chunk_index:
+            self._open_chunk(chunk_index)
+        if self.codec == "raw":
+            return self._chunk[offset]
+        ok, frame = self._chunk.read()  # video chunks are read sequentially
+        return frame if ok else None
+
+    def _open_chunk(self, chunk_index):
+        self.close()
+        path = _chunk_path(self.path, chunk_index, self.codec)
+        if self.codec == "raw":
+            self._chunk = np.load(path, mmap_mode="r")
+        else:
+            self._chunk = cv2.VideoCapture(path)
+        self._chunk_index = chunk_index
+
+    def close(self):
+        if self._chunk is not None and self.codec != "raw":
+            self._chunk.release()
+        self._chunk = None
+        self._chunk_index = -1
@@ -0,0 +1,79 @@
+"""
+CHANGE GATE MODULE
+------------------
+Skips inference on frames that look like the last inferred one.
+
+Each frame is reduced to a small grayscale thumbnail (strided subsample
++ area resize, ~1 ms for a 2560x1600 frame). If its mean absolute
+difference from the thumbnail of the last *inferred* frame is below
+CHANGE_GATE_THRESHOLD, the previous detections are reused instead of
+running the model. Comparing against the last inferred frame (not the
+previous frame) means slow drift still adds up and triggers inference.
+
+A forced refresh every CHANGE_GATE_MAX_SKIP_TIME seconds keeps results
+from going stale if something changes below the threshold.
+"""
+import threading
+import cv2
+import numpy as np
+from bot.config.settings import settings
+
+
+class ChangeGate:
+    def __init__(self, threshold=None, thumb_size=None, max_skip_time=None):
+        self.threshold = threshold if threshold is not None else settings.CHANGE_GATE_THRESHOLD
+        self.thumb_size = tuple(thumb_size or settings.CHANGE_GATE_THUMB_SIZE)  # (width, height)
+        self.max_skip_time = max_skip_time if max_skip_time is not None else settings.CHANGE_GATE_MAX_SKIP_TIME
+        self.lock = threading.Lock()
+
+        # Last inferred frame: thumbnail, its result and capture time
+        self._thumb = None
+        self._result = None
+        self._timestamp = float("-inf")
+
+        # Counters
+        self.checks = 0
+        self.skips = 0
+        self.last_difference = None
+
+    @property
+    def skip_rate(self):
+        return self.skips / self.checks if self.checks else 0.0
+
+    def thumbnail(self, frame):
+        """Small int16 grayscale thumbnail of a BGR frame."""
+        w, h = self.thumb_size
+        # Subsample first so the area resize only touches a fraction of the pixels
+        step = max(1, min(frame.shape[1] // (w * 2), frame.shape[0] // (h * 2)))
+        small = cv2.resize(frame[::step, ::step], (w, h), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.int16)
+
+    def lookup(self, frame, timestamp):
+        """
+        Returns (previous_result, thumbnail). previous_result is None when the
+        frame has to be inferred; pass the thumbnail to store() afterwards.
+        """
+        thumb = self.thumbnail(frame)
+        with self.lock:
+            self.checks += 1
+            if self._thumb is None or timestamp - self._timestamp > self.max_skip_time:
+                return None, thumb
+            self.last_difference = float(np.abs(thumb - self._thumb).mean())
+            if self.last_difference >= self.threshold:
+                return None, thumb
+            self.skips += 1
+            return self._result, thumb
+
+    def store(self, thumb, result, timestamp):
+        """Make an inferred frame the new reference (ignored if a newer one is already stored)."""
+        with self.lock:
+            if timestamp <= self._timestamp:
+                return
+            self._thumb, self._result, self._timestamp = thumb, result, timestamp
+
+    def reset(self):
+        with self.lock:
+            self._thumb, self._result, self._timestamp = None, None, float("-inf")
+
+    def stats(self):
+        return {"checks": self.checks, "skips": self.skips, "skip_rate": self.skip_rate}
@@ -0,0 +1,199 @@
+"""
+DATASET WRITER MODULE
+---------------------
+Turns captured frames into a training-image dataset without slowing
+capture down.
+
+submit() takes a CapturedFrame reference and:
+  - computes a 64-bit perceptual hash (DCT of a 32x32 grayscale
+    thumbnail, upper-left 8x8 coefficients against their median) and
+    rejects the frame if it is within DATASET_DEDUP_THRESHOLD bits of
+    one of the last DATASET_DEDUP_WINDOW kept frames (a frame that then
+    fails to write is forgotten again),
+  - hands it to a pool of DATASET_ENCODERS threads (cv2 encodes without
+    holding the GIL). At most DATASET_MAX_PENDING frames wait for an
+    encoder; beyond that frames are dropped and counted.
+
+Output layout:
+    manifest.jsonl         one line per kept frame: file, frame number,
+                           capture/wall time, perceptual hash, variants
+    shard_00000/           DATASET_SHARD_SIZE frames per shard
+        00001234_9f3a....jpg
+        00001234_9f3a..._half.jpg   optional variants (DATASET_VARIANTS)
+
+Variants are ("name", "scale", factor) or ("name", "crop", (x, y, w, h))
+in frame pixels. Re-opening an existing directory appends to it.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import cv2
+import numpy as np
+from bot.config.settings import settings
+
+FORMATS = ("jpg", "webp", "png")
+
+
+def perceptual_hash(image):
+    """64-bit DCT hash of a BGR image, as a Python int."""
+    h, w = image.shape[:2]
+    # Subsample first so the area resize only touches a fraction of the pixels
+    step = max(1, min(w, h) // 128)
+    small = cv2.resize(image[::step, ::step], (32, 32), interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.float32)
+    low = cv2.dct(gray)[:8, :8].flatten()
+    bits = low[1:] > np.median(low[1:])  # skip the DC term, it only measures brightness
+    return int(np.packbits(np.append(bits, False)).view(">u8")[0])
+
+
+def hamming_distances(value, hashes):
+    """Bit differences between one hash and an array of uint64 hashes."""
+    x = np.bitwise_xor(hashes, np.uint64(value))
+    return np.unpackbits(x.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+class DatasetWriter:
+    def __init__(self, output_dir=None, shard_size=None, fmt=None, quality=None, dedup_threshold=None,
+                 dedup_window=None, variants=None, encoders=None, max_pending=None):
+        self.output_dir = output_dir or settings.DATASET_DIR
+        self.shard_size = shard_size or settings.DATASET_SHARD_SIZE
+        self.format = fmt or settings.DATASET_FORMAT
+        if self.format not in FORMATS:
+            raise ValueError(f"Unknown image format '{self.format}' (choose from {FORMATS})")
+        self.quality = quality or settings.DATASET_QUALITY
+        # Negative threshold turns dedup off
+        self.dedup_threshold = settings.DATASET_DEDUP_THRESHOLD if dedup_threshold is None else dedup_threshold
+        self.dedup_window = dedup_window or settings.DATASET_DEDUP_WINDOW
+        self.variants = tuple(settings.DATASET_VARIANTS if variants is None else variants)
+        self.max_pending = max_pending or settings.DATASET_MAX_PENDING
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self._hashes = np.zeros(self.dedup_window, dtype=np.uint64)
+        self._hash_live = np.zeros(self.dedup_window, dtype=bool)  # slots holding a kept frame's hash
+        self._hash_count = 0
+        self._pending = 0
+        self.kept = self._existing_frames()
+        self.written = 0
+        self.duplicates = 0
+        self.dropped = 0
+        self.failed = 0
+        self.started_at = time.perf_counter()
+
+        self._manifest = open(os.path.join(self.output_dir, "manifest.jsonl"), "a", encoding="utf-8")
+        self._pool = ThreadPoolExecutor(max_workers=encoders or settings.DATASET_ENCODERS,
+                                        thread_name_prefix="dataset-encoder")
+
+    def _existing_frames(self):
+        path = os.path.join(self.output_dir, "manifest.jsonl")
+        if not os.path.exists(path):
+            return 0
+        with open(path, encoding="utf-8") as f:
+            return sum(1 for line in f if line.strip())
+
+    def submit(self, captured):
+        """
+        Queue a CapturedFrame for writing. Returns "kept", "duplicate" or "dropped".
+        The writer takes its own reference; the caller still releases theirs.
+        """
+        phash = perceptual_hash(captured.image)
+        with self.lock:
+            if self.dedup_threshold >= 0 and self._hash_live.any():
+                recent = self._hashes[self._hash_live]
+                if hamming_distances(phash, recent).min() <= self.dedup_threshold:
+                    self.duplicates += 1
+                    return "duplicate"
+            if self._pending >= self.max_pending:
+                self.dropped += 1
+                return "dropped"
+            # Recorded now so near-duplicates submitted meanwhile are caught; undone if the write fails
+            slot = self._hash_count % self.dedup_window
+            self._hashes[slot] = phash
+            self._hash_live[slot] = True
+            self._hash_count += 1
+            self._pending += 1
+            index = self.kept
+            self.kept += 1
+        self._pool.submit(self._encode, captured.acquire(), index, slot, phash, datetime.now())
+        return "kept"
+
+    def _encode(self, captured, index, slot, phash, wall_time):
+        try:
+            with captured:
+                shard = f"shard_{index // self.shard_size:05d}"
+                os.makedirs(os.path.join(self.output_dir, shard), exist_ok=True)
+                stem = os.path.join(shard, f"{captured.number:08d}_{phash:016x}")
+                self._write_image(f"{stem}.{self.format}", captured.image)
+                variants = []
+                for name, kind, value in self.variants:
+                    path = f"{stem}_{name}.{self.format}"
+                    self._write_image(path, self._variant(captured.image, kind, value))
+                    variants.append(path.replace(os.sep, "/"))
+                entry = {
+                    "file": f"{stem}.{self.format}".replace(os.sep, "/"),
+                    "frame": captured.number,
+                    "timestamp": captured.timestamp,
+                    "wall_time": wall_time.isoformat(timespec="milliseconds"),
+                    "phash": f"{phash:016x}",
+                    "variants": variants,
+                }
+            with self.lock:
+                self._manifest.write(json.dumps(entry) + "\n")
+                self.written += 1
+        except Exception as e:
+            with self.lock:
+                self.failed += 1
+                if self._hashes[slot] == phash:  # not yet reused by a newer frame
+                    self._hash_live[slot] = False
+            print(f"[DATASET] Failed to write frame {captured.number}: {e}")
+        finally:
+            with self.lock:
+                self._pending -= 1
+
+    def _write_image(self, relative_path, image):
+        if self.format == "jpg":
+            params = [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+        elif self.format == "webp":
+            params = [cv2.IMWRITE_WEBP_QUALITY, self.quality]
+        else:
+            params = []
+        ok, encoded = cv2.imencode(f".{self.format}", image, params)
+        if not ok:
+            raise RuntimeError(f"{self.format} encoding failed")
+        with open(os.path.join(self.output_dir, relative_path), "wb") as f:
+            f.write(encoded.tobytes())
+
+    @staticmethod
+    def _variant(image, kind, value):
+        if kind == "scale":
+            h, w = image.shape[:2]
+            return cv2.resize(image, (int(w * value), int(h * value)), interpolation=cv2.INTER_AREA)
+        if kind == "crop":
+            x, y, w, h = value
+            return image[y:y + h, x:x + w]
+        raise ValueError(f"Unknown variant kind '{kind}' (use 'scale' or 'crop')")
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.started_at
+        with self.lock:
+            return {
+                "written": self.written,
+                "duplicates": self.duplicates,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "pending": self._pending,
+                "written_per_second": self.written / elapsed if elapsed > 0 else 0.0,
+            }
+
+    def close(self):
+        """Finish queued encodes and close the manifest."""
+        self._pool.shutdown(wait=True)
+        self._manifest.close()
+        stats = self.stats()
+        print(f"[DATASET] {stats['written']} frames written to {self.output_dir} "
+              f"({stats['duplicates']} near-duplicates skipped, {stats['dropped']} dropped, "
+              f"{stats['failed']} failed)")
+        return stats
@@ -0,0 +1,208 @@
+"""
+DEBUG WRITER MODULE
+-------------------
+Writes annotated debug frames on a background thread, so DEBUG mode
+doesn't cost the capture/detection/decision threads an image encode.
+
+submit() only decides whether a frame is sampled and queues it:
+  - DEBUG_SAMPLE = "every":         every DEBUG_SAMPLE_EVERY-th submitted frame,
+  - DEBUG_SAMPLE = "target_change": only when the selected target changes.
+The queue holds at most DEBUG_MAX_QUEUE frames; when it's full the
+oldest one is dropped (newer frames are the interesting ones).
+
+The writer thread downscales by DEBUG_SCALE before drawing, encodes
+DEBUG_FORMAT ("jpg", "webp" or "png") at DEBUG_QUALITY and keeps
+DEBUG_DIR under DEBUG_MAX_DISK_MB by deleting the oldest debug frames.
+"""
+import glob
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+import cv2
+from bot.config.settings import settings
+from bot.core.metrics import metrics
+
+FORMATS = ("jpg", "webp", "png")
+SAMPLE_MODES = ("every", "target_change")
+
+
+def draw_detections(frame, detections, target=None, scale=1.0):
+    """Boxes (green) and the target (red) over `frame`, blended at 70% opacity. Boxes are in full-frame pixels."""
+    overlay = frame.copy()
+    h, w = frame.shape[:2]
+
+    def box(bbox, label, color, thickness):
+        x1, y1, x2, y2 = (int(round(v * scale)) for v in bbox)
+        x1, y1 = max(0, x1), max(0, y1)  # Prevent negative values
+        x2, y2 = min(w, x2), min(h, y2)  # Stay within frame
+        cv2.rectangle(overlay, (x1, y1), (x2, y2), color, thickness)
+        cv2.putText(overlay, label, (x1, max(0, y1 - 10)),  # Prevent text from going off-screen
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+
+    for detection in detections:
+        box(detection['bbox'], f"{detection['label']} {detection['confidence']:.2f}", (0, 255, 0), 2)
+    if target:
+        box(target['bbox'], f"{target['label']} {target['confidence']:.2f}", (0, 0, 255), 3)
+    return cv2.addWeighted(overlay, 0.7, frame, 0.3, 0)
+
+
+class DebugFrameWriter:
+    def __init__(self, directory=None, sample=None, every=None, scale=None, fmt=None, quality=None,
+                 max_queue=None, max_disk_mb=None):
+        self.directory = directory or settings.DEBUG_DIR
+        self.sample = sample or settings.DEBUG_SAMPLE
+        if self.sample not in SAMPLE_MODES:
+            raise ValueError(f"Unknown debug sampling '{self.sample}' (choose from {SAMPLE_MODES})")
+        self.every = max(1, every or settings.DEBUG_SAMPLE_EVERY)
+        self.scale = scale or settings.DEBUG_SCALE
+        self.format = fmt or settings.DEBUG_FORMAT
+        if self.format not in FORMATS:
+            raise ValueError(f"Unknown debug image format '{self.format}' (choose from {FORMATS})")
+        self.quality = quality or settings.DEBUG_QUALITY
+        self.max_queue = max_queue or settings.DEBUG_MAX_QUEUE
+        self.max_disk_bytes = (max_disk_mb or settings.DEBUG_MAX_DISK_MB) * 1024 * 1024
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self.thread = None
+        self.running = False
+        self._submitted = 0
+        self._last_target = None
+        self._files = deque()  # (path, bytes), oldest first
+        self.disk_bytes = 0
+        self.frames_written = 0
+        self.frames_dropped = 0
+
+        self._m_written = metrics.counter("debug_frames_written", "Debug frames written to disk")
+        self._m_dropped = metrics.counter("debug_frames_dropped", "Debug frames dropped because the writer fell behind")
+        self._m_write = metrics.histogram("debug_write_seconds", "Time to draw, encode and write one debug frame")
+
+    # -- Producer side --------------------------------------------------------------
+    def submit(self, frame, detections, target=None):
+        """
+        Queue a frame (CapturedFrame, or a BGR array the caller may reuse) if the
+        sampling policy wants it. Returns True if it was queued.
+        """
+        self._submitted += 1
+        if not self._wanted(target):
+            return False
+        if hasattr(frame, "acquire"):
+            item = frame.acquire()  # ring buffer reference, released once written
+        else:
+            # The caller keeps its array; a downscaled copy is cheaper than a full one
+            item = self._downscale(frame)
+            item = item.copy() if item is frame else item
+            item = (item, item.shape[1] / frame.shape[1])  # boxes get the scale the image actually got
+        self._start()
+        with self._cond:
+            if len(self._queue) >= self.max_queue:
+                self._discard(self._queue.popleft()[0])
+                self.frames_dropped += 1
+                self._m_dropped.inc()
+            self._queue.append((item, detections, target, datetime.now()))
+            self._cond.notify()
+        return True
+
+    def _wanted(self, target):
+        if self.sample == "every":
+            return (self._submitted - 1) % self.every == 0
+        key = None if not target else target.get("track_id", target["bbox"])
+        changed = key != self._last_target
+        self._last_target = key
+        return changed
+
+    def close(self):
+        """Write what's queued and stop the thread."""
+        with self._cond:
+            self.running = False
+            self._cond.notify()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+
+    # -- Writer thread ----------------------------------------------------------------
+    def _start(self):
+        if self.running:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._scan_existing()
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while self.running and not self._queue:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                item, detections, target, stamp = self._queue.popleft()
+            start = time.perf_counter()
+            try:
+                self._write(item, detections, target, stamp)
+            except Exception as e:
+                print(f"[DEBUG] Failed to write debug frame: {e}")
+            finally:
+                self._discard(item)
+            self._m_write.observe(time.perf_counter() - start)
+
+    def _write(self, item, detections, target, stamp):
+        if hasattr(item, "image"):
+            image = self._downscale(item.image)
+            scale = image.shape[1] / item.image.shape[1]
+        else:
+            image, scale = item
+        annotated = draw_detections(image, detections, target, scale)
+        if self.format == "jpg":
+            params = [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+        elif self.format == "webp":
+            params = [cv2.IMWRITE_WEBP_QUALITY, self.quality]
+        else:
+            params = []
+        ok, encoded = cv2.imencode(f".{self.format}", annotated, params)
+        if not ok:
+            raise RuntimeError(f"{self.format} encoding failed")
+
+        path = os.path.join(self.directory, f"frame_{stamp.strftime('%Y%m%d_%H%M%S_%f')}.{self.format}")
+        with open(path, "wb") as f:
+            f.write(encoded.tobytes())
+        self._files.append((path, encoded.nbytes))
+        self.disk_bytes += encoded.nbytes
+        self.frames_written += 1
+        self._m_written.inc()
+        self._rotate()
+
+    def _downscale(self, image):
+        if self.scale >= 1.0:
+            return image
+        h, w = image.shape[:2]
+        return cv2.resize(image, (int(w * self.scale), int(h * self.scale)), interpolation=cv2.INTER_AREA)
+
+    def _discard(self, item):
+        if hasattr(item, "release"):
+            item.release()
+
+    def _scan_existing(self):
+        """Count debug frames left by earlier runs towards the disk cap."""
+        paths = [p for fmt in FORMATS for p in glob.glob(os.path.join(self.directory, f"frame_*.{fmt}"))]
+        for path in sorted(paths, key=os.path.getmtime):
+            size = os.path.getsize(path)
+            self._files.append((path, size))
+            self.disk_bytes += size
+        self._rotate()
+
+    def _rotate(self):
+        while self.disk_bytes > self.max_disk_bytes and len(self._files) > 1:
+            path, size = self._files.popleft()
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            self.disk_bytes -= size
+
+
+# Process-wide writer; its thread starts with the first sampled frame
+debug_writer = DebugFrameWriter()
@@ -1,11 +1,49 @@
+import contextlib
 import threading
 import time
 from collections import deque
-import copy
 
 from bot.core.object_detector import ObjectDetector
+from bot.core.detections import Detections
+from bot.core.process_workers import DetectionProcess
+from bot.core.batch_inference import BatchedInference
+from bot.core.change_gate import ChangeGate
+from bot.core.inference_regions import InferenceRegions
+from bot.core.autoscaler import WorkerAutoscaler
+from bot.core.metrics import metrics
+from bot.core.tracing import tracer
 from bot.config.settings import settings
 
+
+class PredictionSnapshot:
+    """
+    Immutable detections for one frame, tagged with the frame number, its
+    capture time and how long inference took. Published snapshots are never
+    modified, so readers can share them without copying.
+    """
+    __slots__ = ("frame_number", "capture_time", "inference_time", "published_at", "detections")
+
+    def __init__(self, frame_number, capture_time, inference_time, detections):
+        object.__setattr__(self, "frame_number", frame_number)
+        object.__setattr__(self, "capture_time", capture_time)  # time.perf_counter() at grab
+        object.__setattr__(self, "inference_time", inference_time)  # seconds spent detecting
+        object.__setattr__(self, "published_at", time.perf_counter())
+        if not isinstance(detections, Detections):
+            detections = Detections.from_dicts(detections)
+        object.__setattr__(self, "detections", detections)  # arrays are read-only
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PredictionSnapshot is immutable")
+
+    @property
+    def age(self):
+        """Seconds since the source frame was captured."""
+        return time.perf_counter() - self.capture_time
+
+
+_EMPTY_SNAPSHOT = PredictionSnapshot(-1, float("-inf"), 0.0, ())
+
+
 class DetectionManager:
     """
     Spawns multiple threads for object detection. Each thread:
@@ -14,43 +52,175 @@ class DetectionManager:
       - Publishes the results to a shared "latest predictions" buffer.
 
     The main thread can then retrieve the most recent predictions
-    via get_latest_predictions().
+    via get_latest_predictions(), or block in wait_for_predictions()
+    until a fresher result than the last one it consumed is published.
+
+    Publishing is monotonic: a slow worker finishing an older frame never
+    replaces the result of a newer one. Reads are lock-free; each publish
+    swaps in a new immutable PredictionSnapshot.
+
+    In batching mode the workers still preprocess and postprocess in
+    parallel, but their forward passes are gathered into NCHW batches and
+    run on one shared engine (see BatchedInference).
+
+    In process mode each worker thread drives its own detection process
+    (see DetectionProcess), handing frames over through shared memory.
+
+    With the change gate on, frames that look like the last inferred one
+    skip the model and re-publish its detections (see ChangeGate).
+
+    All num_workers workers are created up front, but only the first
+    `active_workers` run; WorkerAutoscaler moves that number at runtime.
+    low_duty() parks all but one worker, which then only runs a frame
+    every DETECTION_IDLE_INTERVAL seconds.
     """
-    def __init__(self, capturer, paused_flag=None, num_workers=None):
+    def __init__(self, capturer, paused_flag=None, num_workers=None,
+                 batching=None, batch_size=None, batch_max_wait=None, use_processes=None,
+                 change_gate=None, autoscale=None):
         self.capturer = capturer
         self.paused_flag = paused_flag
         self.num_workers = num_workers if num_workers is not None else settings.MAX_DETECTION_WORKERS
+        self.use_processes = settings.DETECTION_USE_PROCESSES if use_processes is None else use_processes
+        self.batching = settings.DETECTION_BATCHING if batching is None else batching
+        self.processes = []
+        use_gate = settings.CHANGE_GATE_ENABLED if change_gate is None else change_gate
+        self.change_gate = ChangeGate() if use_gate else None
 
-        # Each worker has its own ObjectDetector
-        self.detectors = [ObjectDetector() for _ in range(self.num_workers)]
+        if self.use_processes:
+            # Detectors live in the worker processes; batching doesn't apply
+            self.batcher = None
+            self.detectors = []
+            self.processes = [DetectionProcess(i) for i in range(self.num_workers)]
+        elif self.batching:
+            # One engine for everyone; a batch never holds more crops (frames or tiles)
+            # than all workers can submit at once
+            crops_in_flight = self.num_workers * InferenceRegions().max_crops
+            batch_size = min(batch_size or settings.DETECTION_BATCH_SIZE, crops_in_flight)
+            self.batcher = BatchedInference(batch_size=batch_size, max_wait=batch_max_wait)
+            self.detectors = [ObjectDetector(backend=self.batcher) for _ in range(self.num_workers)]
+        else:
+            # Each worker has its own ObjectDetector
+            self.batcher = None
+            self.detectors = [ObjectDetector() for _ in range(self.num_workers)]
 
-        # We store the most recent predictions (and the timestamp/frame_id).
-        # Could also store them in a queue, but let's keep only the latest.
+        # We store only the most recent snapshot. Writers swap it under the lock,
+        # readers just grab the reference.
         self.lock = threading.Lock()
-        self.latest_predictions = []
-        self.latest_frame_id = 0
+        self.latest_snapshot = _EMPTY_SNAPSHOT
+        self.stale_results_dropped = 0
+        self.detection_errors = 0
+        self._last_error_report = 0.0
+        self._published = threading.Condition(self.lock)
         self.last_processed_frame_id = [-1] * self.num_workers  # Track each worker's last processed frame
 
+        # Newest frame number handed to any worker, so no two workers run the same frame
+        self._claim_lock = threading.Lock()
+        self._last_claimed_frame = -1
+
         # Worker threads
         self.workers = []
         self.running = False
 
-        # Optional: We can keep a "frame counter" if we want to guarantee
-        # that each new frame has a unique ID. But for simplicity,
-        # we can rely on the reference or a time-based approach.
-        self._frame_counter = 0
+        # Active worker set and duty cycle; parked workers wait on _activity
+        self.active_workers = self.num_workers
+        self._activity = threading.Condition()
+        self._low_duty = 0  # nesting depth of low_duty() blocks
+        # What the workers achieved since the last take_window(), guarded by self.lock
+        self._window = {"published": 0, "age_sum": 0.0}
+        use_autoscale = settings.DETECTION_AUTOSCALE if autoscale is None else autoscale
+        self.autoscaler = WorkerAutoscaler(self) if use_autoscale and self.num_workers > 1 else None
+
+        # Metrics (no-ops unless settings.METRICS_ENABLED)
+        self._m_inference = [
+            metrics.histogram("detection_inference_seconds", "Per-frame detection latency", worker=i)
+            for i in range(self.num_workers)
+        ]
+        self._m_published = metrics.counter("detection_published", "Snapshots published")
+        self._m_stale = metrics.counter("detection_stale_dropped", "Results discarded because a newer frame was already published")
+        self._m_errors = metrics.counter("detection_errors", "Frames whose detection raised; the worker moves on")
+        self._m_skipped = metrics.counter("detection_frames_skipped", "Captured frames no worker ever ran")
+        self._m_result_age = metrics.histogram("detection_result_age_seconds", "Frame age when its predictions are published")
+        metrics.gauge("detection_backlog_frames", "Newest captured frame minus newest claimed frame",
+                      fn=lambda: max(0, self.capturer.frame_number - self._last_claimed_frame) if self.capturer else 0)
+        self._m_gate_skips = metrics.counter("detection_gate_skips", "Frames that reused the previous detections")
+        if self.change_gate:
+            metrics.gauge("detection_gate_skip_rate", "Fraction of frames the change gate skipped",
+                          fn=lambda: self.change_gate.skip_rate)
+        if self.batcher:
+            metrics.gauge("detection_batch_queue_depth", "Frames waiting for a batched forward pass",
+                          fn=self.batcher.requests.qsize)
 
     def start(self):
         self.running = True
+        if self.batcher:
+            self.batcher.start()
+        for process in self.processes:
+            process.start()
+        worker_loop = self._process_worker_loop if self.use_processes else self._worker_loop
         for i in range(self.num_workers):
-            t = threading.Thread(target=self._worker_loop, args=(i,), daemon=True)
+            t = threading.Thread(target=worker_loop, args=(i,), daemon=True)
             self.workers.append(t)
             t.start()
+        if self.autoscaler:
+            self.autoscaler.start()
 
     def stop(self):
         self.running = False
+        if self.autoscaler:
+            self.autoscaler.stop()
+        with self._activity:
+            self._activity.notify_all()
         for t in self.workers:
             t.join()
+        # Stop the collector last so in-flight batches still complete
+        if self.batcher:
+            self.batcher.stop()
+        for process in self.processes:
+            process.stop()
+
+    # -- Worker set / duty cycle -------------------------------------------
+    def set_active_workers(self, count):
+        with self._activity:
+            self.active_workers = max(1, min(count, self.num_workers))
+            self._activity.notify_all()
+
+    @property
+    def low_duty_active(self):
+        return self._low_duty > 0
+
+    @contextlib.contextmanager
+    def low_duty(self):
+        """Cut detection to a trickle while nobody consumes predictions (e.g. during an interaction)."""
+        with self._activity:
+            self._low_duty += 1
+        try:
+            yield
+        finally:
+            with self._activity:
+                self._low_duty -= 1
+                self._activity.notify_all()
+
+    def _wait_for_turn(self, worker_id):
+        """False if this worker should stay parked for now; parks it briefly."""
+        with self._activity:
+            if self._low_duty:
+                if worker_id == 0:
+                    # Woken early if low duty ends; either way run one frame
+                    self._activity.wait(settings.DETECTION_IDLE_INTERVAL)
+                    return self.running
+                self._activity.wait(0.1)
+                return False
+            if worker_id < self.active_workers:
+                return True
+            self._activity.wait(0.1)
+            return False
+
+    def take_window(self):
+        """Counters since the previous call: frames published and their mean age at publish."""
+        with self.lock:
+            window, self._window = self._window, {"published": 0, "age_sum": 0.0}
+        published = window["published"]
+        return {"published": published, "mean_age": window["age_sum"] / published if published else 0.0}
 
     def _worker_loop(self, worker_id):
         """Continuously fetch frames + run detection."""
@@ -59,35 +229,176 @@ class DetectionManager:
             if self.paused_flag and self.paused_flag():
                 time.sleep(0.1)
                 continue
-
-            # Get the latest frame from the capturer
-            frame = self.capturer.get_frame()
-            if frame is None:
-                time.sleep(0.01)
+            if not self._wait_for_turn(worker_id):
                 continue
 
-            # We can do a quick check to avoid re-detecting the exact same
-            # frame if nothing has changed:
-            current_id = id(frame)  # or you could do a custom counter
-            if current_id == self.last_processed_frame_id[worker_id]:
-                time.sleep(0.01)
+            # Wait for a frame no worker has claimed yet
+            captured = self.capturer.wait_for_latest_frame(after=self._last_claimed_frame, timeout=0.1)
+            if captured is None:
+                continue
+            if not self._claim_frame(captured.number):
+                captured.release()
                 continue
 
             # This is a new frame => run detection
-            self.last_processed_frame_id[worker_id] = current_id
-            detections = detector.detect(frame)
+            with captured, tracer.frame_context(captured.number):
+                self.last_processed_frame_id[worker_id] = captured.number
+                start = time.perf_counter()
+                try:
+                    detections, inferred = self._gated_detect(detector.detect, captured)
+                except Exception as e:
+                    self._detection_failed(worker_id, captured.number, e)
+                    continue
+            inference_time = time.perf_counter() - start
+            if inferred:
+                self._m_inference[worker_id].observe(inference_time)
+            self._publish(captured, detections, inference_time)
 
-            # Update the global "latest_predictions" buffer
-            with self.lock:
-                # We simply store the newest detections in one shared list.
-                # If multiple workers finish around the same time, we keep
-                # whichever is last. You could store all but we’ll keep it simple.
-                self.latest_predictions = detections
+    def _process_worker_loop(self, worker_id):
+        """Same as _worker_loop, but detection runs in a separate process."""
+        process = self.processes[worker_id]
+        while self.running:
+            if self.paused_flag and self.paused_flag():
+                time.sleep(0.1)
+                continue
+            if not self._wait_for_turn(worker_id):
+                continue
 
-            # Possibly add small sleep to reduce CPU usage
-            time.sleep(0.01)
+            captured = self.capturer.wait_for_latest_frame(after=self._last_claimed_frame, timeout=0.1)
+            if captured is None:
+                continue
+            if not self._claim_frame(captured.number):
+                captured.release()
+                continue
 
-    def get_latest_predictions(self):
-        """Return the most recent detections in a threadsafe manner."""
+            with captured:
+                self.last_processed_frame_id[worker_id] = captured.number
+                start = time.perf_counter()
+                try:
+                    arrays, inferred = self._gated_detect(
+                        lambda image: process.detect(image, timeout=settings.DETECTION_WORKER_TIMEOUT), captured)
+                except Exception as e:
+                    self._detection_failed(worker_id, captured.number, e)
+                    continue
+            end = time.perf_counter()
+            if arrays is None:
+                continue  # worker crashed on this frame and has been restarted
+            inference_time = end - start
+            if inferred:
+                tracer.record("detect (process)", start, end, captured.number, flow="step", worker=worker_id)
+                self._m_inference[worker_id].observe(inference_time)
+            self._publish(captured, Detections(*arrays), inference_time)
+
+    def _detection_failed(self, worker_id, frame_number, error):
+        """Count a frame whose detection raised; the worker drops it and carries on."""
+        self._m_errors.inc()
         with self.lock:
-            return copy.deepcopy(self.latest_predictions)
+            self.detection_errors += 1
+            now = time.perf_counter()
+            report = now - self._last_error_report >= 1.0  # a broken backend fails every frame
+            if report:
+                self._last_error_report = now
+        if report:
+            print(f"[DETECTION] Worker {worker_id} failed on frame {frame_number} "
+                  f"({self.detection_errors} errors so far): {error!r}")
+
+    def _gated_detect(self, detect, captured):
+        """
+        detect(captured.image), unless the change gate finds the frame unchanged
+        since the last inferred one. Returns (result, inferred).
+        """
+        if self.change_gate is None:
+            return detect(captured.image), True
+        start = time.perf_counter()
+        previous, thumb = self.change_gate.lookup(captured.image, captured.timestamp)
+        if previous is not None:
+            self._m_gate_skips.inc()
+            tracer.record("gate skip", start, time.perf_counter(), captured.number, flow="step")
+            return previous, False
+        result = detect(captured.image)
+        if result is not None:
+            self.change_gate.store(thumb, result, captured.timestamp)
+        return result, True
+
+    def _publish(self, captured, detections, inference_time):
+        """Swap in a new snapshot unless a newer frame's result is already published."""
+        snapshot = PredictionSnapshot(captured.number, captured.timestamp, inference_time, detections)
+        with tracer.span("publish", captured.number), self._published:
+            if snapshot.frame_number <= self.latest_snapshot.frame_number:
+                # A faster worker already published a newer frame
+                self.stale_results_dropped += 1
+                self._m_stale.inc()
+                return False
+            self.latest_snapshot = snapshot
+            self._window["published"] += 1
+            self._window["age_sum"] += snapshot.published_at - snapshot.capture_time
+            # Wake everyone blocked in wait_for_predictions()
+            self._published.notify_all()
+        self._m_published.inc()
+        self._m_result_age.observe(snapshot.published_at - snapshot.capture_time)
+        return True
+
+    @property
+    def latest_predictions(self):
+        return self.latest_snapshot.detections
+
+    @property
+    def latest_frame_id(self):
+        return self.latest_snapshot.frame_number
+
+    def _claim_frame(self, frame_number):
+        """Atomically reserve a frame for one worker. False if someone already took it (or a newer one)."""
+        with self._claim_lock:
+            if frame_number <= self._last_claimed_frame:
+                return False
+            if self._last_claimed_frame >= 0:
+                # Frames captured in between went to nobody
+                self._m_skipped.inc(frame_number - self._last_claimed_frame - 1)
+            self._last_claimed_frame = frame_number
+            return True
+
+    def wait_for_predictions(self, after_frame=-1, captured_after=None, max_staleness=None, timeout=None,
+                             wake=None):
+        """
+        Block until predictions are published that are worth acting on:
+          - from a frame newer than `after_frame` (the last one the caller consumed),
+          - captured at or after `captured_after` (perf_counter), e.g. once the view
+            has settled after a rotation,
+          - and no older than `max_staleness` seconds.
+        Returns a PredictionSnapshot, or None on timeout or once the `wake` Event
+        is set (whoever sets it must call notify_waiters()).
+        """
+        def fresh(snapshot):
+            return (snapshot.frame_number > after_frame
+                    and (captured_after is None or snapshot.capture_time >= captured_after)
+                    and (max_staleness is None or snapshot.age <= max_staleness))
+
+        # Test and return the same snapshot: a worker may publish in between two reads
+        snapshot = self.latest_snapshot
+        if fresh(snapshot):
+            return snapshot
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        with self._published:
+            while True:
+                snapshot = self.latest_snapshot
+                if fresh(snapshot):
+                    return snapshot
+                if wake is not None and wake.is_set():
+                    return None
+                remaining = None if deadline is None else deadline - time.perf_counter()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._published.wait(remaining)
+
+    def notify_waiters(self):
+        """Make wait_for_predictions() callers re-check their `wake` event."""
+        with self._published:
+            self._published.notify_all()
+
+    def get_latest_snapshot(self):
+        """The newest PredictionSnapshot. Lock-free; snapshots are immutable, so no copy."""
+        return self.latest_snapshot
+
+    def get_latest_predictions(self):
+        """Return the most recent Detections (read-only, safe to share)."""
+        return self.latest_snapshot.detections
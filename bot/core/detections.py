@@ -0,0 +1,109 @@
+"""
+DETECTIONS MODULE
+-----------------
+Array-backed container for a frame's detections.
+Boxes (N, 4) xyxy, scores (N,) and class ids (N,) live in contiguous
+NumPy arrays so filtering and scoring are vectorized. Indexing with an
+int (or iterating) still yields the old {"bbox", "confidence", "label"}
+mapping for code that expects dicts.
+"""
+from types import MappingProxyType
+import numpy as np
+from bot.config.settings import settings
+
+
+class Detections:
+    __slots__ = ("boxes", "scores", "class_ids", "class_names")
+
+    def __init__(self, boxes, scores, class_ids, class_names=None):
+        self.boxes = np.ascontiguousarray(boxes, dtype=np.int32).reshape(-1, 4)
+        self.scores = np.ascontiguousarray(scores, dtype=np.float32).reshape(-1)
+        self.class_ids = np.ascontiguousarray(class_ids, dtype=np.int64).reshape(-1)
+        self.class_names = tuple(class_names or settings.CLASS_NAMES)
+        # Published detections are shared between threads, so keep them read-only
+        for array in (self.boxes, self.scores, self.class_ids):
+            array.flags.writeable = False
+
+    @classmethod
+    def empty(cls, class_names=None):
+        return cls(np.empty((0, 4)), np.empty(0), np.empty(0), class_names)
+
+    @classmethod
+    def from_dicts(cls, detections, class_names=None):
+        """Build from the legacy list-of-dicts format."""
+        class_names = tuple(class_names or settings.CLASS_NAMES)
+        if not detections:
+            return cls.empty(class_names)
+        return cls(
+            [d["bbox"] for d in detections],
+            [d["confidence"] for d in detections],
+            [class_names.index(d["label"]) for d in detections],
+            class_names
+        )
+
+    # -- Sequence / dict compatibility --------------------------------------
+    def __len__(self):
+        return len(self.scores)
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def __getitem__(self, index):
+        """int -> read-only detection mapping; mask/index array/slice -> Detections subset."""
+        if isinstance(index, (int, np.integer)):
+            return MappingProxyType({
+                "bbox": tuple(self.boxes[index].tolist()),
+                "confidence": float(self.scores[index]),
+                "label": self.class_names[self.class_ids[index]]
+            })
+        return Detections(self.boxes[index], self.scores[index], self.class_ids[index], self.class_names)
+
+    def __repr__(self):
+        return f"Detections(n={len(self)})"
+
+    def to_dicts(self):
+        return [dict(d) for d in self]
+
+    # -- Vectorized geometry ------------------------------------------------
+    @property
+    def centers_x(self):
+        return (self.boxes[:, 0] + self.boxes[:, 2]) // 2
+
+    @property
+    def centers_y(self):
+        return (self.boxes[:, 1] + self.boxes[:, 3]) // 2
+
+    @property
+    def widths(self):
+        return self.boxes[:, 2] - self.boxes[:, 0]
+
+    @property
+    def heights(self):
+        return self.boxes[:, 3] - self.boxes[:, 1]
+
+    # -- Masks and scoring --------------------------------------------------
+    def class_mask(self, label):
+        if label not in self.class_names:
+            return np.zeros(len(self), dtype=bool)
+        return self.class_ids == self.class_names.index(label)
+
+    def zone_mask(self, x_start, x_end):
+        """Detections whose center x lies in [x_start, x_end]."""
+        centers = self.centers_x
+        return (centers >= x_start) & (centers <= x_end)
+
+    def weighted_scores(self, screen_center_x, weights=None):
+        """confidence, width and centrality combined with TARGET_SCORE_WEIGHTS."""
+        w_conf, w_size, w_center = weights or settings.TARGET_SCORE_WEIGHTS
+        distance = np.abs(self.centers_x - screen_center_x)
+        return (self.scores * w_conf +
+                self.widths * w_size +
+                (1 / (distance + 1)) * w_center)
+
+    def best_index(self, values, mask=None, minimize=False):
+        """Index of the max (or min) of `values` among `mask`, or None if nothing qualifies."""
+        candidates = np.flatnonzero(mask) if mask is not None else np.arange(len(self))
+        if len(candidates) == 0:
+            return None
+        picked = values[candidates]
+        return int(candidates[np.argmin(picked) if minimize else np.argmax(picked)])
@@ -0,0 +1,86 @@
+"""
+FRAME POOL MODULE
+-----------------
+Preallocated, reference-counted frame buffers.
+The capture thread writes into a free buffer; readers get a read-only view
+and the buffer goes back to the pool once the last holder releases it.
+Counters make it easy to confirm the steady state allocates nothing.
+"""
+import threading
+from collections import deque
+import numpy as np
+
+
+class FrameBuffer:
+    """One pooled image. `view` is the read-only array handed to consumers."""
+    __slots__ = ("pool", "array", "view", "refcount")
+
+    def __init__(self, pool, shape, dtype):
+        self.pool = pool
+        self.array = np.empty(shape, dtype=dtype)
+        self.view = self.array.view()
+        self.view.flags.writeable = False
+        self.refcount = 0
+
+    def acquire(self):
+        with self.pool.lock:
+            self.refcount += 1
+        return self
+
+    def release(self):
+        self.pool._release(self)
+
+
+class FramePool:
+    def __init__(self, shape, size, dtype=np.uint8):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.lock = threading.Lock()
+        self._free = deque()
+
+        # Counters
+        self.buffers = 0        # total buffers ever created
+        self.allocations = 0    # buffers created after the initial preallocation
+        self.acquires = 0       # buffers handed to writers
+
+        for _ in range(size):
+            self._free.append(FrameBuffer(self, self.shape, self.dtype))
+            self.buffers += 1
+
+    @property
+    def frame_bytes(self):
+        return int(np.prod(self.shape)) * self.dtype.itemsize
+
+    def acquire(self):
+        """Take a free buffer for writing (refcount 1). Grows the pool if every buffer is held."""
+        with self.lock:
+            self.acquires += 1
+            if self._free:
+                buffer = self._free.popleft()
+            else:
+                # Someone is holding frames for too long; count it so it shows up
+                buffer = FrameBuffer(self, self.shape, self.dtype)
+                self.buffers += 1
+                self.allocations += 1
+            buffer.refcount = 1
+            return buffer
+
+    def _release(self, buffer):
+        with self.lock:
+            buffer.refcount -= 1
+            if buffer.refcount == 0:
+                self._free.append(buffer)
+            elif buffer.refcount < 0:
+                raise RuntimeError("FrameBuffer released more times than acquired")
+
+    def stats(self):
+        with self.lock:
+            free = len(self._free)
+            return {
+                "buffers": self.buffers,
+                "free": free,
+                "in_use": self.buffers - free,
+                "allocations": self.allocations,
+                "acquires": self.acquires,
+                "bytes": self.buffers * self.frame_bytes,
+            }
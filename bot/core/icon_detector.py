@@ -0,0 +1,184 @@
+"""
+ICON DETECTOR MODULE
+--------------------
+Watches ICON_SEARCH_REGION for the interaction prompt, straight from the
+ScreenCapturer frame stream instead of taking OS screenshots.
+
+While armed (the selector arms it when it starts walking towards a
+target) a thread checks every new captured frame:
+  - "template": the cached ICON_TEMPLATE_PATH image is matched in
+    grayscale against the search region. With ICON_PYRAMID_LEVELS > 0
+    a coarse match on pyrDown'ed images finds the candidate position
+    first, and only a small window around it is matched at full
+    resolution.
+  - "pixel": ICON_PROBE_PIXEL is compared to ICON_COLOR, allowing
+    ICON_COLOR_TOLERANCE per channel. Also used when the template
+    can't be loaded.
+`visible` is an Event that is set as soon as a frame containing the
+icon arrives (and cleared when it disappears); listeners are called on
+every change, from the detector thread.
+"""
+import threading
+import time
+import cv2
+from bot.config.settings import settings
+from bot.core.metrics import metrics
+from bot.core.tracing import tracer
+
+METHODS = ("template", "pixel")
+
+
+class IconDetector:
+    def __init__(self, capturer, region=None, template=None, method=None, threshold=None,
+                 pyramid_levels=None, probe_pixel=None, color=None, color_tolerance=None):
+        self.capturer = capturer
+        self.method = method or settings.ICON_DETECTION
+        if self.method not in METHODS:
+            raise ValueError(f"Unknown icon detection method '{self.method}' (choose from {METHODS})")
+        self.threshold = settings.ICON_MATCH_THRESHOLD if threshold is None else threshold
+        self.pyramid_levels = settings.ICON_PYRAMID_LEVELS if pyramid_levels is None else pyramid_levels
+        self.probe_pixel = tuple(probe_pixel or settings.ICON_PROBE_PIXEL)
+        self.color = tuple(color or settings.ICON_COLOR)  # RGB
+        self.color_tolerance = settings.ICON_COLOR_TOLERANCE if color_tolerance is None else color_tolerance
+
+        # Screen -> frame coordinates
+        monitor = capturer.monitor if capturer is not None else settings.MONITOR_REGION
+        x, y, w, h = region or settings.ICON_SEARCH_REGION
+        self.region = (x - monitor["left"], y - monitor["top"], w, h)
+        self.probe = (self.probe_pixel[0] - monitor["left"], self.probe_pixel[1] - monitor["top"])
+
+        self.template = None
+        self._template_levels = []
+        if self.method == "template":
+            self._load_template(template)
+
+        self.visible = threading.Event()
+        self.last_score = None
+        self.last_frame = -1
+        self.checks = 0
+        self._listeners = []
+        self._armed = threading.Event()
+        self.running = False
+        self.thread = None
+
+        self._m_checks = metrics.counter("icon_checks", "Frames checked for the interaction icon")
+        self._m_check = metrics.histogram("icon_check_seconds", "Time to check one frame for the icon")
+
+    def _load_template(self, template):
+        if template is None:
+            template = cv2.imread(settings.ICON_TEMPLATE_PATH, cv2.IMREAD_COLOR)
+        if template is not None and template.ndim == 3:
+            template = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
+        w, h = self.region[2:]
+        if template is None or template.shape[0] > h or template.shape[1] > w:
+            print(f"[ICON] No usable template at {settings.ICON_TEMPLATE_PATH}, probing the pixel instead")
+            self.method = "pixel"
+            return
+        self.template = template
+        # Coarse-to-fine pyramid: level 0 is full resolution
+        self._template_levels = [template]
+        for _ in range(self.pyramid_levels):
+            smaller = cv2.pyrDown(self._template_levels[-1])
+            if min(smaller.shape) < 4:
+                break
+            self._template_levels.append(smaller)
+
+    # -- Control ---------------------------------------------------------------
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self._armed.set()  # wake the thread so it can exit
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join()
+
+    def arm(self):
+        """Start checking frames (cheap, but pointless while not walking to a target)."""
+        self._set_visible(False)
+        self._armed.set()
+
+    def disarm(self):
+        self._armed.clear()
+        self._set_visible(False)
+
+    @property
+    def armed(self):
+        return self._armed.is_set()
+
+    def add_listener(self, fn):
+        """Call fn(visible) from the detector thread whenever visibility changes."""
+        self._listeners.append(fn)
+
+    # -- Detection ---------------------------------------------------------------
+    def _loop(self):
+        last = -1
+        while self.running:
+            if not self._armed.wait(0.5):
+                continue
+            captured = self.capturer.wait_for_latest_frame(after=last, timeout=0.5)
+            if captured is None:
+                continue
+            with captured:
+                last = captured.number
+                if not self._armed.is_set():
+                    continue
+                with tracer.span("icon_check", captured.number):
+                    start = time.perf_counter()
+                    seen = self.check(captured.image)
+                    self._m_check.observe(time.perf_counter() - start)
+                self.last_frame = captured.number
+            self._m_checks.inc()
+            self._set_visible(seen)
+
+    def check(self, image):
+        """Whether a captured BGR frame shows the icon."""
+        self.checks += 1
+        if self.method == "pixel":
+            return self._probe(image)
+        x, y, w, h = self.region
+        crop = cv2.cvtColor(image[y:y + h, x:x + w], cv2.COLOR_BGR2GRAY)
+        self.last_score = self._match(crop)
+        return self.last_score >= self.threshold
+
+    def _probe(self, image):
+        x, y = self.probe
+        b, g, r = (int(c) for c in image[y, x, :3])
+        return max(abs(r - self.color[0]), abs(g - self.color[1]), abs(b - self.color[2])) <= self.color_tolerance
+
+    def _match(self, crop):
+        """Best normalised correlation of the template in `crop`, coarse-to-fine."""
+        levels = self._template_levels
+        if len(levels) == 1:
+            return float(cv2.minMaxLoc(cv2.matchTemplate(crop, levels[0], cv2.TM_CCOEFF_NORMED))[1])
+
+        small = crop
+        for _ in range(len(levels) - 1):
+            small = cv2.pyrDown(small)
+        coarse = cv2.matchTemplate(small, levels[-1], cv2.TM_CCOEFF_NORMED)
+        _, _, _, (cx, cy) = cv2.minMaxLoc(coarse)
+
+        # Refine in a window around the coarse hit, at full resolution
+        scale = 1 << (len(levels) - 1)
+        th, tw = levels[0].shape
+        x0, y0 = max(0, cx * scale - scale), max(0, cy * scale - scale)
+        x1 = min(crop.shape[1], cx * scale + tw + scale)
+        y1 = min(crop.shape[0], cy * scale + th + scale)
+        window = crop[y0:y1, x0:x1]
+        if window.shape[0] < th or window.shape[1] < tw:
+            window = crop
+        return float(cv2.minMaxLoc(cv2.matchTemplate(window, levels[0], cv2.TM_CCOEFF_NORMED))[1])
+
+    def _set_visible(self, seen):
+        if seen == self.visible.is_set():
+            return
+        if seen:
+            self.visible.set()
+        else:
+            self.visible.clear()
+        for listener in self._listeners:
+            listener(seen)
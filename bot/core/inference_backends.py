@@ -0,0 +1,145 @@
+"""
+INFERENCE BACKENDS MODULE
+-------------------------
+Runs the exported YOLO ONNX model on preprocessed NCHW blobs.
+ObjectDetector only talks to the InferenceBackend interface, so the
+engine can be picked in settings (INFERENCE_BACKEND).
+"""
+import cv2
+import numpy as np
+from bot.config.settings import settings
+
+
+class InferenceBackend:
+    """Base interface: one raw YOLO output array per (B, 3, S, S) float32 blob."""
+    name = "base"
+    # Largest batch a single infer() call accepts (None = any size)
+    max_batch = None
+
+    def infer(self, blob):
+        """Return the raw model output with shape (B, 4 + num_classes, anchors)."""
+        raise NotImplementedError
+
+
+def onnx_static_batch(model_path):
+    """
+    The batch size an ONNX model's first input is pinned to, or None if it's dynamic.
+    Without the onnx package the graph can't be read, so assume 1 (always safe).
+    """
+    try:
+        import onnx  # pip install onnx
+    except ImportError:
+        return 1
+    model = onnx.load(model_path, load_external_data=False)
+    dim = model.graph.input[0].type.tensor_type.shape.dim[0]
+    return dim.dim_value if dim.HasField("dim_value") and dim.dim_value > 0 else None
+
+
+class OpenCVBackend(InferenceBackend):
+    """cv2.dnn engine (the original ObjectDetector path)."""
+    name = "opencv"
+
+    def __init__(self, model_path=None):
+        model_path = model_path or settings.MODEL_PATH
+        self.net = cv2.dnn.readNetFromONNX(model_path)
+        self.output_names = self.net.getUnconnectedOutLayersNames()
+        # Reshape layers of a static export assert on any other batch size
+        self.max_batch = onnx_static_batch(model_path)
+
+    def infer(self, blob):
+        self.net.setInput(blob)
+        return self.net.forward(self.output_names)[0]
+
+
+class OnnxRuntimeBackend(InferenceBackend):
+    """ONNX Runtime CPU engine with configurable threading and graph optimizations."""
+    name = "onnxruntime"
+
+    GRAPH_OPTIMIZATION_LEVELS = {
+        "disable": "ORT_DISABLE_ALL",
+        "basic": "ORT_ENABLE_BASIC",
+        "extended": "ORT_ENABLE_EXTENDED",
+        "all": "ORT_ENABLE_ALL",
+    }
+
+    def __init__(self, model_path=None, intra_op_threads=None, inter_op_threads=None,
+                 graph_optimization=None):
+        import onnxruntime as ort  # pip install onnxruntime
+
+        intra_op_threads = settings.ORT_INTRA_OP_THREADS if intra_op_threads is None else intra_op_threads
+        inter_op_threads = settings.ORT_INTER_OP_THREADS if inter_op_threads is None else inter_op_threads
+        graph_optimization = graph_optimization or settings.ORT_GRAPH_OPTIMIZATION
+
+        options = ort.SessionOptions()
+        # 0 lets ONNX Runtime pick based on the core count
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        options.graph_optimization_level = getattr(
+            ort.GraphOptimizationLevel,
+            self.GRAPH_OPTIMIZATION_LEVELS[graph_optimization]
+        )
+
+        self.session = ort.InferenceSession(
+            model_path or settings.MODEL_PATH,
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        # Static exports pin the batch dimension; dynamic ones name it (e.g. "batch")
+        if isinstance(model_input.shape[0], int):
+            self.max_batch = model_input.shape[0]
+        self.output_name = self.session.get_outputs()[0].name
+
+    def infer(self, blob):
+        return self.session.run([self.output_name], {self.input_name: blob})[0]
+
+
+def infer_chunked(backend, batch):
+    """
+    Run `batch` through `backend`, split to respect engines with a fixed batch
+    size. Such engines only take exactly max_batch frames, so a shorter chunk
+    (a single frame, or the tail) is zero-padded and its output sliced back.
+    """
+    limit = backend.max_batch
+    if limit is None:
+        return _infer_checked(backend, batch)
+    outputs = []
+    for i in range(0, len(batch), limit):
+        chunk = batch[i:i + limit]
+        if len(chunk) < limit:
+            padded = np.zeros((limit,) + chunk.shape[1:], dtype=chunk.dtype)
+            padded[:len(chunk)] = chunk
+            outputs.append(_infer_checked(backend, padded)[:len(chunk)])
+        else:
+            outputs.append(_infer_checked(backend, chunk))
+    return outputs[0] if len(outputs) == 1 else np.concatenate(outputs)
+
+
+def _infer_checked(backend, blob):
+    """backend.infer(), making sure every row of the blob got its own output row."""
+    output = backend.infer(blob)
+    if len(output) != len(blob):
+        # E.g. a static export run with a batch it wasn't exported for: results would misalign
+        raise RuntimeError(f"{backend.name} backend returned {len(output)} outputs for a batch of "
+                           f"{len(blob)} (max_batch={backend.max_batch})")
+    return output
+
+
+BACKENDS = {
+    OpenCVBackend.name: OpenCVBackend,
+    OnnxRuntimeBackend.name: OnnxRuntimeBackend,
+}
+
+
+def create_backend(name=None, model_path=None, **kwargs):
+    """Instantiate the backend named in settings.INFERENCE_BACKEND (or `name`)."""
+    name = name or settings.INFERENCE_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{name}' (choose from {sorted(BACKENDS)})")
+
+    try:
+        return BACKENDS[name](model_path=model_path, **kwargs)
+    except Exception as e:
+        print(f"Error loading ONNX model with {name} backend: {e}")
+        raise
@@ -0,0 +1,94 @@
+"""
+INFERENCE REGIONS MODULE
+------------------------
+Decides which parts of the screen the model looks at.
+  - "full":  the whole frame, squashed (or letterboxed) to INPUT_SIZE.
+  - "band":  a horizontal band around the horizon (INFERENCE_BAND), so
+             the HUD and sky don't cost compute and vertical detail is kept.
+  - "tiles": a grid of overlapping TILE_SIZE crops around the screen
+             centre, run as one batch at (close to) native resolution,
+             so distant trunks stay more than a few pixels wide.
+
+Tile results are shifted back to screen coordinates and merged with
+merge_tile_detections(): boxes that lie mostly inside a bigger
+same-class box (a trunk cut by a tile edge) are dropped, then
+class-aware NMS removes duplicates across tiles.
+"""
+import numpy as np
+from bot.config.settings import settings
+
+MODES = ("full", "band", "tiles")
+
+
+def _axis_starts(length, tile, count, overlap):
+    """Start offsets of `count` tiles of size `tile`, centred in `length`."""
+    tile = min(tile, length)
+    stride = max(1, int(round(tile * (1 - overlap))))
+    span = min(length, tile + (count - 1) * stride)
+    first = (length - span) // 2
+    starts = [min(first + i * stride, length - tile) for i in range(count)]
+    return sorted(set(starts)), tile
+
+
+class InferenceRegions:
+    def __init__(self, mode=None, band=None, tile_size=None, tile_grid=None, tile_overlap=None):
+        self.mode = mode or settings.INFERENCE_REGION
+        if self.mode not in MODES:
+            raise ValueError(f"Unknown inference region mode '{self.mode}' (choose from {MODES})")
+        self.band = tuple(band or settings.INFERENCE_BAND)
+        self.tile_size = tile_size or settings.TILE_SIZE
+        self.tile_grid = tuple(tile_grid or settings.TILE_GRID)  # (columns, rows)
+        self.tile_overlap = settings.TILE_OVERLAP if tile_overlap is None else tile_overlap
+        self._cache = {}  # frame (h, w) -> crops
+
+    @property
+    def max_crops(self):
+        """Crops per frame in this mode (for sizing batches)."""
+        return self.tile_grid[0] * self.tile_grid[1] if self.mode == "tiles" else 1
+
+    def crops(self, frame_shape):
+        """(x0, y0, x1, y1) screen rectangles to run the model on, for a frame of this shape."""
+        h, w = frame_shape[:2]
+        crops = self._cache.get((h, w))
+        if crops is None:
+            crops = self._cache[(h, w)] = self._plan(w, h)
+        return crops
+
+    def _plan(self, w, h):
+        if self.mode == "full":
+            return [(0, 0, w, h)]
+        if self.mode == "band":
+            top, bottom = self.band
+            return [(0, int(top * h), w, int(bottom * h))]
+        cols, rows = self.tile_grid
+        xs, tile_w = _axis_starts(w, self.tile_size, cols, self.tile_overlap)
+        ys, tile_h = _axis_starts(h, self.tile_size, rows, self.tile_overlap)
+        return [(x, y, x + tile_w, y + tile_h) for y in ys for x in xs]
+
+
+def merge_tile_detections(boxes, scores, class_ids, iou_threshold, containment_threshold=None):
+    """
+    Merge per-tile results already in screen coordinates.
+    A box whose area is mostly (>= containment_threshold) inside a larger
+    same-class box is a tile-edge fragment and is dropped first (NMS alone
+    could keep the fragment if it scored higher). Class-aware NMS then
+    removes the duplicates from overlapping tiles.
+    """
+    from bot.core.object_detector import batched_nms  # avoid a circular import
+
+    containment_threshold = (settings.TILE_CONTAINMENT_THRESHOLD
+                             if containment_threshold is None else containment_threshold)
+    if len(boxes) > 1:
+        b = boxes.astype(np.float32)
+        inter_w = np.clip(np.minimum(b[:, None, 2], b[None, :, 2]) - np.maximum(b[:, None, 0], b[None, :, 0]), 0, None)
+        inter_h = np.clip(np.minimum(b[:, None, 3], b[None, :, 3]) - np.maximum(b[:, None, 1], b[None, :, 1]), 0, None)
+        area = np.maximum((b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1]), 1.0)
+        # [i, j]: fraction of box i covered by box j
+        covered = inter_w * inter_h / area[:, None]
+        inside_bigger = (covered >= containment_threshold) & (area[None, :] > area[:, None])
+        inside_bigger &= class_ids[:, None] == class_ids[None, :]
+        whole = ~inside_bigger.any(axis=1)
+        boxes, scores, class_ids = boxes[whole], scores[whole], class_ids[whole]
+
+    keep = batched_nms(boxes, scores, class_ids, iou_threshold)
+    return boxes[keep], scores[keep], class_ids[keep]
@@ -0,0 +1,113 @@
+"""
+INPUT SINKS MODULE
+------------------
+Where Actions' low-level input events go.
+  - Win32InputSink: the real thing (win32api mouse events, pyautogui keys).
+  - RecordingSink: nothing reaches the OS; every event is recorded with
+    its perf_counter time, so timing can be checked on any platform
+    (jitter() summarises the spacing of the recorded events).
+"""
+import threading
+import time
+import numpy as np
+
+try:
+    import pyautogui
+    import win32api
+    import win32con
+except Exception:  # no Windows input stack (or no display): only RecordingSink works here
+    pyautogui = win32api = win32con = None
+
+
+class Win32InputSink:
+    def __init__(self):
+        # Disable pyautogui's failsafe (use with caution!)
+        pyautogui.FAILSAFE = False
+
+    def screen_size(self):
+        return pyautogui.size()
+
+    def move_relative(self, dx, dy):
+        win32api.mouse_event(win32con.MOUSEEVENTF_MOVE, int(dx), int(dy), 0, 0)
+
+    def right_down(self):
+        win32api.mouse_event(win32con.MOUSEEVENTF_RIGHTDOWN, 0, 0, 0, 0)
+
+    def right_up(self):
+        win32api.mouse_event(win32con.MOUSEEVENTF_RIGHTUP, 0, 0, 0, 0)
+
+    def key_down(self, key):
+        pyautogui.keyDown(key)
+
+    def key_up(self, key):
+        pyautogui.keyUp(key)
+
+    def press(self, key):
+        pyautogui.press(key)
+
+    def read_pixel(self, x, y):
+        return pyautogui.screenshot(region=(x, y, 1, 1)).getpixel((0, 0))
+
+
+class RecordingSink:
+    """Records (perf_counter, event, args) instead of sending input."""
+    def __init__(self, screen_size=(0, 0), pixel=(0, 0, 0)):
+        self._screen_size = screen_size
+        self.pixel = pixel
+        self.events = []
+        self.lock = threading.Lock()
+
+    def _record(self, name, *args):
+        with self.lock:
+            self.events.append((time.perf_counter(), name, args))
+
+    def screen_size(self):
+        return self._screen_size
+
+    def move_relative(self, dx, dy):
+        self._record("move_relative", int(dx), int(dy))
+
+    def right_down(self):
+        self._record("right_down")
+
+    def right_up(self):
+        self._record("right_up")
+
+    def key_down(self, key):
+        self._record("key_down", key)
+
+    def key_up(self, key):
+        self._record("key_up", key)
+
+    def press(self, key):
+        self._record("press", key)
+
+    def read_pixel(self, x, y):
+        return self.pixel
+
+    def clear(self):
+        with self.lock:
+            self.events.clear()
+
+    def total_move(self):
+        """Sum of recorded relative moves, (dx, dy)."""
+        moves = [args for _, name, args in self.events if name == "move_relative"]
+        return tuple(int(v) for v in np.sum(moves, axis=0)) if moves else (0, 0)
+
+    def jitter(self, name="move_relative", interval=None):
+        """
+        Spacing of consecutive `name` events: count, mean/std interval and the
+        worst deviation from `interval` (default: the median interval), in seconds.
+        """
+        times = np.array([t for t, event, _ in self.events if event == name])
+        if len(times) < 2:
+            return {"count": len(times)}
+        gaps = np.diff(times)
+        nominal = float(np.median(gaps)) if interval is None else interval
+        return {
+            "count": len(times),
+            "span": float(times[-1] - times[0]),
+            "mean_interval": float(gaps.mean()),
+            "std_interval": float(gaps.std()),
+            "max_deviation": float(np.abs(gaps - nominal).max()),
+        }
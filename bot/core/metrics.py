@@ -0,0 +1,259 @@
+"""
+METRICS MODULE
+--------------
+Tiny in-process metrics registry (counters, gauges, histograms) with a
+Prometheus text endpoint and a periodic console summary.
+
+Components grab their metrics once in __init__. While metrics are off
+(settings.METRICS_ENABLED) the registry hands out a shared no-op object,
+so instrumented hot paths cost a single empty method call.
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from bot.config.settings import settings
+
+# Seconds; covers sub-ms postprocess up to multi-second stalls
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class _NullMetric:
+    """Stand-in for every metric type while metrics are disabled."""
+    def inc(self, amount=1):
+        pass
+
+    def dec(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+    def observe(self, value):
+        pass
+
+
+_NULL = _NullMetric()
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in sorted(labels.items())) + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, labels):
+        self.name, self.labels = name, labels
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def samples(self):
+        yield self.name + "_total", self.labels, self.value
+
+
+class Gauge:
+    kind = "gauge"
+
+    def __init__(self, name, labels, fn=None):
+        self.name, self.labels = name, labels
+        self.value = 0
+        self.fn = fn  # if set, the value is computed at scrape time
+        self._lock = threading.Lock()
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def get(self):
+        if self.fn is None:
+            return self.value
+        try:
+            return self.fn()
+        except Exception:
+            return float("nan")
+
+    def samples(self):
+        yield self.name, self.labels, self.get()
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, labels, buckets=LATENCY_BUCKETS):
+        self.name, self.labels = name, labels
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = 0
+        while index < len(self.buckets) and value > self.buckets[index]:
+            index += 1
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def quantile(self, q):
+        """Bucket upper bound containing quantile q (coarse, but enough for a console summary)."""
+        with self._lock:
+            counts, total = list(self.counts), self.count
+        if total == 0:
+            return 0.0
+        running = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            running += count
+            if running >= q * total:
+                return bound
+        return float("inf")
+
+    def samples(self):
+        with self._lock:
+            counts, total, value_sum = list(self.counts), self.count, self.sum
+        running = 0
+        for bound, count in zip(self.buckets, counts):
+            running += count
+            yield self.name + "_bucket", {**self.labels, "le": bound}, running
+        yield self.name + "_bucket", {**self.labels, "le": "+Inf"}, total
+        yield self.name + "_sum", self.labels, value_sum
+        yield self.name + "_count", self.labels, total
+
+
+class MetricsRegistry:
+    def __init__(self, enabled=None):
+        self.enabled = settings.METRICS_ENABLED if enabled is None else enabled
+        self._metrics = {}  # (name, sorted labels) -> metric
+        self._help = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._summary_thread = None
+        self._summary_stop = threading.Event()
+
+    def enable(self, enabled=True):
+        """Only affects metrics requested afterwards; call before building components."""
+        self.enabled = enabled
+
+    # -- Metric factories ----------------------------------------------------
+    def counter(self, name, help_text="", **labels):
+        return self._get(Counter, name, help_text, labels)
+
+    def gauge(self, name, help_text="", fn=None, **labels):
+        return self._get(Gauge, name, help_text, labels, fn=fn)
+
+    def histogram(self, name, help_text="", buckets=LATENCY_BUCKETS, **labels):
+        return self._get(Histogram, name, help_text, labels, buckets=buckets)
+
+    def _get(self, cls, name, help_text, labels, **kwargs):
+        if not self.enabled:
+            return _NULL
+        labels = {k: str(v) for k, v in labels.items()}
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            metric = self._metrics.get(key)
+            if metric is None:
+                metric = self._metrics[key] = cls(name, labels, **kwargs)
+                self._help.setdefault(name, (cls.kind, help_text))
+            elif kwargs.get("fn") is not None:
+                metric.fn = kwargs["fn"]  # a restarted component re-binds its gauge
+            return metric
+
+    # -- Exposition ------------------------------------------------------------
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for name in sorted({m.name for m in metrics}):
+            kind, help_text = self._help[name]
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for metric in (m for m in metrics if m.name == name):
+                for sample_name, labels, value in metric.samples():
+                    lines.append(f"{sample_name}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def start_http_server(self, port=None, host="127.0.0.1"):
+        """Serve /metrics on localhost in a daemon thread."""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # keep the console for the bot's own output
+
+        port = port or settings.METRICS_PORT
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        print(f"[METRICS] Serving Prometheus metrics on http://{host}:{port}/metrics")
+
+    def start_console_summary(self, interval=None):
+        interval = interval or settings.METRICS_SUMMARY_INTERVAL
+        self._summary_stop.clear()
+        self._summary_thread = threading.Thread(
+            target=self._summary_loop, args=(interval,), daemon=True)
+        self._summary_thread.start()
+
+    def stop(self):
+        self._summary_stop.set()
+        if self._server:
+            self._server.shutdown()
+            self._server = None
+
+    def _summary_loop(self, interval):
+        previous, last = {}, time.perf_counter()
+        while not self._summary_stop.wait(interval):
+            now = time.perf_counter()
+            print(self.summary(previous, now - last))
+            last = now
+
+    def summary(self, previous=None, elapsed=None):
+        """
+        One-line digest: counter rates, gauge values and histogram p50/p95.
+        `previous` (a dict, updated in place) turns counter totals into per-second rates.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        parts = []
+        for metric in sorted(metrics, key=lambda m: (m.name, sorted(m.labels.items()))):
+            label = metric.name + _format_labels(metric.labels)
+            if isinstance(metric, Counter):
+                if previous is not None and elapsed:
+                    rate = (metric.value - previous.get(label, 0)) / elapsed
+                    previous[label] = metric.value
+                    parts.append(f"{label}={rate:.1f}/s")
+                else:
+                    parts.append(f"{label}={metric.value}")
+            elif isinstance(metric, Gauge):
+                parts.append(f"{label}={metric.get():.3g}")
+            elif metric.count:
+                parts.append(f"{label} p50<={metric.quantile(0.5) * 1000:.0f}ms "
+                             f"p95<={metric.quantile(0.95) * 1000:.0f}ms")
+        return "[METRICS] " + " | ".join(parts)
+
+
+# Process-wide registry
+metrics = MetricsRegistry()
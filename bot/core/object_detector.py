@@ -1,179 +1,265 @@
 import cv2
-import os
 import numpy as np
 import time
-from datetime import datetime
 from bot.config.settings import settings
+from bot.core.preprocessing import Preprocessor
+from bot.core.inference_backends import create_backend, infer_chunked
+from bot.core.inference_regions import InferenceRegions, merge_tile_detections
+from bot.core.debug_writer import debug_writer
+from bot.core.detections import Detections
+from bot.core.metrics import metrics
+from bot.core.tracing import tracer
+
+
+def batched_nms(boxes, scores, class_ids, iou_threshold):
+    """
+    Class-aware NMS in a single call.
+    Boxes are (N, 4) xyxy. Each class is shifted by its own offset so boxes
+    of different classes can never overlap, then one NMS pass runs over all.
+    Returns the kept indices, sorted by descending score.
+    """
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.int64)
+    if len(boxes) == 1:
+        return np.zeros(1, dtype=np.int64)
+
+    xywh = boxes.astype(np.float32)
+    if class_ids.any():
+        xywh += (class_ids.astype(np.float32) * (float(boxes.max()) + 1.0))[:, None]
+    # cv2 expects (x, y, w, h)
+    xywh[:, 2:] -= xywh[:, :2]
+
+    keep = cv2.dnn.NMSBoxes(xywh, scores.astype(np.float32), 0.0, iou_threshold)
+    return np.asarray(keep, dtype=np.int64).reshape(-1)
+
+
+def postprocess_yolo_arrays(output, ratio_w, ratio_h, conf_threshold, iou_threshold,
+                            num_classes=None, bounds=None, pad=(0, 0)):
+    """
+    Vectorized YOLOv8 decode: (1, 4 + num_classes, anchors) ->
+    (boxes int32 (N, 4) xyxy, scores float32 (N,), class_ids (N,)) after NMS.
+    `pad` is the (x, y) letterbox offset in model space, removed before scaling.
+    """
+    num_classes = num_classes or len(settings.CLASS_NAMES)
+    if bounds is None:
+        bounds = (settings.MONITOR_REGION["width"], settings.MONITOR_REGION["height"])
+
+    raw = np.squeeze(output, 0)
+    class_scores = raw[4:4 + num_classes]
+
+    # Threshold on the best class score first. Survivors are gathered by index:
+    # a boolean mask would scan every anchor again for each row it selects, which
+    # dominates when only a handful of anchors pass (the usual in-game case)
+    confidences = class_scores.max(axis=0)
+    survivors = np.flatnonzero(confidences >= conf_threshold)
+    if not survivors.size:
+        return (np.empty((0, 4), dtype=np.int32), np.empty(0, dtype=np.float32),
+                np.empty(0, dtype=np.int64))
+
+    confidences = confidences[survivors]
+    if num_classes == 1:
+        class_ids = np.zeros(survivors.size, dtype=np.int64)
+    else:
+        class_ids = np.argmax(class_scores[:, survivors], axis=0)
+
+    # xywh (model space) -> clipped xyxy (screen space), a few whole-array ops
+    center = raw[:2, survivors].T - np.asarray(pad, dtype=np.float32)
+    half = raw[2:4, survivors].T / 2
+    boxes = np.hstack((center - half, center + half))
+    boxes *= np.array([ratio_w, ratio_h, ratio_w, ratio_h], dtype=np.float32)
+    np.maximum(boxes, 0, out=boxes)
+    np.minimum(boxes, np.array([bounds[0], bounds[1], bounds[0], bounds[1]], dtype=np.float32), out=boxes)
+    boxes = boxes.astype(np.int32)
+
+    keep = batched_nms(boxes, confidences, class_ids, iou_threshold)
+    return boxes[keep], confidences[keep], class_ids[keep]
+
+
+def detections_from_arrays(boxes, scores, class_ids, class_names=None):
+    """Build the list-of-dicts detection format from postprocess_yolo_arrays() output."""
+    class_names = class_names or settings.CLASS_NAMES
+    return [
+        {
+            "bbox": bbox,
+            "confidence": confidence,
+            "label": class_names[class_id]
+        }
+        for bbox, confidence, class_id in zip(boxes.tolist(), scores.tolist(), class_ids.tolist())
+    ]
+
+
+def postprocess_yolo(output, ratio_w, ratio_h, conf_threshold, iou_threshold,
+                     class_names=None, bounds=None, pad=(0, 0)):
+    """
+    Vectorized YOLOv8 decode: (1, 4 + num_classes, anchors) -> list of detections.
+    Everything up to NMS stays in NumPy; dicts are only built for survivors.
+    """
+    class_names = class_names or settings.CLASS_NAMES
+    return detections_from_arrays(
+        *postprocess_yolo_arrays(output, ratio_w, ratio_h, conf_threshold, iou_threshold,
+                                 len(class_names), bounds, pad),
+        class_names=class_names
+    )
+
 
 class ObjectDetector:
-    def __init__(self):
-        if settings.DEBUG:
-            self.debug_dir = settings.DEBUG_DIR
-            os.makedirs(self.debug_dir, exist_ok=True)
-        
-        
-        # Load ONNX model (exported with nms=False, multi-class)
-        try:
-            self.net = cv2.dnn.readNetFromONNX(settings.MODEL_PATH)
-        except Exception as e:
-            print(f"Error loading ONNX model: {e}")
-            raise
+    def __init__(self, backend=None):
+        # Load ONNX model (exported with nms=False, multi-class) through the
+        # configured inference backend, unless one is shared in from outside
+        self.backend = backend or create_backend()
         
         # YOLOv8 default dimensions
         self.input_size = settings.INPUT_SIZE
+        # Owns this detector's reusable input buffers
+        self.preprocessor = Preprocessor(self.input_size)
+        # Which part(s) of the screen go through the model (full / band / tiles)
+        self.regions = InferenceRegions()
+        self._tile_batch = None  # (tiles, 3, S, S), allocated on first tiled frame
         
         # Confidence threshold from your settings
         self.conf_threshold = settings.CONFIDENCE_THRESHOLD
         # Optional NMS IoU threshold
         self.iou_threshold = settings.IOU_THRESHOLD
 
+        # Per-stage latency (shared by all detectors; no-ops unless metrics are on)
+        self._m_preprocess = metrics.histogram("detector_stage_seconds", "Detector stage latency", stage="preprocess")
+        self._m_forward = metrics.histogram("detector_stage_seconds", "Detector stage latency", stage="forward")
+        self._m_postprocess = metrics.histogram("detector_stage_seconds", "Detector stage latency", stage="postprocess")
+
     def detect(self, frame): 
-        # 1) Preprocess
-        blob, (ratio_w, ratio_h) = self._preprocess(frame)   
-        # 2) Forward pass
-        self.net.setInput(blob)
-        layer_names = self.net.getUnconnectedOutLayersNames()
-        outputs = self.net.forward(layer_names)
-        # 3) Postprocess
+        return Detections(*self.detect_arrays(frame))
 
+    def detect_arrays(self, frame):
+        """Like detect(), but returns compact (boxes, scores, class_ids) arrays."""
+        crops = self.regions.crops(frame.shape)
+        if len(crops) > 1:
+            return self._detect_tiles(frame, crops)
 
-        detections = self._postprocess(outputs, ratio_w, ratio_h)
-        return detections
+        x0, y0, x1, y1 = crops[0]
+        t0 = time.perf_counter()
+        # 1) Preprocess (crop is a view, no copy)
+        blob, (ratio_w, ratio_h), pad = self._preprocess(frame[y0:y1, x0:x1])
+        t1 = time.perf_counter()
+        # 2) Forward pass
+        output = infer_chunked(self.backend, blob)
+        t2 = time.perf_counter()
+        # 3) Postprocess, then back to screen coordinates
+        boxes, scores, class_ids = postprocess_yolo_arrays(
+            output, ratio_w, ratio_h,
+            self.conf_threshold, self.iou_threshold,
+            bounds=(x1 - x0, y1 - y0), pad=pad
+        )
+        if x0 or y0:
+            boxes += np.array([x0, y0, x0, y0], dtype=np.int32)
+        arrays = boxes, scores, class_ids
+        t3 = time.perf_counter()
+        self._m_preprocess.observe(t1 - t0)
+        self._m_forward.observe(t2 - t1)
+        self._m_postprocess.observe(t3 - t2)
+        # Frame number comes from the caller's tracer.frame_context()
+        tracer.record("preprocess", t0, t1, flow="step")
+        tracer.record("forward", t1, t2)
+        tracer.record("postprocess", t2, t3)
+        return arrays
         
 
-    def _preprocess(self, frame):
+    def detect_batch(self, frames):
         """
-        Resizes the frame directly to 640x640 for YOLO input.
-        Computes scaling factors for mapping detections back to the original screen.
+        detect_arrays() for several frames (sizes may differ) with one batched
+        forward pass. Tiled mode already batches within a frame, so it runs
+        frame by frame.
         """
-        original_h, original_w = frame.shape[:2]  # (1600, 2560)
-
-        # Resize the image to YOLO's input size (without keeping aspect ratio)
-        resized = cv2.resize(frame, (self.input_size, self.input_size))
-
-        blob = cv2.dnn.blobFromImage(
-            resized,
-            scalefactor=1/255.0,
-            size=(self.input_size, self.input_size),
-            swapRB=True,
-            crop=False
-        )
+        if not frames:
+            return []
+        if self.regions.max_crops > 1:
+            return [self.detect_arrays(frame) for frame in frames]
 
-        # Compute the direct scaling factors from 640x640 back to 2560x1600
-        ratio_w = original_w / self.input_size  # 2560 / 640 = 4.0
-        ratio_h = original_h / self.input_size  # 1600 / 640 = 2.5
+        t0 = time.perf_counter()
+        size = self.input_size
+        batch = np.empty((len(frames), 3, size, size), dtype=np.float32)
+        geometry = []
+        for i, frame in enumerate(frames):
+            x0, y0, x1, y1 = self.regions.crops(frame.shape)[0]
+            # Fills the whole row (letterbox padding included), sizes may differ per frame
+            _, ratios, pad = self.preprocessor(frame[y0:y1, x0:x1], out=batch[i])
+            geometry.append(((x0, y0, x1, y1), ratios, pad))
+        t1 = time.perf_counter()
+        outputs = infer_chunked(self.backend, batch)
+        t2 = time.perf_counter()
 
-        #print(f"DEBUG: ratio_w={ratio_w:.3f}, ratio_h={ratio_h:.3f}, original_w={original_w}, original_h={original_h}")
+        results = []
+        for i, ((x0, y0, x1, y1), (ratio_w, ratio_h), pad) in enumerate(geometry):
+            boxes, scores, class_ids = postprocess_yolo_arrays(
+                outputs[i:i + 1], ratio_w, ratio_h,
+                self.conf_threshold, self.iou_threshold,
+                bounds=(x1 - x0, y1 - y0), pad=pad
+            )
+            if x0 or y0:
+                boxes += np.array([x0, y0, x0, y0], dtype=np.int32)
+            results.append((boxes, scores, class_ids))
+        t3 = time.perf_counter()
+        self._m_preprocess.observe(t1 - t0)
+        self._m_forward.observe(t2 - t1)
+        self._m_postprocess.observe(t3 - t2)
+        tracer.record("preprocess", t0, t1, frames=len(frames))
+        tracer.record("forward", t1, t2, frames=len(frames))
+        tracer.record("postprocess", t2, t3)
+        return results
 
-        return blob, (ratio_w, ratio_h)
+    def _detect_tiles(self, frame, crops):
+        """Run every tile in one batch and merge the results in screen coordinates."""
+        t0 = time.perf_counter()
+        if self._tile_batch is None or len(self._tile_batch) != len(crops):
+            size = self.input_size
+            self._tile_batch = np.empty((len(crops), 3, size, size), dtype=np.float32)
+        for i, (x0, y0, x1, y1) in enumerate(crops):
+            # All tiles share one shape, so the ratios/padding are the same for each
+            _, (ratio_w, ratio_h), pad = self.preprocessor(frame[y0:y1, x0:x1], out=self._tile_batch[i])
+        t1 = time.perf_counter()
+        outputs = infer_chunked(self.backend, self._tile_batch)
+        t2 = time.perf_counter()
 
-    def _postprocess(self, outputs, ratio_w, ratio_h):
-        """Process YOLOv8 outputs to detections with screen coordinates."""
-        # Unpack and verify model outputs
-        raw = np.squeeze(outputs[0], 0)
-        num_classes = len(settings.CLASS_NAMES)
-        
-        # Extract prediction components
-        xc, yc, w, h = raw[:4]
-        class_scores = raw[4:4+num_classes]
-        confidences = np.max(class_scores, axis=0)
-
-        # Process each prediction
-        detections = []
-        for i in np.where(confidences >= self.conf_threshold)[0]:
-            # Calculate coordinates
-            x = (xc[i] - w[i]/2) * ratio_w
-            y = (yc[i] - h[i]/2) * ratio_h
-            r = (xc[i] + w[i]/2) * ratio_w
-            b = (yc[i] + h[i]/2) * ratio_h
-            
-            # Clip to screen bounds
-            x, y = max(0, int(x)), max(0, int(y))
-            r, b = map(lambda v: min(v, settings.MONITOR_REGION["width"]), 
-                    [int(r), int(b)])
-            
-            # Store detection
-            class_id = np.argmax(class_scores[:, i])
-            detections.append({
-                "bbox": [x, y, r, b],
-                "confidence": float(confidences[i]),
-                "label": settings.CLASS_NAMES[class_id]
-            })
-
-        # Apply NMS and format results
-        indices = cv2.dnn.NMSBoxes(
-            [d["bbox"] for d in detections],
-            [d["confidence"] for d in detections],
-            self.conf_threshold, self.iou_threshold
+        per_tile = []
+        for i, (x0, y0, x1, y1) in enumerate(crops):
+            boxes, scores, class_ids = postprocess_yolo_arrays(
+                outputs[i:i + 1], ratio_w, ratio_h,
+                self.conf_threshold, self.iou_threshold,
+                bounds=(x1 - x0, y1 - y0), pad=pad
+            )
+            per_tile.append((boxes + np.array([x0, y0, x0, y0], dtype=np.int32), scores, class_ids))
+        arrays = merge_tile_detections(
+            np.concatenate([t[0] for t in per_tile]),
+            np.concatenate([t[1] for t in per_tile]),
+            np.concatenate([t[2] for t in per_tile]),
+            self.iou_threshold
         )
-        
-        # Final filtered results
-        final_detections = []
-        for idx in (indices.flatten() if isinstance(indices, np.ndarray) else indices):
-            det = detections[idx]
-            final_detections.append(det)
-            #print(f"✅ {det['label']} ({det['confidence']:.2f}) "
-            #    f"at {det['bbox']}")
+        t3 = time.perf_counter()
+        self._m_preprocess.observe(t1 - t0)
+        self._m_forward.observe(t2 - t1)
+        self._m_postprocess.observe(t3 - t2)
+        tracer.record("preprocess", t0, t1, flow="step", tiles=len(crops))
+        tracer.record("forward", t1, t2, tiles=len(crops))
+        tracer.record("postprocess", t2, t3)
+        return arrays
+
+    def _preprocess(self, frame):
+        """
+        Single-pass resize + BGR->RGB + scale + NCHW into this detector's reusable blob.
+        Returns the blob, the model->screen scaling factors and the letterbox padding.
+        """
+        return self.preprocessor(frame)
 
-        #print(f"DEBUG: {len(detections)} pre-NMS -> {len(final_detections)} post-NMS")
-        return final_detections
+    def _postprocess(self, output, ratio_w, ratio_h, pad=(0, 0)):
+        """Process YOLOv8 output to array-backed Detections in screen coordinates."""
+        return Detections(*postprocess_yolo_arrays(
+            output,
+            ratio_w, ratio_h,
+            self.conf_threshold, self.iou_threshold,
+            pad=pad
+        ))
 
     def process_frame(self, frame, detections, target=None):
-        """Draw detections and save debug image with matching logs."""
+        """Queue a debug image with detections drawn (sampled, written in the background)."""
         if settings.DEBUG:
-            # Create a unique timestamped filename
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-            filename = f"frame_{timestamp}.png"
-            filepath = os.path.join(self.debug_dir, filename)
-
-            # Draw the bounding boxes
-            processed_frame = self._draw_detections(frame, detections, target)
-
-            # Save the image
-            cv2.imwrite(filepath, processed_frame)
-
-            # ✅ Print log entry with matching filename
-            #print(f"📸 Saved debug image: {filename} with {len(detections)} detections.")
-
+            debug_writer.submit(frame, detections, target)
         return frame
-
-
-    def _draw_detections(self, frame, detections, target=None):
-        overlay_frame = frame.copy()
-        for detection in detections:
-            x1, y1, x2, y2 = detection['bbox']
-            
-            # Ensure coordinates are correctly drawn
-            x1, y1 = max(0, x1), max(0, y1)  # Prevent negative values
-            x2, y2 = min(frame.shape[1], x2), min(frame.shape[0], y2)  # Stay within frame
-            
-            # Draw green bounding box for all detections
-            cv2.rectangle(overlay_frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-            cv2.putText(
-                overlay_frame,
-                f"{detection['label']} {detection['confidence']:.2f}",
-                (x1, max(0, y1 - 10)),  # Prevent text from going off-screen
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.5,
-                (0, 255, 0),
-                2
-            )
-
-        # Draw red bounding box for the target
-        if target:
-            x1, y1, x2, y2 = target['bbox']
-            x1, y1 = max(0, x1), max(0, y1)  # Prevent negative values
-            x2, y2 = min(frame.shape[1], x2), min(frame.shape[0], y2)  # Stay within frame
-            
-            cv2.rectangle(overlay_frame, (x1, y1), (x2, y2), (0, 0, 255), 3)
-            cv2.putText(
-                overlay_frame,
-                f"{target['label']} {target['confidence']:.2f}",
-                (x1, max(0, y1 - 10)),  # Prevent text from going off-screen
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.5,
-                (0, 0, 255),
-                2
-            )
-
-        return cv2.addWeighted(overlay_frame, 0.7, frame, 0.3, 0)
@@ -0,0 +1,76 @@
+"""
+PREPROCESSING MODULE
+--------------------
+Turns BGR screen frames into YOLO NCHW float blobs in a single pass.
+Each Preprocessor owns its buffers, so keep one per worker.
+"""
+import cv2
+import numpy as np
+from bot.config.settings import settings
+
+_SCALE = np.float32(1 / 255.0)
+
+
+class Preprocessor:
+    def __init__(self, input_size=None, letterbox=None, pad_value=None):
+        self.input_size = input_size or settings.INPUT_SIZE
+        self.letterbox = settings.LETTERBOX if letterbox is None else letterbox
+        self.pad_value = settings.LETTERBOX_PAD_VALUE if pad_value is None else pad_value
+
+        # Buffers are (re)allocated lazily when the frame size changes
+        self._frame_shape = None
+        self._resized = None
+        self._blob = None
+        self._geometry = None
+
+    def __call__(self, frame, out=None):
+        """
+        Resize, BGR->RGB, scale to [0, 1] and HWC->CHW in one pass.
+
+        Writes into `out` (a (3, S, S) float32 view, e.g. one row of a batch)
+        or into this preprocessor's own (1, 3, S, S) blob, which is reused on
+        the next call. Returns (blob, (ratio_w, ratio_h), (pad_x, pad_y)).
+        """
+        if frame.shape[:2] != self._frame_shape:
+            self._allocate(frame.shape[:2])
+
+        (new_w, new_h), ratios, (pad_x, pad_y) = self._geometry
+        cv2.resize(frame, (new_w, new_h), dst=self._resized, interpolation=cv2.INTER_LINEAR)
+
+        if out is None:
+            out, blob = self._blob[0], self._blob
+        else:
+            blob = out
+            if self.letterbox:
+                out.fill(self.pad_value / 255.0)
+
+        # Channel flip + scale + transpose as a single strided ufunc pass
+        np.multiply(
+            self._resized.transpose(2, 0, 1)[::-1],
+            _SCALE,
+            out=out[:, pad_y:pad_y + new_h, pad_x:pad_x + new_w],
+            casting="unsafe"
+        )
+        return blob, ratios, (pad_x, pad_y)
+
+    def _allocate(self, frame_shape):
+        original_h, original_w = frame_shape
+        size = self.input_size
+
+        if self.letterbox:
+            # Keep aspect ratio, centre the image and pad the rest
+            scale = min(size / original_w, size / original_h)
+            new_w, new_h = int(round(original_w * scale)), int(round(original_h * scale))
+            pad_x, pad_y = (size - new_w) // 2, (size - new_h) // 2
+            ratios = (original_w / new_w, original_h / new_h)
+        else:
+            # Squash straight to SxS (e.g. 2560x1600 -> 4.0, 2.5)
+            new_w = new_h = size
+            pad_x = pad_y = 0
+            ratios = (original_w / size, original_h / size)
+
+        self._frame_shape = frame_shape
+        self._geometry = ((new_w, new_h), ratios, (pad_x, pad_y))
+        self._resized = np.empty((new_h, new_w, 3), dtype=np.uint8)
+        # The padding border never changes, so it is only written once here
+        self._blob = np.full((1, 3, size, size), self.pad_value / 255.0, dtype=np.float32)
@@ -0,0 +1,160 @@
+"""
+PROCESS WORKERS MODULE
+----------------------
+Runs ObjectDetector in a separate process so preprocessing, NumPy
+postprocessing and Python glue don't serialize on the parent's GIL.
+
+Frames are handed over through a multiprocessing.shared_memory slot
+(one per worker, reused for every frame), so the 12 MB image is never
+pickled. Only a tiny (slot name, shape) message goes down the pipe and
+compact (boxes, scores, class_ids) arrays come back.
+"""
+import multiprocessing as mp
+import time
+import numpy as np
+from multiprocessing import shared_memory
+
+READY = "ready"
+
+
+def _attach_shared_memory(name):
+    """Attach to an existing block without letting this process' resource tracker unlink it."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def _detection_process_main(conn):
+    """Entry point of a worker process: attach to the frame slot and serve detect requests."""
+    # Imported here so the parent doesn't need a detector just to spawn workers
+    from bot.core.object_detector import ObjectDetector
+
+    detector = ObjectDetector()
+    conn.send(READY)  # model loaded: from here on the parent's timeout applies
+    shm = None
+    try:
+        while True:
+            message = conn.recv()
+            if message is None:
+                break
+
+            slot_name, shape = message
+            if shm is None or shm.name != slot_name:
+                if shm is not None:
+                    shm.close()
+                shm = _attach_shared_memory(slot_name)
+
+            frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+            conn.send(detector.detect_arrays(frame))
+            del frame  # release the buffer export before a possible close()
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        if shm is not None:
+            shm.close()
+
+
+class DetectionProcess:
+    """
+    One detection worker process plus its shared-memory frame slot.
+    detect() blocks the calling thread; if the process dies or takes longer
+    than `timeout` on a frame (model loading excluded), it is restarted and
+    None is returned for that frame.
+    """
+    RESTART_BACKOFF = 1.0  # Seconds to wait before respawning a crashed worker
+
+    def __init__(self, worker_id):
+        self.worker_id = worker_id
+        self.context = mp.get_context("spawn")  # same behaviour on Windows and Linux
+        self.process = None
+        self.conn = None
+        self.shm = None
+        self.frame_view = None
+        self.ready = False
+        self.restarts = 0
+
+    def start(self):
+        parent_conn, child_conn = self.context.Pipe()
+        self.process = self.context.Process(
+            target=_detection_process_main,
+            args=(child_conn,),
+            name=f"detection-worker-{self.worker_id}",
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        self.ready = False
+
+    def stop(self, timeout=2.0):
+        if self.process is not None:
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join()
+            self.conn.close()
+            self.process = None
+        self._release_slot()
+
+    def detect(self, image, timeout=None):
+        """Copy `image` into the shared slot, run detection in the worker, return its arrays."""
+        if self.process is None or not self.process.is_alive():
+            self._restart("not running")
+
+        self._ensure_slot(image.shape)
+        self.frame_view[...] = image
+        reason = None
+        try:
+            self.conn.send((self.shm.name, image.shape))
+            deadline = None
+            while True:
+                if deadline is None and self.ready and timeout is not None:
+                    deadline = time.perf_counter() + timeout
+                wait = 0.5 if deadline is None else min(0.5, max(0.0, deadline - time.perf_counter()))
+                if self.conn.poll(wait):
+                    message = self.conn.recv()
+                    if message == READY:
+                        self.ready = True
+                        continue
+                    return message
+                if not self.process.is_alive():
+                    break
+                if deadline is not None and time.perf_counter() >= deadline:
+                    self.process.terminate()
+                    reason = f"hung (no result in {timeout:.1f}s)"
+                    break
+        except (EOFError, BrokenPipeError, OSError):
+            pass
+
+        self.process.join(0.1)
+        self._restart(reason or f"crashed (exit code {self.process.exitcode})")
+        return None
+
+    def _restart(self, reason):
+        if self.process is not None:
+            print(f"[DETECTION] Worker process {self.worker_id} {reason}, restarting...")
+            self.restarts += 1
+            self.process.join(0.1)
+            self.conn.close()
+            self.process = None
+            time.sleep(self.RESTART_BACKOFF)
+        self.start()
+
+    def _ensure_slot(self, shape):
+        if self.frame_view is not None and self.frame_view.shape == shape:
+            return
+        self._release_slot()
+        self.shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)))
+        self.frame_view = np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf)
+
+    def _release_slot(self):
+        if self.shm is not None:
+            self.frame_view = None
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
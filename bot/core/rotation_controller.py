@@ -0,0 +1,67 @@
+"""
+ROTATION CONTROLLER MODULE
+--------------------------
+Turns a target's pixel offset from the screen centre into a mouse drag,
+and learns how far the view actually turns per pixel dragged.
+
+The gain (drag pixels per screen pixel) starts at ROTATION_GAIN. After
+each correction the selector reports where the target ended up (the
+tracker's position from the first frame captured after the drag
+settled). The part of the offset that was actually corrected gives the
+gain this drag had; the estimate moves towards it by
+ROTATION_GAIN_LEARNING_RATE and is clamped to ROTATION_GAIN_LIMITS.
+Learning lasts for the session, so after a few drags a single one
+centres the target.
+
+Small corrections issued while walking (steering) use the same gain,
+but don't teach it: walking moves the target on screen by itself.
+"""
+from bot.config.settings import settings
+from bot.core.metrics import metrics
+
+
+class RotationController:
+    def __init__(self, gain=None, learning_rate=None, limits=None, min_correction=None):
+        self.gain = gain or settings.ROTATION_GAIN
+        self.learning_rate = settings.ROTATION_GAIN_LEARNING_RATE if learning_rate is None else learning_rate
+        self.limits = tuple(limits or settings.ROTATION_GAIN_LIMITS)
+        # Corrections smaller than this say more about detector noise than about the gain
+        self.min_correction = settings.ROTATION_MIN_LEARN_OFFSET if min_correction is None else min_correction
+        self.pending = None  # (offset, signed drag) waiting for its outcome
+        self.corrections = 0
+        self.updates = 0
+
+        metrics.gauge("rotation_gain", "Learned drag pixels per screen pixel", fn=lambda: self.gain)
+        self._m_residual = metrics.histogram("rotation_residual_pixels", "Target offset left after a correction",
+                                             buckets=(2, 5, 10, 20, 30, 50, 100, 200, 400))
+
+    def drag_for(self, offset):
+        """Signed drag distance (positive = right) expected to move the target by -offset."""
+        return offset * self.gain
+
+    def begin(self, offset, drag):
+        """A drag of `drag` pixels (signed) was issued to correct `offset`."""
+        self.pending = (offset, drag)
+        self.corrections += 1
+
+    def observe(self, offset):
+        """Offset seen once the last correction settled; updates the gain. Returns the residual or None."""
+        if self.pending is None:
+            return None
+        previous, drag = self.pending
+        self.pending = None
+        self._m_residual.observe(abs(offset))
+        corrected = previous - offset
+        # Only learn from corrections that went the right way and were big enough to measure
+        if abs(corrected) < self.min_correction or corrected * previous <= 0:
+            return offset
+        observed = drag / corrected
+        low, high = self.limits
+        self.gain = min(high, max(low, self.gain + self.learning_rate * (observed - self.gain)))
+        self.updates += 1
+        print(f"[ROTATION] Corrected {corrected:.0f}px of {previous:.0f}px; gain now {self.gain:.3f}")
+        return offset
+
+    def cancel(self):
+        """Target lost or abandoned: the next observation wouldn't belong to the last drag."""
+        self.pending = None
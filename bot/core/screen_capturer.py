@@ -1,17 +1,62 @@
 """
 SCREEN CAPTURER MODULE
 -----------------------
-Handles screen capture using DXCAM library.
-Captures frames in BGR format for OpenCV compatibility.
+Handles screen capture using DXCAM library (or any CaptureSource, e.g.
+a ReplaySource for offline runs). Captures frames in BGR format for
+OpenCV compatibility.
+
+Frames are kept in a small ring buffer. Each one carries a monotonically
+increasing frame number and its perf_counter capture time, so consumers
+can wait for "a frame newer than N" and know how old it is.
+
+Captured pixels are written into preallocated FramePool buffers. Frames
+handed out by get_latest_frame()/wait_for_*_frame() hold a reference on
+their buffer and must be released (or used as a context manager).
 """
 import time
-import dxcam
 import threading
 import numpy as np
 from bot.config.settings import settings  # <-- Import settings
+from bot.core.frame_pool import FramePool
+from bot.core.capture_sources import DxcamSource
+from bot.core.metrics import metrics
+from bot.core.tracing import tracer
+
+
+class CapturedFrame:
+    """One captured frame. `image` is read-only and shared; copy it before editing."""
+    __slots__ = ("number", "timestamp", "image", "buffer")
+
+    def __init__(self, number, timestamp, image, buffer=None):
+        self.number = number
+        self.timestamp = timestamp  # time.perf_counter() at capture
+        self.image = image
+        self.buffer = buffer        # pooled FrameBuffer backing `image`, if any
+
+    @property
+    def age(self):
+        """Seconds since this frame was captured."""
+        return time.perf_counter() - self.timestamp
+
+    def acquire(self):
+        if self.buffer is not None:
+            self.buffer.acquire()
+        return self
+
+    def release(self):
+        """Give this reference back; the buffer returns to the pool when nobody holds it."""
+        if self.buffer is not None:
+            self.buffer.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
 
 class ScreenCapturer:
-    def __init__(self, monitor=None, paused_flag=None):
+    def __init__(self, monitor=None, paused_flag=None, source=None, recorder=None):
         self.monitor = monitor or settings.MONITOR_REGION
         self.paused_flag = paused_flag  # Add paused_flag parameter
         # Convert dict -> (left, top, right, bottom)
@@ -25,9 +70,36 @@ class ScreenCapturer:
         self.latest_frame = None
         self.running = False
         self.thread = None
-        self.camera = dxcam.create(output_color="BGR")
+        # Live dxcam capture unless a replay (or other) source is given
+        self.source = source or DxcamSource()
+        # Optional FrameRecorder that gets every captured frame
+        self.recorder = recorder
+        self.finished = False  # set when a finite source runs out of frames
         self.lock = threading.Lock()
 
+        # Ring buffer of the most recent frames, guarded by self.lock
+        self.buffer_size = settings.FRAME_BUFFER_SIZE
+        self._ring = [None] * self.buffer_size
+        self._frame_number = -1  # number of the newest frame, -1 before the first capture
+        self._new_frame = threading.Condition(self.lock)
+
+        # Created on the first grab, once the frame shape is known. Enough spare
+        # buffers for every detection worker to hold one frame while the ring fills.
+        self.frame_pool = None
+        self.pool_size = self.buffer_size + settings.FRAME_POOL_SPARE
+        self.frame_copies = 0  # full-frame copies made by get_frame()
+
+        # Metrics (no-ops unless settings.METRICS_ENABLED)
+        self._m_frames = metrics.counter("capture_frames", "Frames captured")
+        self._m_empty_grabs = metrics.counter("capture_empty_grabs", "Grabs that returned no new frame")
+        self._m_grab = metrics.histogram("capture_grab_seconds", "Time spent in source.grab()")
+        self._m_copy = metrics.histogram("capture_copy_seconds", "Time copying a grab into a pooled buffer")
+        metrics.gauge("capture_pool_allocations", "Frame buffers allocated after warm-up",
+                      fn=lambda: self.frame_pool.allocations if self.frame_pool else 0)
+        if self.recorder is not None:
+            metrics.gauge("capture_recorder_dropped", "Frames the recorder could not keep up with",
+                          fn=lambda: self.recorder.frames_dropped if self.recorder else 0)
+
     def start(self):
         self.running = True
         self.thread = threading.Thread(target=self._update_loop, daemon=True)
@@ -39,22 +111,121 @@ class ScreenCapturer:
                 time.sleep(0.1)  # Avoid high CPU usage while paused
                 continue
 
-            frame_bgr = self.camera.grab(region=self.dxcam_region)
-            if frame_bgr is not None:
-                frame_np = np.array(frame_bgr)
-                with self.lock:
-                    self.latest_frame = frame_np
-                    #if settings.DEBUG:
-                        #print("Captured frame shape:", frame_np.shape)
-                #self.latest_frame = np.array(frame_bgr)
+            grab_start = time.perf_counter()
+            frame_bgr = self.source.grab(region=self.dxcam_region)
+            if frame_bgr is None and self.source.finished:
+                print("[CAPTURE] Source exhausted, stopping capture.")
+                with self._new_frame:
+                    self.finished = True
+                    self.running = False
+                    self._new_frame.notify_all()
+                break
+            if frame_bgr is None:
+                self._m_empty_grabs.inc()
+                continue
+            timestamp = time.perf_counter()
+            self._m_grab.observe(timestamp - grab_start)
+            if self.frame_pool is None or self.frame_pool.shape != frame_bgr.shape:
+                self.frame_pool = FramePool(frame_bgr.shape, self.pool_size)
+            # Copy into a recycled buffer instead of allocating a new 12 MB array
+            buffer = self.frame_pool.acquire()
+            np.copyto(buffer.array, frame_bgr)
+            copied = time.perf_counter()
+            self._m_copy.observe(copied - timestamp)
+            number = self._publish(buffer.view, timestamp, buffer)
+            self._m_frames.inc()
+            tracer.record("grab", grab_start, timestamp, number, flow="start")
+            tracer.record("copy", timestamp, copied, number)
+
+    def _publish(self, image, timestamp, buffer=None):
+        """
+        Insert a frame into the ring and return its number.
+        The ring takes over the caller's buffer reference.
+        """
+        with self._new_frame:
+            self._frame_number += 1
+            number = self._frame_number
+            slot = self._frame_number % self.buffer_size
+            evicted = self._ring[slot]
+            self._ring[slot] = CapturedFrame(self._frame_number, timestamp, image, buffer)
+            self.latest_frame = image
+            self._new_frame.notify_all()
+            if self.recorder is not None:
+                self.recorder.write(self._ring[slot])
+        if evicted is not None:
+            evicted.release()
+        return number
+
+    @property
+    def frame_number(self):
+        """Number of the newest captured frame (-1 if nothing has been captured yet)."""
+        return self._frame_number
 
     def get_frame(self):
         # Return a copy so we don't accidentally modify the live frame
          with self.lock:
-            return self.latest_frame.copy() if self.latest_frame is not None else None
-        #return self.latest_frame.copy() if self.latest_frame is not None else None
+            if self.latest_frame is None:
+                return None
+            self.frame_copies += 1
+            return self.latest_frame.copy()
+
+    def get_latest_frame(self):
+        """Newest CapturedFrame (no copy, caller must release it), or None before the first capture."""
+        with self.lock:
+            if self._frame_number < 0:
+                return None
+            return self._ring[self._frame_number % self.buffer_size].acquire()
+
+    def get_frame_by_number(self, number):
+        """CapturedFrame `number` if it is still in the ring (caller must release it), else None."""
+        with self.lock:
+            if number < 0 or number > self._frame_number or number <= self._frame_number - self.buffer_size:
+                return None
+            return self._ring[number % self.buffer_size].acquire()
+
+    def wait_for_latest_frame(self, after=-1, timeout=None):
+        """
+        Block until a frame newer than `after` exists, then return the newest one.
+        Frames in between are skipped. Returns None on timeout or stop.
+        The returned frame must be released.
+        """
+        with self._new_frame:
+            if not self._new_frame.wait_for(
+                    lambda: self._frame_number > after or not self.running, timeout):
+                return None
+            if self._frame_number <= after:
+                return None
+            return self._ring[self._frame_number % self.buffer_size].acquire()
+
+    def wait_for_next_frame(self, after=-1, timeout=None):
+        """
+        Block until a frame newer than `after` exists, then return the oldest such
+        frame still in the ring (ideally frame `after + 1`). Use this when every
+        frame matters; compare .number against `after + 1` to count drops.
+        """
+        with self._new_frame:
+            if not self._new_frame.wait_for(
+                    lambda: self._frame_number > after or not self.running, timeout):
+                return None
+            if self._frame_number <= after:
+                return None
+            oldest = max(after + 1, self._frame_number - self.buffer_size + 1)
+            return self._ring[oldest % self.buffer_size].acquire()
+
+    def memory_stats(self):
+        """Frame pool counters plus get_frame() copies; allocations should stay flat once warm."""
+        stats = self.frame_pool.stats() if self.frame_pool else {}
+        stats["frame_copies"] = self.frame_copies
+        return stats
 
     def stop(self):
         self.running = False
-        if self.thread:
+        # Wake anyone blocked in wait_for_*_frame
+        with self._new_frame:
+            self._new_frame.notify_all()
+        if self.thread and self.thread is not threading.current_thread():
             self.thread.join()
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+        self.source.close()
@@ -1,86 +1,254 @@
 import time
 import math
+import contextlib
 import random
-import pyautogui
-import cv2
 import numpy as np
 from bot.config.settings import settings
 from bot.core.actions import Actions
+from bot.core.action_scheduler import ActionScheduler
+from bot.core.detections import Detections
+from bot.core.metrics import metrics
+from bot.core.rotation_controller import RotationController
+from bot.core.tracing import tracer
+from bot.core.tracker import MultiObjectTracker
+
+# Target handling states
+SEARCH = "SEARCH"       # no target yet: pick one from the next predictions
+ROTATE = "ROTATE"       # a drag is queued/running; wait for a frame captured after it settled
+APPROACH = "APPROACH"   # holding W until the interaction icon shows up
+INTERACT = "INTERACT"   # W released, 'F' about to be pressed
+COOLDOWN = "COOLDOWN"   # interaction playing out; pre-select the next target meanwhile
+
 
 class TargetSelector:
-    def __init__(self, screen_width, capturer, detection_manager):
+    """
+    Non-blocking state machine: SEARCH -> ROTATE -> APPROACH -> INTERACT -> COOLDOWN.
+
+    It advances on two kinds of events:
+      - select_target(): new predictions (from a frame captured after the
+        view last settled),
+      - tick(): timers, called by the main loop at least every
+        `poll_interval` seconds.
+    Inputs are queued on an ActionScheduler thread, so neither call ever
+    sleeps. During COOLDOWN detection runs at low duty and the next target
+    is pre-selected, so the bot can turn to it as soon as the cooldown ends.
+    """
+    def __init__(self, screen_width, capturer, detection_manager, actions=None, scheduler=None, icon_detector=None):
         self.screen_center_x = screen_width // 2
         self.screen_width = screen_width
         self.current_target = None
         self.last_target_time = 0
-        self.actions = Actions()
-        self.tracking = False
+        self.actions = actions or Actions()
         self.capturer = capturer
         self.detection_manager = detection_manager
 
+        # Inputs run on their own thread
+        self.scheduler = scheduler or ActionScheduler()
+        self.scheduler.start()
+        self._pending_job = None
+
+        # State machine
+        self.state = SEARCH
+        self.state_since = time.perf_counter()
+        self.approach_started = None
+        self.cooldown_until = None
+        self.icon_found = False
+        self._duty = contextlib.ExitStack()  # holds detection low duty while cooling down
+
         # Tracking parameters
         self.rotation_threshold = settings.ROTATION_THRESHOLD
         self.min_target_width   = settings.MIN_TARGET_WIDTH
         self.MAX_TRACKING_TIME  = settings.MAX_TRACKING_TIME
-        self.last_rotation      = None
-
-        # Define region for icon search
-        self.icon_search_region = (1100, 1170, 100, 130)  # (left, top, width, height)
-        self.icon_template = cv2.imread(settings.ICON_TEMPLATE_PATH, cv2.IMREAD_COLOR)
+        self.rotation           = RotationController()  # offset -> drag, gain learned per session
+        self._steer_job         = None
+        self.target_acquired_at = None
+
+        # Gives detections an identity across frames; we follow one track id
+        self.tracker            = MultiObjectTracker()
+        self.target_track_id    = None
+        self.harvested_track_id = None
+        self.next_track_id      = None   # pre-selected during COOLDOWN
+        self._detection_track_ids = []
+
+        # perf_counter time after which captured frames reflect our last action.
+        # The main loop only hands us predictions from frames captured after it.
+        self.view_settled_at    = None
+
+        # Watches the captured frames for the interaction icon (see IconDetector);
+        # without one we fall back to reading the probe pixel off the screen
+        self.icon_detector = icon_detector
+        if icon_detector is not None:
+            icon_detector.add_listener(self._on_icon_change)
 
         # Zone definitions
         self.zone_boundaries = {
         'left': (0, settings.ZONE_BOUNDARIES['left'] * screen_width),
-        'center': (settings.ZONE_BOUNDARIES['left'] * screen_width, 
+        'center': (settings.ZONE_BOUNDARIES['left'] * screen_width,
                    settings.ZONE_BOUNDARIES['center'] * screen_width),
         'right': (settings.ZONE_BOUNDARIES['center'] * screen_width, screen_width)
     }
 
-    def select_target(self, detections):
-        """Pick or maintain a target each tick."""
-        if self.tracking:
-            return self._maintain_tracking_state()
-        return self._find_new_target(detections)
+        # Harvest rate, the number that matters
+        self.harvested = 0
+        self.started_at = time.perf_counter()
+
+        # Metrics (no-ops unless settings.METRICS_ENABLED)
+        self._m_decisions = metrics.counter("selector_decisions", "select_target() calls")
+        self._m_decision_age = metrics.histogram("selector_decision_frame_age_seconds",
+                                                 "Age of the frame a decision was made on")
+        self._m_rotations = metrics.counter("selector_actions", "Actions issued", action="rotate")
+        self._m_interactions = metrics.counter("selector_actions", "Actions issued", action="interact")
+        self._m_steers = metrics.counter("selector_actions", "Actions issued", action="steer")
+        self._m_time_to_target = metrics.histogram("selector_time_to_target_seconds",
+                                                   "From picking a target to walking towards it")
+        metrics.gauge("selector_harvest_per_hour", "Interactions completed per hour", fn=lambda: self.harvest_rate)
+
+    @property
+    def tracking(self):
+        return self.current_target is not None
+
+    @property
+    def harvest_rate(self):
+        """Interactions per hour since start."""
+        hours = (time.perf_counter() - self.started_at) / 3600
+        return self.harvested / hours if hours > 0 else 0.0
+
+    @property
+    def wake_event(self):
+        """Event that should cut the main loop's wait for predictions short, or None."""
+        if self.state == APPROACH and self.icon_detector is not None:
+            return self.icon_detector.visible
+        return None
+
+    @property
+    def poll_interval(self):
+        """Longest the main loop may wait for predictions before calling tick()."""
+        if self.state in (APPROACH, INTERACT, COOLDOWN):
+            return settings.STATE_TICK_INTERVAL
+        return settings.PREDICTION_WAIT_TIMEOUT
+
+    # -- Events ------------------------------------------------------------
+    def select_target(self, detections, capture_time=None):
+        """
+        Prediction event: update the tracker and advance the state machine.
+        `capture_time` (perf_counter of the source frame) timestamps the tracker
+        update; defaults to now. Returns the current target (or None).
+        """
+        self._m_decisions.inc()
+        if capture_time is not None:
+            self._m_decision_age.observe(time.perf_counter() - capture_time)
+        else:
+            capture_time = time.perf_counter()
+        if not isinstance(detections, Detections):
+            detections = Detections.from_dicts(detections)
+        self._detection_track_ids = self.tracker.update(detections, capture_time)
+        # Closes the frame's flow arrow; the frame comes from the caller's tracer.frame_context()
+        with tracer.span("select", flow="end", state=self.state):
+            if self.state == SEARCH:
+                if self.target_track_id is None:
+                    self._find_new_target(detections)
+                if self.target_track_id is not None:
+                    self._align(detections)
+            elif self.state == ROTATE:
+                # Only frames captured after the drag settled reach us, but be safe
+                if self._rotation_failed():
+                    self._reset_tracking()
+                elif self._pending_job is None or self._pending_job.done.is_set():
+                    self._align(detections)
+            elif self.state == APPROACH:
+                self._steer()
+            elif self.state == COOLDOWN:
+                self._preselect(detections)
+            # INTERACT: the tracker keeps following, nothing to decide
+            return self.current_target
+
+    def tick(self):
+        """Timer event: walking, interaction and cooldown deadlines."""
+        now = time.perf_counter()
+        if self.state == ROTATE and self._rotation_failed():
+            self._reset_tracking()
+        elif self.state == APPROACH:
+            self.icon_found = self._icon_appears()
+            if self.icon_found or now - self.approach_started > settings.MAX_WALK_TIME:
+                self._start_interaction()
+        elif self.state == INTERACT and self._pending_job.done.is_set():
+            self._start_cooldown(self._pending_job.finished_at or now)
+        elif self.state == COOLDOWN and now >= self.cooldown_until:
+            self._end_cooldown()
+
+    def interrupt(self):
+        """Abandon whatever is going on (e.g. the bot was paused) and release held keys."""
+        self.scheduler.cancel_pending()
+        if self.icon_detector is not None:
+            self.icon_detector.disarm()
+        if self.state in (APPROACH, INTERACT):
+            self.scheduler.submit("key_up", self.actions.key_up, 'w')
+        self._duty.close()
+        self._reset_tracking()
+
+    # -- Transitions ---------------------------------------------------------
+    def _set_state(self, state):
+        if state != self.state:
+            print(f"[STATE] {self.state} -> {state}")
+        self.state = state
+        self.state_since = time.perf_counter()
 
     def _find_new_target(self, detections):
-        """Initial detection logic (unchanged)."""
+        """Initial detection logic: best-scoring priority target, center zone first."""
+        index = self._best_candidate(detections)
+        if index is None:
+            return None
+        self.target_track_id = self._detection_track_ids[index]
+        return self._start_tracking(detections[index])
+
+    def _best_candidate(self, detections, exclude_track=None):
+        """Index of the best priority-class detection (center zone first), or None."""
+        scores = None
         for priority_class in settings.PRIORITY_TARGETS:
-            center_targets = self._filter_detections(detections, priority_class, 'center')
-            if center_targets:
-                target = self._select_best_target(center_targets)
-                return self._start_tracking(target)
-
-            all_targets = [d for d in detections if d['label'] == priority_class]
-            if all_targets:
-                target = self._select_best_target(all_targets)
-                return self._start_tracking(target)
+            class_mask = detections.class_mask(priority_class)
+            if exclude_track is not None:
+                class_mask &= np.array([t != exclude_track for t in self._detection_track_ids], dtype=bool)
+            if not class_mask.any():
+                continue
+            if scores is None:
+                scores = detections.weighted_scores(self.screen_center_x)
+
+            center_mask = class_mask & self._zone_mask(detections, 'center')
+            mask = center_mask if center_mask.any() else class_mask
+            return detections.best_index(scores, mask)
         return None
 
-    def _maintain_tracking_state(self):
+    def _align(self, detections):
         """
-        Keep the target in view or initiate interaction if we’re at the correct distance.
-        **All interaction here is blocking** (no extra thread).
+        Keep the target in view, or start walking to it once it's centred.
+        Only called with predictions from a frame captured after our last action settled.
         """
         if time.time() - self.last_target_time > self.MAX_TRACKING_TIME:
             print("⏰ Tracking timeout")
             self._reset_tracking()
             return None
 
-        time.sleep(0.5)
-        new_detections = self.detection_manager.get_latest_predictions()
-        if not new_detections:
-            return None
-
-        verified_target = self._verify_target_persistence(new_detections)
+        verified_target = self._verify_target_persistence()
+        if self.rotation.pending is not None and (
+                not verified_target or self.tracker.get(self.target_track_id).misses):
+            # The first frame after a drag didn't match the track: rather than coast
+            # on its stale prediction, look where the drag should have put the target
+            verified_target = self._reacquire_after_rotation(detections) or verified_target
         if not verified_target:
             print("⚠️ Target lost")
             self._reset_tracking()
             return None
+        if self.tracker.get(self.target_track_id).misses:
+            # Not seen in this frame: keep following the prediction, but don't act on it
+            self.current_target = verified_target
+            return self.current_target
 
         self._update_current_target(verified_target)
 
         offset = self._calculate_offset(verified_target)
         width  = self._bbox_width(verified_target['bbox'])
+        # Where the last drag actually left the target teaches the rotation gain
+        self.rotation.observe(offset)
 
         # 1) If the target is off-center, rotate to recenter.
         if abs(offset) > self.rotation_threshold:
@@ -90,50 +258,104 @@ class TargetSelector:
         #elif width < self.min_target_width:
         #    self._handle_forward_movement()
 
-        # 3) Otherwise, do the blocking interaction.
+        # 3) Otherwise, walk up to it.
         else:
-            self._perform_interaction()   # <--- Blocking here
-            self._reset_tracking()        # Once done, we can reset or do next steps.
+            self._start_approach()
 
         return self.current_target
 
-    def _perform_interaction(self):
-
-        print("[INTERACTION] Starting blocking interaction...")
-        # Press & hold W
-        pyautogui.keyDown('w')
-        print("[INTERACTION] Walking forward...")   
-        start_time = time.time()
-        max_walk_time = settings.MAX_WALK_TIME
-        counter=1
-        found_icon = False
-        while time.time() - start_time < max_walk_time:
-            if self._icon_appears():
-                found_icon = True
-                print("[INTERACTION] Icon found, stopping movement.")
-                break
-            
-        
-            time.sleep(0.05)
-
-        # Release W
-        pyautogui.keyUp('w')
-        print("[INTERACTION] Done (icon found?" , found_icon, ")")
-        time.sleep(0.5)
-        pyautogui.press('f')  # Interact key
-        time.sleep(15)  # Wait for interaction to complete
+    def _reacquire_after_rotation(self, detections):
+        """
+        A drag with a badly calibrated gain can move the target further than the
+        tracker's association gate, so the followed track misses (and would only
+        be dropped TRACKER_MAX_MISSES frames later). It should have ended up near
+        the centre: take the closest same-class detection within the error a gain
+        off by ROTATION_REACQUIRE_FRACTION would cause.
+        """
+        label = self.current_target['label']
+        mask = detections.class_mask(label)
+        if not mask.any():
+            return None
+        offset, _ = self.rotation.pending
+        distance = np.abs(detections.centers_x - self.screen_center_x).astype(np.float32)
+        distance[~mask] = np.inf
+        index = int(np.argmin(distance))
+        if distance[index] > abs(offset) * settings.ROTATION_REACQUIRE_FRACTION:
+            return None
+        self.target_track_id = self._detection_track_ids[index]
+        return self._verify_target_persistence()
+
+    def _start_approach(self):
+        print("[INTERACTION] Walking forward...")
+        if self.target_acquired_at is not None:
+            self._m_time_to_target.observe(time.perf_counter() - self.target_acquired_at)
+        self._submit("walk", self.actions.key_down, 'w')  # Press & hold W
+        self.approach_started = time.perf_counter()
+        self.icon_found = False
+        if self.icon_detector is not None:
+            self.icon_detector.arm()
+        self._set_state(APPROACH)
+
+    def _start_interaction(self):
+        print("[INTERACTION] Icon found, stopping movement." if self.icon_found
+              else "[INTERACTION] Walk timed out.")
+        self._m_interactions.inc()
+        if self.icon_detector is not None:
+            self.icon_detector.disarm()
+        self._submit("key_up", self.actions.key_up, 'w')
+        self._submit("interact", self.actions.tap, 'f',  # Interact key
+                     delay=settings.INTERACT_KEY_DELAY)
+        self._set_state(INTERACT)
+
+    def _start_cooldown(self, pressed_at):
+        """'F' went out at `pressed_at`; let the interaction play out without blocking."""
+        self.cooldown_until = pressed_at + settings.POST_INTERACTION_DELAY
+        self.harvested += 1
+        self.harvested_track_id = self.target_track_id
+        self.next_track_id = None
+        print(f"[INTERACTION] Done (icon found? {self.icon_found}); "
+              f"{self.harvested} harvested, {self.harvest_rate:.1f}/h")
+        # Nobody needs full-rate predictions while the interaction plays out
+        if self.detection_manager is not None:
+            self._duty.enter_context(self.detection_manager.low_duty())
+        self._set_state(COOLDOWN)
+
+    def _preselect(self, detections):
+        """While cooling down, remember the best next target other than the one being harvested."""
+        index = self._best_candidate(detections, exclude_track=self.harvested_track_id)
+        self.next_track_id = None if index is None else self._detection_track_ids[index]
+
+    def _end_cooldown(self):
+        self._duty.close()
+        next_track = self.tracker.get(self.next_track_id) if self.next_track_id is not None else None
+        self._reset_tracking()
+        self._mark_view_changed()
+        if next_track is not None:
+            # Straight on to the pre-selected target; it is verified on the next predictions
+            self.target_track_id = next_track.id
+            self._start_tracking({
+                "bbox": next_track.predict_box(time.perf_counter()),
+                "confidence": next_track.score,
+                "label": settings.CLASS_NAMES[next_track.class_id],
+                "track_id": next_track.id
+            })
+
+    def _submit(self, name, fn, *args, **kwargs):
+        self._pending_job = self.scheduler.submit(name, fn, *args, **kwargs)
+        return self._pending_job
+
+    def _on_icon_change(self, visible):
+        # Detector thread: wake the main loop so tick() reacts to this frame, not the next tick
+        if visible and self.detection_manager is not None:
+            self.detection_manager.notify_waiters()
 
     def _icon_appears(self):
-        # Only capture a 1×1 region
-        pixel_image = pyautogui.screenshot(region=(1192, 1222, 1, 1))
-        
-        # Convert to RGB tuple
-        r, g, b = pixel_image.getpixel((0, 0))
-        
-        # Compare to a known color threshold
-        if (r, g, b) == settings.ICON_COLOR:
-            return True
-        return False
+        if self.icon_detector is not None:
+            return self.icon_detector.visible.is_set()
+        # No frame stream: read the probe pixel (an OS screenshot round trip)
+        r, g, b = self.actions.read_pixel(*settings.ICON_PROBE_PIXEL)
+        tolerance = settings.ICON_COLOR_TOLERANCE
+        return all(abs(c - ref) <= tolerance for c, ref in zip((r, g, b), settings.ICON_COLOR))
     # ------------------------------------
     # Original helper methods below
     # ------------------------------------
@@ -143,65 +365,89 @@ class TargetSelector:
 
     def _handle_rotation(self, offset):
         direction = 'right' if offset > 0 else 'left'
-        base_distance = abs(offset) * 1.5
-        actual_distance = base_distance * random.uniform(0.99, 1.01)
-        self.actions.mouse_drag(direction, actual_distance)
-        self.last_rotation = {
-            'direction': direction,
-            'distance': actual_distance,
-            'start_pos': self._bbox_center_x(self.current_target['bbox'])
-        }
-        time.sleep(random.uniform(0.2, 0.4))
+        drag = self.rotation.drag_for(offset) * random.uniform(0.99, 1.01)
+        actual_distance = abs(drag)
+        self.rotation.begin(offset, drag)
+        # Everything on screen should slide back by about the offset we're correcting
+        self.tracker.shift(-offset)
+        # Frames grabbed before the drag has ended (plus a settle margin) are ignored;
+        # on_finish also runs if the drag fails or is cancelled
+        self.view_settled_at = float("inf")
+        self._submit("mouse_drag", self.actions.mouse_drag, direction, actual_distance,
+                     on_finish=lambda job: self._mark_view_changed())
+        self._m_rotations.inc()
+        self._set_state(ROTATE)
+
+    def _steer(self):
+        """While walking, nudge the view so the target's predicted position stays centred."""
+        if self._steer_job is not None and not self._steer_job.done.is_set():
+            return
+        target = self._verify_target_persistence()
+        if target is None or self.tracker.get(self.target_track_id).misses:
+            return
+        self._update_current_target(target)
+        offset = self._calculate_offset(target)
+        if abs(offset) <= settings.STEER_THRESHOLD:
+            return
+        self.tracker.shift(-offset)
+        self.view_settled_at = float("inf")
+        self._steer_job = self.scheduler.submit("steer", self.actions.steer, self.rotation.drag_for(offset),
+                                                on_finish=lambda job: self._mark_view_changed())
+        self._m_steers.inc()
+
+    def _mark_view_changed(self):
+        """Only frames captured from now on (plus a settle margin) describe the new view."""
+        self.view_settled_at = time.perf_counter() + settings.ACTION_SETTLE_TIME
 
     def _handle_forward_movement(self):
-        self.actions.press_key('W', 1)
-        time.sleep(0.7)
+        self._submit("press_key", self.actions.press_key, 'W', 1,
+                     on_done=lambda job: self._mark_view_changed())
 
-    def _verify_target_persistence(self, new_detections):
-        original = self.current_target
-        if not original:
+    def _verify_target_persistence(self):
+        """
+        The followed track, at its predicted position right now (compensating
+        for capture + inference latency), or None once the tracker dropped it.
+        Detections must already have been passed to the tracker.
+        """
+        if not self.current_target:
             return None
-        candidates = [det for det in new_detections if det['label'] == original['label']]
-        if not candidates:
+        track = self.tracker.get(self.target_track_id)
+        if track is None:
             return None
-
-        center_min = self.screen_center_x - (self.screen_width * 0.1)
-        center_max = self.screen_center_x + (self.screen_width * 0.1)
-        in_center = [det for det in candidates
-                     if center_min <= self._bbox_center_x(det['bbox']) <= center_max]
-        if in_center:
-            return max(in_center, key=lambda d: self._bbox_width(d['bbox']))
-        else:
-            return min(candidates, key=lambda d: abs(self._bbox_center_x(d['bbox']) - self.screen_center_x))
+        return {
+            "bbox": track.predict_box(time.perf_counter()),
+            "confidence": track.score,
+            "label": self.current_target['label'],
+            "track_id": track.id
+        }
 
     def _start_tracking(self, target):
         self.current_target = target
-        self.tracking = True
         self.last_target_time = time.time()
+        self.target_acquired_at = time.perf_counter()
         print(f"🎯 New target: {target['label']} at {target['bbox']}")
-        
+
         return target
 
+    def _rotation_failed(self):
+        job = self._pending_job
+        if job is None or not job.done.is_set() or job.error is None:
+            return False
+        print(f"[STATE] Rotation failed ({job.error}), searching again")
+        return True
+
     def _reset_tracking(self):
-        self.tracking = False
         self.current_target = None
-        self.last_rotation = None
-
-    def _filter_detections(self, detections, target_class, zone):
+        self.target_track_id = None
+        self.rotation.cancel()
+        # Don't leave the view "unsettled" if we walked away from an in-flight drag
+        if self.view_settled_at == float("inf"):
+            self._mark_view_changed()
+        self._set_state(SEARCH)
+
+    def _zone_mask(self, detections, zone):
         zone_start, zone_end = self.zone_boundaries[zone]
-        return [
-            d for d in detections
-            if d['label'] == target_class
-               and self._bbox_center_x(d['bbox']) >= zone_start
-               and self._bbox_center_x(d['bbox']) <= zone_end
-        ]
-
-    def _select_best_target(self, targets):
-        return max(targets, key=lambda d: (
-            d['confidence'] * settings.TARGET_SCORE_WEIGHTS[0] +
-            self._bbox_width(d['bbox']) * settings.TARGET_SCORE_WEIGHTS[1] +
-            (1 / (self._distance_from_center(d['bbox']) + 1)) * settings.TARGET_SCORE_WEIGHTS[2]
-        ))
+        return detections.zone_mask(zone_start, zone_end)
 
     def _update_current_target(self, target):
         self.current_target = target
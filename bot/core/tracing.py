@@ -0,0 +1,120 @@
+"""
+TRACING MODULE
+--------------
+Opt-in per-frame tracer writing Chrome trace-event JSON (open the file in
+chrome://tracing or https://ui.perfetto.dev).
+
+Spans from every thread go into one bounded in-memory buffer (oldest
+events fall off) and are only written to disk by flush(), e.g. from the
+hotkey in main.py. Spans carry the frame number they belong to; a flow
+arrow links each frame from capture through detection to the decision
+made on it, so "glass-to-input" latency can be read off the timeline.
+
+The frame a span belongs to is either passed in, or taken from the
+calling thread's frame_context(), so deep code (ObjectDetector, Actions)
+doesn't need frame numbers threaded through it.
+"""
+import contextlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from bot.config.settings import settings
+
+_NULL_CONTEXT = contextlib.nullcontext()
+
+
+class Tracer:
+    def __init__(self, enabled=None, max_events=None):
+        self.enabled = settings.TRACE_ENABLED if enabled is None else enabled
+        self.events = deque(maxlen=max_events or settings.TRACE_BUFFER_EVENTS)
+        self.pid = os.getpid()
+        self._local = threading.local()
+        self._named_threads = set()
+        self._lock = threading.Lock()
+
+    # -- Recording -------------------------------------------------------------
+    def record(self, name, start, end, frame=None, flow=None, **args):
+        """
+        Add a complete span from perf_counter `start` to `end`.
+        `flow` is "start", "step" or "end" to chain this span into the frame's flow arrow.
+        """
+        if not self.enabled:
+            return
+        if frame is None:
+            frame = getattr(self._local, "frame", None)
+        tid = threading.get_ident()
+        if tid not in self._named_threads:
+            self._name_thread(tid)
+        ts = start * 1e6
+        if frame is not None:
+            args["frame"] = frame
+        self.events.append({"name": name, "ph": "X", "ts": ts, "dur": (end - start) * 1e6,
+                            "pid": self.pid, "tid": tid, "args": args})
+        if flow and frame is not None:
+            phase = {"start": "s", "step": "t", "end": "f"}[flow]
+            event = {"name": "frame", "cat": "frame", "ph": phase, "id": frame,
+                     "ts": ts, "pid": self.pid, "tid": tid}
+            if phase == "f":
+                event["bp"] = "e"  # bind to the enclosing span
+            self.events.append(event)
+
+    def span(self, name, frame=None, flow=None, **args):
+        """Context manager timing the enclosed block; a shared no-op while disabled."""
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return self._span(name, frame, flow, args)
+
+    @contextlib.contextmanager
+    def _span(self, name, frame, flow, args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter(), frame, flow, **args)
+
+    def frame_context(self, frame):
+        """Attribute spans recorded on this thread to `frame` until the block exits."""
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return self._frame_context(frame)
+
+    def current_frame(self):
+        """Frame set by this thread's frame_context(), so work handed to another thread can keep it."""
+        return getattr(self._local, "frame", None)
+
+    @contextlib.contextmanager
+    def _frame_context(self, frame):
+        previous = getattr(self._local, "frame", None)
+        self._local.frame = frame
+        try:
+            yield
+        finally:
+            self._local.frame = previous
+
+    def _name_thread(self, tid):
+        with self._lock:
+            self._named_threads.add(tid)
+        self.events.append({"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid,
+                            "args": {"name": threading.current_thread().name}})
+
+    # -- Output ------------------------------------------------------------------
+    def flush(self, path=None):
+        """Write buffered events to `path` (default TRACE_DIR/trace_<time>.json) and clear the buffer."""
+        with self._lock:
+            events = list(self.events)
+            self.events.clear()
+            # Thread names went out with this file; re-emit them in the next one
+            self._named_threads.clear()
+        if path is None:
+            os.makedirs(settings.TRACE_DIR, exist_ok=True)
+            path = os.path.join(settings.TRACE_DIR, f"trace_{time.strftime('%Y%m%d_%H%M%S')}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        print(f"[TRACE] {len(events)} events written to {path}")
+        return path
+
+
+# Process-wide tracer
+tracer = Tracer()
@@ -0,0 +1,231 @@
+"""
+TRACKER MODULE
+--------------
+Multi-object tracker giving detections a stable identity across frames.
+
+Each Track runs a constant-velocity Kalman filter over its box
+(center x/y, width, height and their velocities). Time steps come from
+frame capture times, not tick counts, so tracks stay consistent when
+frames are skipped. New detections are matched to tracks of the same
+class by IoU, falling back to centroid distance when boxes no longer
+overlap (fast motion, low inference rate). Between detections,
+Track.predict_box() extrapolates where the object is now.
+"""
+import itertools
+import numpy as np
+from bot.config.settings import settings
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """Pairwise IoU of (N, 4) and (M, 4) xyxy boxes -> (N, M)."""
+    a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 1, 4)
+    b = np.asarray(boxes_b, dtype=np.float32).reshape(1, -1, 4)
+    inter_w = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    inter_h = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = inter_w * inter_h
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    return inter / np.maximum(area_a + area_b - inter, 1e-6)
+
+
+def _xyxy_to_state(box):
+    x1, y1, x2, y2 = box
+    return np.array([(x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1], dtype=np.float64)
+
+
+def _state_to_xyxy(state):
+    cx, cy, w, h = state[:4]
+    return (int(round(cx - w / 2)), int(round(cy - h / 2)),
+            int(round(cx + w / 2)), int(round(cy + h / 2)))
+
+
+class KalmanBoxFilter:
+    """Constant-velocity Kalman filter over [cx, cy, w, h, vcx, vcy, vw, vh]."""
+    _H = np.hstack([np.eye(4), np.zeros((4, 4))])
+
+    def __init__(self, box, timestamp, process_noise=None, measurement_noise=None):
+        self.x = np.zeros(8)
+        self.x[:4] = _xyxy_to_state(box)
+        w, h = self.x[2], self.x[3]
+        # Velocities are unknown at first: large initial uncertainty
+        self.P = np.diag([w, h, w, h, 10 * w, 10 * h, w, h]) ** 2 * 0.01
+        self.q = process_noise if process_noise is not None else settings.TRACKER_PROCESS_NOISE
+        self.r = measurement_noise if measurement_noise is not None else settings.TRACKER_MEASUREMENT_NOISE
+        self.timestamp = timestamp
+
+    def _transition(self, dt):
+        F = np.eye(8)
+        F[:4, 4:] = np.eye(4) * dt
+        return F
+
+    def predict(self, timestamp):
+        """Advance the state to `timestamp` (seconds, perf_counter)."""
+        dt = max(0.0, timestamp - self.timestamp)
+        if dt == 0.0:
+            return
+        F = self._transition(dt)
+        scale = max(self.x[2], self.x[3], 1.0)
+        # Noise grows with time and box size (close objects move more pixels)
+        Q = np.diag([1, 1, 1, 1, 10, 10, 1, 1]) * (self.q * scale) ** 2 * dt
+        self.x = F @ self.x
+        self.P = F @ self.P @ F.T + Q
+        self.timestamp = timestamp
+
+    def update(self, box):
+        z = _xyxy_to_state(box)
+        scale = max(z[2], z[3], 1.0)
+        R = np.eye(4) * (self.r * scale) ** 2
+        y = z - self._H @ self.x
+        S = self._H @ self.P @ self._H.T + R
+        K = self.P @ self._H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ y
+        self.P = (np.eye(8) - K @ self._H) @ self.P
+
+    def extrapolate(self, timestamp):
+        """State at `timestamp` without changing the filter."""
+        dt = max(0.0, timestamp - self.timestamp)
+        return self.x[:4] + self.x[4:] * dt
+
+    def shift(self, dx, dy=0.0):
+        """Move the estimate (e.g. the camera turned) and forget the velocity it had learned."""
+        self.x[0] += dx
+        self.x[1] += dy
+        self.x[4:6] = 0.0
+        w, h = self.x[2], self.x[3]
+        self.P[0, 0] += (0.25 * w) ** 2
+        self.P[1, 1] += (0.25 * h) ** 2
+
+
+class Track:
+    def __init__(self, track_id, box, score, class_id, timestamp):
+        self.id = track_id
+        self.class_id = int(class_id)
+        self.score = float(score)
+        self.filter = KalmanBoxFilter(box, timestamp)
+        self.created_at = timestamp
+        self.last_seen = timestamp
+        self.hits = 1       # detections matched to this track
+        self.misses = 0     # consecutive updates without a match
+        self.age = 1        # updates since the track was created
+
+    @property
+    def box(self):
+        """Filtered box at the last update, xyxy ints."""
+        return _state_to_xyxy(self.filter.x)
+
+    @property
+    def velocity(self):
+        """Center velocity (px/s)."""
+        return tuple(self.filter.x[4:6])
+
+    @property
+    def confirmed(self):
+        return self.hits >= settings.TRACKER_MIN_HITS
+
+    def predict_box(self, timestamp):
+        """Where the box should be at `timestamp`, xyxy ints."""
+        return _state_to_xyxy(self.filter.extrapolate(timestamp))
+
+    def __repr__(self):
+        return f"Track(id={self.id}, box={self.box}, hits={self.hits}, misses={self.misses})"
+
+
+class MultiObjectTracker:
+    def __init__(self, iou_threshold=None, max_centroid_distance=None, max_misses=None, class_names=None):
+        self.iou_threshold = iou_threshold if iou_threshold is not None else settings.TRACKER_IOU_THRESHOLD
+        # Centroid fallback gate, as a fraction of the track's box width
+        self.max_centroid_distance = (max_centroid_distance if max_centroid_distance is not None
+                                      else settings.TRACKER_MAX_CENTROID_DISTANCE)
+        self.max_misses = max_misses if max_misses is not None else settings.TRACKER_MAX_MISSES
+        self.class_names = tuple(class_names or settings.CLASS_NAMES)
+        self.tracks = {}  # id -> Track
+        self._ids = itertools.count(1)
+
+    def __len__(self):
+        return len(self.tracks)
+
+    def get(self, track_id):
+        return self.tracks.get(track_id)
+
+    def reset(self):
+        self.tracks.clear()
+
+    def update(self, detections, timestamp):
+        """
+        Predict every track to `timestamp`, match `detections` (a Detections)
+        and start tracks for the unmatched ones. Tracks missed more than
+        max_misses times in a row are dropped.
+        Returns a list with the track id of each detection, in order.
+        """
+        tracks = list(self.tracks.values())
+        for track in tracks:
+            track.filter.predict(timestamp)
+            track.age += 1
+
+        track_ids = [None] * len(detections)
+        matched = set()
+        for t_index, d_index in self._associate(tracks, detections):
+            track = tracks[t_index]
+            track.filter.update(detections.boxes[d_index])
+            track.score = float(detections.scores[d_index])
+            track.hits += 1
+            track.misses = 0
+            track.last_seen = timestamp
+            track_ids[d_index] = track.id
+            matched.add(track.id)
+
+        for track in tracks:
+            if track.id not in matched:
+                track.misses += 1
+                if track.misses > self.max_misses:
+                    del self.tracks[track.id]
+
+        for d_index, track_id in enumerate(track_ids):
+            if track_id is None:
+                track = Track(next(self._ids), detections.boxes[d_index], detections.scores[d_index],
+                              detections.class_ids[d_index], timestamp)
+                self.tracks[track.id] = track
+                track_ids[d_index] = track.id
+        return track_ids
+
+    def _associate(self, tracks, detections):
+        """Greedy matching on (1 - IoU), then normalized centroid distance for non-overlapping pairs."""
+        if not tracks or not len(detections):
+            return []
+        predicted = np.array([_state_to_xyxy(t.filter.x) for t in tracks], dtype=np.float32)
+        iou = iou_matrix(predicted, detections.boxes)
+
+        centers = np.stack([(predicted[:, 0] + predicted[:, 2]) / 2,
+                            (predicted[:, 1] + predicted[:, 3]) / 2], axis=1)
+        widths = np.maximum(predicted[:, 2] - predicted[:, 0], 1.0)
+        det_centers = np.stack([detections.centers_x, detections.centers_y], axis=1).astype(np.float32)
+        distance = np.linalg.norm(centers[:, None, :] - det_centers[None, :, :], axis=2) / widths[:, None]
+
+        # IoU matches always beat centroid matches
+        cost = np.where(iou >= self.iou_threshold, 1.0 - iou,
+                        np.where(distance <= self.max_centroid_distance, 1.0 + distance, np.inf))
+        same_class = np.array([t.class_id for t in tracks])[:, None] == detections.class_ids[None, :]
+        cost[~same_class] = np.inf
+
+        pairs = []
+        used_tracks, used_dets = set(), set()
+        for flat in np.argsort(cost, axis=None):
+            t_index, d_index = np.unravel_index(flat, cost.shape)
+            if not np.isfinite(cost[t_index, d_index]):
+                break
+            if t_index in used_tracks or d_index in used_dets:
+                continue
+            used_tracks.add(t_index)
+            used_dets.add(d_index)
+            pairs.append((int(t_index), int(d_index)))
+        return pairs
+
+    def shift(self, dx, dy=0.0):
+        """Apply an expected view shift (e.g. after a camera rotation) to every track."""
+        for track in self.tracks.values():
+            track.filter.shift(dx, dy)
+
+    def predicted(self, timestamp, confirmed_only=True):
+        """[(track, predicted xyxy box)] at `timestamp`."""
+        return [(t, t.predict_box(timestamp)) for t in self.tracks.values()
+                if t.confirmed or not confirmed_only]
@@ -6,9 +6,13 @@ import keyboard  # pip install keyboard
 
 from bot.core.screen_capturer import ScreenCapturer
 # from bot.core.object_detector import ObjectDetector  # <-- No longer used in main
-from bot.core.target_selector import TargetSelector
+from bot.core.target_selector import TargetSelector, SEARCH
 from bot.config.settings import settings
 from bot.core.detection_manager import DetectionManager
+from bot.core.icon_detector import IconDetector
+from bot.core.debug_writer import debug_writer
+from bot.core.metrics import metrics
+from bot.core.tracing import tracer
 
 # Global pause flag
 paused = False
@@ -21,11 +25,23 @@ def toggle_pause():
         paused = not paused
         print("\n[PAUSED]" if paused else "\n[RESUMED]")
 
+def flush_trace_on_hotkey():
+    """Write the buffered trace to disk whenever TRACE_HOTKEY is pressed."""
+    while True:
+        keyboard.wait(settings.TRACE_HOTKEY)
+        tracer.flush()
+
 def is_paused():
     global paused
     return paused
 
 def main():
+    # 0) Optional live metrics (Prometheus endpoint + console summary)
+    if settings.METRICS_ENABLED:
+        metrics.start_http_server(settings.METRICS_PORT)
+        if settings.METRICS_SUMMARY_INTERVAL:
+            metrics.start_console_summary(settings.METRICS_SUMMARY_INTERVAL)
+
     # 1) Create screen capturer
     capturer = ScreenCapturer(paused_flag=is_paused)
 
@@ -40,12 +56,15 @@ def main():
     capturer.start()
     detection_manager.start()
 
-    # 4) Create TargetSelector
+    # 4) Create TargetSelector, with the interaction icon read from the captured frames
+    icon_detector = IconDetector(capturer)
+    icon_detector.start()
     screen_width = capturer.dxcam_region[2] - capturer.dxcam_region[0]
     selector = TargetSelector(
         screen_width=screen_width,
         capturer=capturer,       # We still pass it in, as it may be used inside TargetSelector
-        detection_manager=detection_manager
+        detection_manager=detection_manager,
+        icon_detector=icon_detector
     )
 
     # 5) Thread to handle F12 pause togglingf
@@ -53,36 +72,56 @@ def main():
     pause_thread.start()
     print("Pause thread started")
 
+    if settings.TRACE_ENABLED:
+        threading.Thread(target=flush_trace_on_hotkey, daemon=True).start()
+        print(f"Tracing on, press {settings.TRACE_HOTKEY.upper()} to write the trace")
+
     try:
+        last_frame = -1  # newest frame whose predictions we've already acted on
         while True:
             if paused:
+                if selector.state != SEARCH:
+                    selector.interrupt()  # release held keys, start over when resumed
                 time.sleep(0.1)
                 continue
             
             # The biggest difference: we do NOT call "capturer.wframe()" -> "detector.detect(...)"
-            # Instead, we ask detection_manager for the *latest* predictiofns.
-            
-            # [Optional] Sleep ~0.7s so that the predictions are sure to be up-to-date
-            time.sleep(0.5)
-
-            # Retrieve the latest predictions from the detection threads
-            detections = detection_manager.get_latest_predictions()
-
-            # Then pass them into the TargetSelector
-            target = selector.select_target(detections)
-
-            # If in DEBUG mode, we can visualize or do something.
-            # But we no longer need to call process_frame or anything,
-            # unless you want to show bounding boxes on your own.
-            if settings.DEBUG:
-                pass  # e.g., you could call your debug drawing code here
-
-            time.sleep(0.1)  # Slow down main loop slightly
+            # Instead, we wake up as soon as the detection threads publish predictions
+            # for a newer frame that was captured after the view last settled,
+            # or after poll_interval at the latest so the selector's timers run
+            # (sooner when the interaction icon shows up).
+            snapshot = detection_manager.wait_for_predictions(
+                after_frame=last_frame,
+                captured_after=selector.view_settled_at,
+                max_staleness=settings.PREDICTION_MAX_STALENESS,
+                timeout=selector.poll_interval,
+                wake=selector.wake_event
+            )
+            if snapshot is not None:
+                last_frame = snapshot.frame_number
+
+                # Then pass them into the TargetSelector
+                with tracer.frame_context(snapshot.frame_number):
+                    target = selector.select_target(snapshot.detections, capture_time=snapshot.capture_time)
+
+                # Debug frames are sampled, drawn and written on debug_writer's thread
+                if settings.DEBUG:
+                    captured = capturer.get_frame_by_number(snapshot.frame_number)
+                    if captured is not None:
+                        with captured:
+                            debug_writer.submit(captured, snapshot.detections, target)
+
+            # Walking / interaction / cooldown deadlines; never blocks
+            selector.tick()
 
     finally:
         # Cleanup
         capturer.stop()
         detection_manager.stop()
+        selector.scheduler.stop()
+        icon_detector.stop()
+        debug_writer.close()
+        metrics.stop()
         print("Shutting down cleanly.")
 
 if __name__ == "__main__":
@@ -0,0 +1,213 @@
+# scripts/auto_label.py
+"""
+Pre-label captured frames with the current model and collect hard examples.
+
+    python scripts/auto_label.py train_data --workers 4 --batch-size 8
+    python scripts/auto_label.py train_data --model bot/models/trunk_nano.onnx --label-conf 0.4
+
+Images come from the dataset manifest (see scripts/dataset_capture.py) or,
+without one, from every image under the input directory. Work is split
+into chunks handed to --workers processes (each with its own
+ObjectDetector); inside a worker a loader thread decodes the next batch
+while the current one runs through a single batched forward pass.
+
+Output (in --output, default <input>/labels):
+    <same relative path>.txt   YOLO labels: "class cx cy w h", normalised
+    progress.jsonl             one line per finished image; re-running skips them
+    hard_examples.txt          images with detections between --hard-conf and
+                               --label-conf (uncertain, worth a human look)
+"""
+import sys
+import os
+import json
+import glob
+import queue
+import threading
+import time
+import argparse
+import multiprocessing as mp
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+from bot.config.settings import settings
+from bot.core.inference_backends import BACKENDS
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp")
+
+_detector = None  # one per worker process
+
+
+def list_images(root):
+    """Relative image paths: from manifest.jsonl if there is one, else every image under root."""
+    manifest = os.path.join(root, "manifest.jsonl")
+    if os.path.exists(manifest):
+        with open(manifest, encoding="utf-8") as f:
+            # A re-captured frame can appear twice; label it once
+            return list(dict.fromkeys(json.loads(line)["file"] for line in f if line.strip()))
+    paths = []
+    for path in glob.glob(os.path.join(root, "**", "*"), recursive=True):
+        if path.lower().endswith(IMAGE_EXTENSIONS) and os.sep + "labels" + os.sep not in path:
+            paths.append(os.path.relpath(path, root).replace(os.sep, "/"))
+    return sorted(paths)
+
+
+def load_progress(path):
+    done = set()
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            done = {json.loads(line)["file"] for line in f if line.strip()}
+    return done
+
+
+def prefetch(iterable, depth):
+    """Iterate `iterable` on a background thread, up to `depth` items ahead."""
+    items = queue.Queue(maxsize=depth)
+    end = object()
+
+    def produce():
+        try:
+            for item in iterable:
+                items.put(item)
+        finally:
+            items.put(end)
+
+    threading.Thread(target=produce, daemon=True).start()
+    while True:
+        item = items.get()
+        if item is end:
+            return
+        yield item
+
+
+def _init_worker(backend, model_path, conf):
+    global _detector
+    from bot.core.inference_backends import create_backend
+    from bot.core.object_detector import ObjectDetector
+    if backend == "stub":
+        from scripts.benchmark_pipeline import StubBackend
+        BACKENDS["stub"] = StubBackend
+    _detector = ObjectDetector(backend=create_backend(backend, model_path=model_path))
+    _detector.conf_threshold = conf
+
+
+def _decode_batches(root, paths, batch_size):
+    for start in range(0, len(paths), batch_size):
+        batch = []
+        for rel in paths[start:start + batch_size]:
+            image = cv2.imread(os.path.join(root, rel), cv2.IMREAD_COLOR)
+            batch.append((rel, image))
+        yield batch
+
+
+def label_chunk(task):
+    """Worker: decode (prefetched) and detect a chunk of images, batch by batch."""
+    root, paths, batch_size, prefetch_depth = task
+    results = []
+    for batch in prefetch(_decode_batches(root, paths, batch_size), prefetch_depth):
+        good = [(rel, image) for rel, image in batch if image is not None]
+        results += [(rel, None, None) for rel, image in batch if image is None]
+        detections = _detector.detect_batch([image for _, image in good])
+        results += [(rel, image.shape[:2], arrays) for (rel, image), arrays in zip(good, detections)]
+    return results
+
+
+def yolo_lines(shape, boxes, class_ids):
+    h, w = shape
+    lines = []
+    for (x1, y1, x2, y2), class_id in zip(boxes.tolist(), class_ids.tolist()):
+        lines.append(f"{class_id} {(x1 + x2) / 2 / w:.6f} {(y1 + y2) / 2 / h:.6f} "
+                     f"{(x2 - x1) / w:.6f} {(y2 - y1) / h:.6f}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch-label captured frames in YOLO format")
+    parser.add_argument("input", nargs="?", default=settings.DATASET_DIR, help="Dataset directory")
+    parser.add_argument("--output", help="Label directory (default: <input>/labels)")
+    parser.add_argument("--model", default=settings.MODEL_PATH)
+    parser.add_argument("--backend", default=settings.INFERENCE_BACKEND, choices=list(BACKENDS) + ["stub"])
+    parser.add_argument("--stub", action="store_true", help="Use the benchmark's canned-output stub instead of a model")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="Worker processes (0 = run in this process)")
+    parser.add_argument("--batch-size", type=int, default=8, help="Images per forward pass")
+    parser.add_argument("--chunk-size", type=int, default=64, help="Images handed to a worker at a time")
+    parser.add_argument("--prefetch", type=int, default=2, help="Batches decoded ahead in each worker")
+    parser.add_argument("--label-conf", type=float, default=settings.CONFIDENCE_THRESHOLD,
+                        help="Min confidence for a box to be written as a label")
+    parser.add_argument("--hard-conf", type=float, default=0.1,
+                        help="Boxes between this and --label-conf mark an image as a hard example")
+    args = parser.parse_args()
+    if args.stub:
+        args.backend = "stub"
+
+    output = args.output or os.path.join(args.input, "labels")
+    os.makedirs(output, exist_ok=True)
+    progress_path = os.path.join(output, "progress.jsonl")
+    done = load_progress(progress_path)
+    todo = [p for p in list_images(args.input) if p not in done]
+    print(f"[LABEL] {len(todo)} images to label ({len(done)} already done)")
+    if not todo:
+        return
+
+    conf = min(args.hard_conf, args.label_conf)  # detect low, split into labels / hard examples after
+    init_args = (args.backend, args.model, conf)
+    tasks = [(args.input, todo[i:i + args.chunk_size], args.batch_size, args.prefetch)
+             for i in range(0, len(todo), args.chunk_size)]
+    if args.workers:
+        pool = mp.get_context("spawn").Pool(args.workers, initializer=_init_worker, initargs=init_args)
+        chunks = pool.imap_unordered(label_chunk, tasks)
+    else:
+        pool = None
+        _init_worker(*init_args)
+        chunks = map(label_chunk, tasks)
+
+    labelled = unreadable = hard = boxes_written = 0
+    start = last_report = time.perf_counter()
+    try:
+        with open(progress_path, "a", encoding="utf-8") as progress, \
+                open(os.path.join(output, "hard_examples.txt"), "a", encoding="utf-8") as hard_file:
+            for results in chunks:
+                for rel, shape, arrays in results:
+                    if shape is None:
+                        unreadable += 1
+                        progress.write(json.dumps({"file": rel, "error": "unreadable"}) + "\n")
+                        continue
+                    boxes, scores, class_ids = arrays
+                    keep = scores >= args.label_conf
+                    label_path = os.path.join(output, os.path.splitext(rel)[0] + ".txt")
+                    os.makedirs(os.path.dirname(label_path), exist_ok=True)
+                    lines = yolo_lines(shape, boxes[keep], class_ids[keep])
+                    with open(label_path, "w", encoding="utf-8") as f:
+                        f.write("\n".join(lines) + ("\n" if lines else ""))
+                    uncertain = int((~keep).sum())
+                    if uncertain:
+                        hard += 1
+                        hard_file.write(rel + "\n")
+                    progress.write(json.dumps({"file": rel, "labels": len(lines), "uncertain": uncertain,
+                                               "max_score": round(float(scores.max()), 4) if len(scores) else 0.0}) + "\n")
+                    labelled += 1
+                    boxes_written += len(lines)
+                progress.flush()
+                hard_file.flush()
+
+                now = time.perf_counter()
+                if now - last_report >= 5.0:
+                    last_report = now
+                    print(f"[LABEL] {labelled + unreadable}/{len(todo)} images, "
+                          f"{labelled / (now - start):.1f} images/s")
+    except KeyboardInterrupt:
+        print("\n[LABEL] Interrupted; re-run to continue where this stopped.")
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    elapsed = time.perf_counter() - start
+    print(f"[LABEL] {labelled} images labelled ({boxes_written} boxes, {hard} hard examples, "
+          f"{unreadable} unreadable) in {elapsed:.1f}s: {labelled / elapsed:.1f} images/s")
+
+
+if __name__ == "__main__":
+    main()
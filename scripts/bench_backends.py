@@ -0,0 +1,107 @@
+# scripts/bench_backends.py
+"""
+Benchmark the inference backends on the same frames and check that their
+detections agree.
+
+    python scripts/bench_backends.py --frames train_data --limit 50
+    python scripts/bench_backends.py --synthetic 20
+"""
+import sys
+import os
+import glob
+import time
+import argparse
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+from bot.config.settings import settings
+from bot.core.inference_backends import BACKENDS, create_backend
+from bot.core.object_detector import ObjectDetector
+
+
+def load_frames(frames_dir, limit, synthetic):
+    if frames_dir:
+        paths = sorted(glob.glob(os.path.join(frames_dir, "*.jpg")) +
+                       glob.glob(os.path.join(frames_dir, "*.png")))[:limit]
+        return [cv2.imread(p, cv2.IMREAD_COLOR) for p in paths]
+
+    rng = np.random.default_rng(0)
+    shape = (settings.MONITOR_REGION["height"], settings.MONITOR_REGION["width"], 3)
+    return [rng.integers(0, 256, shape, dtype=np.uint8) for _ in range(synthetic)]
+
+
+def iou(a, b):
+    ix = max(0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def detections_match(reference, candidate, iou_tolerance, conf_tolerance):
+    """Greedy one-to-one matching on label, IoU and confidence."""
+    if len(reference) != len(candidate):
+        return False
+    unmatched = list(candidate)
+    for det in reference:
+        match = next((c for c in unmatched
+                      if c["label"] == det["label"]
+                      and iou(c["bbox"], det["bbox"]) >= iou_tolerance
+                      and abs(c["confidence"] - det["confidence"]) <= conf_tolerance), None)
+        if match is None:
+            return False
+        unmatched.remove(match)
+    return True
+
+
+def run_backend(name, frames):
+    detector = ObjectDetector(backend=create_backend(name))
+    detector.detect(frames[0])  # warm-up
+    results, samples = [], []
+    for frame in frames:
+        start = time.perf_counter()
+        results.append(detector.detect(frame))
+        samples.append(time.perf_counter() - start)
+    return results, np.array(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare inference backends")
+    parser.add_argument("--frames", help="Directory of .jpg/.png frames (default: synthetic noise)")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--synthetic", type=int, default=20, help="Synthetic frames if --frames is not set")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS))
+    parser.add_argument("--iou-tolerance", type=float, default=0.9)
+    parser.add_argument("--conf-tolerance", type=float, default=0.02)
+    args = parser.parse_args()
+
+    frames = load_frames(args.frames, args.limit, args.synthetic)
+    if not frames:
+        print("No frames to benchmark.")
+        return 1
+    print(f"Benchmarking {len(frames)} frames of shape {frames[0].shape}")
+
+    results = {}
+    for name in args.backends:
+        detections, ms = run_backend(name, frames)
+        results[name] = detections
+        print(f"{name:>12}: p50 {np.median(ms):7.2f}ms  p95 {np.percentile(ms, 95):7.2f}ms  "
+              f"{1000 / ms.mean():6.1f} fps  {sum(map(len, detections))} detections")
+
+    reference_name = args.backends[0]
+    ok = True
+    for name in args.backends[1:]:
+        mismatched = [i for i, (ref, det) in enumerate(zip(results[reference_name], results[name]))
+                      if not detections_match(ref, det, args.iou_tolerance, args.conf_tolerance)]
+        ok &= not mismatched
+        status = "OK" if not mismatched else f"MISMATCH on frames {mismatched[:10]}"
+        print(f"{name} vs {reference_name}: {status}")
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+# scripts/bench_postprocess.py
+"""
+Micro-benchmark: legacy per-box YOLO postprocess loop vs. the vectorized
+postprocess_yolo() on synthetic YOLOv8 outputs.
+
+    python scripts/bench_postprocess.py --anchors 8400 --candidates 3000
+"""
+import sys
+import os
+import time
+import argparse
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+from bot.config.settings import settings
+from bot.core.object_detector import postprocess_yolo
+
+
+def legacy_postprocess(outputs, ratio_w, ratio_h, conf_threshold, iou_threshold):
+    """The original ObjectDetector._postprocess, kept here for comparison."""
+    raw = np.squeeze(outputs[0], 0)
+    num_classes = len(settings.CLASS_NAMES)
+
+    xc, yc, w, h = raw[:4]
+    class_scores = raw[4:4+num_classes]
+    confidences = np.max(class_scores, axis=0)
+
+    detections = []
+    for i in np.where(confidences >= conf_threshold)[0]:
+        x = (xc[i] - w[i]/2) * ratio_w
+        y = (yc[i] - h[i]/2) * ratio_h
+        r = (xc[i] + w[i]/2) * ratio_w
+        b = (yc[i] + h[i]/2) * ratio_h
+
+        x, y = max(0, int(x)), max(0, int(y))
+        r, b = map(lambda v: min(v, settings.MONITOR_REGION["width"]),
+                   [int(r), int(b)])
+
+        class_id = np.argmax(class_scores[:, i])
+        detections.append({
+            "bbox": [x, y, r, b],
+            "confidence": float(confidences[i]),
+            "label": settings.CLASS_NAMES[class_id]
+        })
+
+    indices = cv2.dnn.NMSBoxes(
+        [d["bbox"] for d in detections],
+        [d["confidence"] for d in detections],
+        conf_threshold, iou_threshold
+    )
+    return [detections[idx] for idx in
+            (indices.flatten() if isinstance(indices, np.ndarray) else indices)]
+
+
+def make_synthetic_output(anchors, candidates, num_classes, input_size, seed=0):
+    """
+    Random (1, 4 + num_classes, anchors) output with `candidates` anchors above
+    threshold. Like a real YOLO head, hot anchors cluster around a few objects.
+    """
+    rng = np.random.default_rng(seed)
+    raw = np.empty((4 + num_classes, anchors), dtype=np.float32)
+    raw[0] = rng.uniform(0, input_size, anchors)
+    raw[1] = rng.uniform(0, input_size, anchors)
+    raw[2] = rng.uniform(4, 120, anchors)
+    raw[3] = rng.uniform(4, 200, anchors)
+    raw[4:] = rng.uniform(0.0, settings.CONFIDENCE_THRESHOLD * 0.9, (num_classes, anchors))
+
+    hot = rng.choice(anchors, size=min(candidates, anchors), replace=False)
+    num_objects = max(1, len(hot) // 30)
+    centers = rng.uniform(60, input_size - 60, (num_objects, 2))
+    sizes = rng.uniform(10, 120, (num_objects, 2))
+    owner = rng.integers(0, num_objects, len(hot))
+    raw[0:2, hot] = (centers[owner] + rng.normal(0, 2, (len(hot), 2))).T
+    raw[2:4, hot] = (sizes[owner] * rng.uniform(0.9, 1.1, (len(hot), 2))).T
+    raw[4 + (owner % num_classes), hot] = rng.uniform(
+        settings.CONFIDENCE_THRESHOLD, 1.0, len(hot))
+    return raw[None]
+
+
+def time_it(fn, repeats):
+    fn()  # warm-up
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return np.median(samples) * 1000, np.percentile(samples, 95) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--anchors", type=int, default=8400)
+    parser.add_argument("--candidates", type=int, nargs="+", default=[10, 300, 3000])
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    num_classes = len(settings.CLASS_NAMES)
+    ratio_w = settings.MONITOR_REGION["width"] / settings.INPUT_SIZE
+    ratio_h = settings.MONITOR_REGION["height"] / settings.INPUT_SIZE
+    conf, iou = settings.CONFIDENCE_THRESHOLD, settings.IOU_THRESHOLD
+
+    print(f"{'candidates':>10} | {'legacy p50':>10} {'p95':>8} | {'vector p50':>10} {'p95':>8} | speedup")
+    for candidates in args.candidates:
+        output = make_synthetic_output(args.anchors, candidates, num_classes, settings.INPUT_SIZE)
+        old_p50, old_p95 = time_it(
+            lambda: legacy_postprocess([output], ratio_w, ratio_h, conf, iou), args.repeats)
+        new_p50, new_p95 = time_it(
+            lambda: postprocess_yolo(output, ratio_w, ratio_h, conf, iou), args.repeats)
+        print(f"{candidates:>10} | {old_p50:>8.2f}ms {old_p95:>6.2f}ms | "
+              f"{new_p50:>8.2f}ms {new_p95:>6.2f}ms | {old_p50 / new_p50:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
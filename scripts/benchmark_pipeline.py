@@ -0,0 +1,302 @@
+# scripts/benchmark_pipeline.py
+"""
+End-to-end pipeline benchmark: capture -> DetectionManager -> TargetSelector.
+
+Runs each stage in isolation (preprocess, forward, postprocess, publish,
+select) and then the whole pipeline for several worker counts, and
+reports p50/p95/p99 latency, frames/sec and CPU use. Results can be
+written as JSON so runs on different commits can be diffed.
+
+    python scripts/benchmark_pipeline.py --stub --json bench_output.json
+    python scripts/benchmark_pipeline.py --model bot/models/trunk_nano.onnx --replay recordings/forest_01
+    python scripts/benchmark_pipeline.py --compare old.json new.json
+"""
+import sys
+import os
+import json
+import contextlib
+import time
+import argparse
+import platform
+import subprocess
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from bot.config.settings import settings
+from bot.core.actions import NullActions
+from bot.core.capture_sources import CaptureSource, ReplaySource
+from bot.core.detection_manager import DetectionManager
+from bot.core.detections import Detections
+from bot.core.inference_backends import BACKENDS, InferenceBackend, create_backend, infer_chunked
+from bot.core.object_detector import postprocess_yolo_arrays
+from bot.core.preprocessing import Preprocessor
+from bot.core.screen_capturer import CapturedFrame, ScreenCapturer
+from bot.core.target_selector import TargetSelector
+from scripts.bench_postprocess import make_synthetic_output
+
+
+class StubBackend(InferenceBackend):
+    """Returns a canned YOLO output (optionally after a fake forward delay); no model needed."""
+    name = "stub"
+    forward_ms = 0.0
+    candidates = 300
+
+    def __init__(self, model_path=None):
+        self.output = make_synthetic_output(
+            8400, self.candidates, len(settings.CLASS_NAMES), settings.INPUT_SIZE)
+
+    def infer(self, blob):
+        if self.forward_ms:
+            time.sleep(self.forward_ms / 1000)
+        return np.repeat(self.output, len(blob), axis=0)
+
+
+class FrameListSource(CaptureSource):
+    """Cycles through in-memory frames at `fps` (0 = as fast as requested)."""
+    def __init__(self, frames, fps):
+        self.frames = frames
+        self.interval = 1 / fps if fps else 0
+        self.index = 0
+        self.next_due = None
+
+    def grab(self, region=None):
+        if self.interval:
+            now = time.perf_counter()
+            if self.next_due is None:
+                self.next_due = now
+            if self.next_due > now:
+                time.sleep(self.next_due - now)
+            self.next_due += self.interval
+        frame = self.frames[self.index % len(self.frames)]
+        self.index += 1
+        return frame
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence the selector's per-target prints while timing."""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def summarize(samples_s, wall_s=None):
+    ms = np.asarray(samples_s) * 1000
+    if len(ms) == 0:
+        return {"count": 0}
+    result = {
+        "count": int(len(ms)),
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+    }
+    result["fps"] = float(len(ms) / wall_s) if wall_s else float(1000 / ms.mean())
+    return result
+
+
+def time_stage(fn, inputs, repeats):
+    fn(inputs[0])  # warm-up
+    samples = []
+    for i in range(repeats):
+        item = inputs[i % len(inputs)]
+        start = time.perf_counter()
+        fn(item)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def load_frames(args):
+    if args.replay:
+        source = ReplaySource(args.replay, mode="fast")
+        frames = []
+        while len(frames) < args.frames:
+            frame = source.grab()
+            if frame is None:
+                break
+            frames.append(np.array(frame))
+        source.close()
+        return frames
+    rng = np.random.default_rng(0)
+    shape = (settings.MONITOR_REGION["height"], settings.MONITOR_REGION["width"], 3)
+    return [rng.integers(0, 256, shape, dtype=np.uint8) for _ in range(args.frames)]
+
+
+def bench_stages(frames, repeats):
+    preprocessor = Preprocessor()
+    backend = create_backend()
+    results = {}
+
+    results["preprocess"] = time_stage(preprocessor, frames, repeats)
+
+    blobs = [preprocessor(frames[0])[0].copy()]
+    results["forward"] = time_stage(lambda blob: infer_chunked(backend, blob), blobs, repeats)
+
+    _, ratios, pad = preprocessor(frames[0])
+    outputs = [infer_chunked(backend, preprocessor(f)[0]) for f in frames[:4]]
+    postprocess = lambda output: Detections(*postprocess_yolo_arrays(
+        output, *ratios, settings.CONFIDENCE_THRESHOLD, settings.IOU_THRESHOLD, pad=pad))
+    results["postprocess"] = time_stage(postprocess, outputs, repeats)
+
+    detections = [postprocess(o) for o in outputs]
+    manager = DetectionManager(capturer=None, num_workers=0)
+    counter = iter(range(10 ** 9))
+    publish = lambda d: manager._publish(CapturedFrame(next(counter), time.perf_counter(), None), d, 0.0)
+    results["publish"] = time_stage(publish, detections, repeats)
+
+    selector = TargetSelector(settings.MONITOR_REGION["width"], None, manager, actions=NullActions())
+
+    def select(d):
+        selector._reset_tracking()
+        target = selector.select_target(d)
+        if target is not None:
+            selector._verify_target_persistence()
+    with quiet():
+        results["select"] = time_stage(select, detections, repeats)
+    selector.scheduler.stop()
+    return results
+
+
+def bench_end_to_end(frames, worker_counts, seconds, capture_fps):
+    results = {}
+    for workers in worker_counts:
+        capturer = ScreenCapturer(source=FrameListSource(frames, capture_fps))
+        # Fixed worker count per run, so the autoscaler stays out of it
+        manager = DetectionManager(capturer, num_workers=workers, autoscale=False)
+        selector = TargetSelector(settings.MONITOR_REGION["width"], capturer, manager, actions=NullActions())
+
+        capturer.start()
+        manager.start()
+        manager.wait_for_predictions(timeout=30)  # warm-up: first result
+
+        decision_ages, last_frame = [], manager.latest_frame_id
+        first_frame = last_frame
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        with quiet():
+            while time.perf_counter() - wall_start < seconds:
+                snapshot = manager.wait_for_predictions(after_frame=last_frame, timeout=1.0)
+                if snapshot is None:
+                    continue
+                last_frame = snapshot.frame_number
+                selector._reset_tracking()
+                selector.select_target(snapshot.detections)
+                # glass-to-decision: how old the frame was when we acted on it
+                decision_ages.append(snapshot.age)
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+
+        manager.stop()
+        capturer.stop()
+        selector.scheduler.stop()
+
+        summary = summarize(decision_ages, wall)
+        summary["frames_captured"] = int(capturer.frame_number + 1)
+        summary["frames_published"] = int(last_frame - first_frame)
+        summary["stale_results_dropped"] = int(manager.stale_results_dropped)
+        summary["cpu_percent"] = float(100 * cpu / wall)
+        summary["allocations"] = int(capturer.memory_stats().get("allocations", 0))
+        results[str(workers)] = summary
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def print_report(report):
+    print(f"\n{'stage':<12} {'p50':>8} {'p95':>8} {'p99':>8} {'fps':>9}")
+    for stage, r in report["stages"].items():
+        print(f"{stage:<12} {r['p50_ms']:>6.2f}ms {r['p95_ms']:>6.2f}ms {r['p99_ms']:>6.2f}ms {r['fps']:>9.1f}")
+
+    print(f"\n{'workers':<8} {'decisions/s':>11} {'age p50':>9} {'age p95':>9} {'age p99':>9} {'cpu%':>6}")
+    for workers, r in report["end_to_end"].items():
+        if r.get("count", 0) == 0:
+            print(f"{workers:<8} no predictions")
+            continue
+        print(f"{workers:<8} {r['fps']:>11.1f} {r['p50_ms']:>7.1f}ms {r['p95_ms']:>7.1f}ms "
+              f"{r['p99_ms']:>7.1f}ms {r['cpu_percent']:>6.0f}")
+
+
+def compare(old_path, new_path):
+    """Print per-metric deltas between two JSON reports."""
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+    print(f"{old.get('commit')} -> {new.get('commit')}")
+    for section in ("stages", "end_to_end"):
+        for key, new_r in new.get(section, {}).items():
+            old_r = old.get(section, {}).get(key)
+            if not old_r or "p50_ms" not in old_r or "p50_ms" not in new_r:
+                continue
+            for metric in ("p50_ms", "p95_ms", "p99_ms", "fps"):
+                delta = (new_r[metric] - old_r[metric]) / old_r[metric] * 100 if old_r[metric] else 0.0
+                print(f"{section}/{key:<12} {metric:<7} {old_r[metric]:>9.2f} -> {new_r[metric]:>9.2f} ({delta:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the detection pipeline")
+    parser.add_argument("--model", help="ONNX model to benchmark (default: settings.MODEL_PATH)")
+    parser.add_argument("--backend", default=settings.INFERENCE_BACKEND, choices=list(BACKENDS) + ["stub"])
+    parser.add_argument("--stub", action="store_true", help="Use a canned-output stub instead of a model")
+    parser.add_argument("--stub-forward-ms", type=float, default=0.0, help="Fake forward latency for the stub backend")
+    parser.add_argument("--replay", help="Recording directory to take frames from (default: synthetic)")
+    parser.add_argument("--frames", type=int, default=16)
+    parser.add_argument("--repeats", type=int, default=100)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--seconds", type=float, default=5.0, help="Duration of each end-to-end run")
+    parser.add_argument("--capture-fps", type=float, default=60, help="Synthetic capture rate (0 = unthrottled)")
+    parser.add_argument("--json", help="Write machine-readable results here")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Diff two JSON reports and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    settings.DEBUG = False
+    if args.model:
+        settings.MODEL_PATH = args.model
+    if args.stub:
+        args.backend = "stub"
+    if args.backend == "stub":
+        StubBackend.forward_ms = args.stub_forward_ms
+        BACKENDS["stub"] = StubBackend
+    settings.INFERENCE_BACKEND = args.backend
+
+    frames = load_frames(args)
+    print(f"Benchmarking {len(frames)} frames of shape {frames[0].shape} with backend '{args.backend}'")
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {
+            "backend": args.backend,
+            "model": None if args.backend == "stub" else settings.MODEL_PATH,
+            "stub_forward_ms": args.stub_forward_ms if args.backend == "stub" else None,
+            "frames": len(frames),
+            "frame_shape": list(frames[0].shape),
+            "input_size": settings.INPUT_SIZE,
+            "letterbox": settings.LETTERBOX,
+            "capture_fps": args.capture_fps,
+        },
+        "stages": bench_stages(frames, args.repeats),
+        "end_to_end": bench_end_to_end(frames, args.workers, args.seconds, args.capture_fps),
+    }
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
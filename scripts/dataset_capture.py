@@ -1,32 +1,112 @@
 # scripts/dataset_capture.py
+"""
+Collect training images from the live game (or a recording).
+
+    python scripts/dataset_capture.py train_data/forest --seconds 600
+    python scripts/dataset_capture.py train_data/forest --hotkey f12
+    python scripts/dataset_capture.py train_data/forest --region 0,0,1920,1080
+    python scripts/dataset_capture.py train_data/forest --replay recordings/forest_01 --variant half scale 0.5
+
+Continuous mode considers a frame every --interval seconds; near-duplicates
+(perceptual hash) are skipped and the rest are encoded on a thread pool,
+so capture never waits for disk. See bot/core/dataset_writer.py for the
+output layout.
+"""
 import sys
 import os
+import time
+import argparse
 
 # Add project root to Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Rest of your imports
-import cv2
-import time
-from datetime import datetime
+from bot.config.settings import settings
+from bot.core.capture_sources import ReplaySource
+from bot.core.dataset_writer import FORMATS, DatasetWriter
 from bot.core.screen_capturer import ScreenCapturer
 
-def capture_training_data(
-    output_dir: str = "train_data",
-    interval: int = 2,          # Seconds between captures
-    max_captures: int = 1000,   # Max images to collect
-    region: dict = {"top": 100, "left": 0, "width": 1920, "height": 980}  # Exclude UI
-):
-    os.makedirs(output_dir, exist_ok=True)
-    capturer = ScreenCapturer(monitor=region)
-    
-    print(f"Capturing {max_captures} screenshots to {output_dir}...")
-    for i in range(max_captures):
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        frame = capturer.capture_frame()
-        cv2.imwrite(f"{output_dir}/capture_{timestamp}_{i}.jpg", frame)
-        time.sleep(interval)
-        print(f"Captured image {i+1}/{max_captures}")
+
+def parse_variant(name, kind, value):
+    if kind == "scale":
+        return name, kind, float(value)
+    return name, kind, tuple(int(v) for v in value.split(","))
+
+
+def parse_region(value):
+    top, left, width, height = (int(v) for v in value.split(","))
+    return {"top": top, "left": left, "width": width, "height": height}
+
+
+def capture_continuous(capturer, writer, interval, seconds, max_frames):
+    deadline = time.perf_counter() + seconds if seconds else float("inf")
+    last_frame, next_due = -1, 0.0
+    while time.perf_counter() < deadline and writer.kept < max_frames:
+        captured = capturer.wait_for_latest_frame(after=last_frame, timeout=1.0)
+        if captured is None:
+            if capturer.finished:
+                break
+            continue
+        with captured:
+            last_frame = captured.number
+            if captured.timestamp < next_due:
+                continue
+            next_due = captured.timestamp + interval
+            writer.submit(captured)
+
+
+def capture_on_hotkey(capturer, writer, hotkey, max_frames):
+    import keyboard  # pip install keyboard
+    print(f"[INFO] Press {hotkey.upper()} to capture a frame. Press Ctrl+C to exit.")
+    while writer.kept < max_frames:
+        keyboard.wait(hotkey)
+        captured = capturer.get_latest_frame()
+        if captured is None:
+            continue
+        with captured:
+            print(f"[CAPTURED] Frame {captured.number}: {writer.submit(captured)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Capture a deduplicated, sharded training dataset")
+    parser.add_argument("output", nargs="?", default=settings.DATASET_DIR, help="Dataset directory (appended to)")
+    parser.add_argument("--seconds", type=float, default=0, help="Stop after this long (0 = until Ctrl+C)")
+    parser.add_argument("--max-frames", type=int, default=10 ** 9, help="Stop once the dataset holds this many frames")
+    parser.add_argument("--interval", type=float, default=settings.DATASET_INTERVAL,
+                        help="Min seconds between frames considered")
+    parser.add_argument("--hotkey", help="Capture only when this key is pressed, instead of continuously")
+    parser.add_argument("--replay", help="Take frames from a recording instead of the screen")
+    parser.add_argument("--region", type=parse_region, default=settings.DATASET_REGION,
+                        help="Screen area as top,left,width,height (default: settings.DATASET_REGION, without the UI)")
+    parser.add_argument("--format", choices=FORMATS, default=settings.DATASET_FORMAT)
+    parser.add_argument("--quality", type=int, default=settings.DATASET_QUALITY)
+    parser.add_argument("--shard-size", type=int, default=settings.DATASET_SHARD_SIZE)
+    parser.add_argument("--encoders", type=int, default=settings.DATASET_ENCODERS)
+    parser.add_argument("--dedup-threshold", type=int, default=settings.DATASET_DEDUP_THRESHOLD,
+                        help="Max hash bit difference for a near-duplicate (-1 = keep all)")
+    parser.add_argument("--variant", nargs=3, action="append", metavar=("NAME", "KIND", "VALUE"),
+                        help="Extra copy per frame: NAME scale 0.5, or NAME crop x,y,w,h")
+    args = parser.parse_args()
+
+    variants = ([parse_variant(*v) for v in args.variant] if args.variant
+                else settings.DATASET_VARIANTS)
+    writer = DatasetWriter(args.output, shard_size=args.shard_size, fmt=args.format, quality=args.quality,
+                           dedup_threshold=args.dedup_threshold, variants=variants, encoders=args.encoders)
+    source = ReplaySource(args.replay) if args.replay else None
+    capturer = ScreenCapturer(monitor=args.region, source=source)
+    capturer.start()
+
+    print(f"[INFO] Capturing to {args.output} ({writer.kept} frames already there). Press Ctrl+C to stop.")
+    try:
+        if args.hotkey:
+            capture_on_hotkey(capturer, writer, args.hotkey, args.max_frames)
+        else:
+            capture_continuous(capturer, writer, args.interval, args.seconds, args.max_frames)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        capturer.stop()
+        writer.close()
+
 
 if __name__ == "__main__":
-    capture_training_data()
\ No newline at end of file
+    main()
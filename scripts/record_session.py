@@ -0,0 +1,45 @@
+# scripts/record_session.py
+"""
+Record live game footage for offline replay/benchmarking.
+
+    python scripts/record_session.py recordings/forest_01 --seconds 120 --codec mjpg
+
+Replay it later with ReplaySource, e.g.:
+    ScreenCapturer(source=ReplaySource("recordings/forest_01", mode="fast"))
+"""
+import sys
+import os
+import time
+import argparse
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bot.config.settings import settings
+from bot.core.capture_sources import CODECS, FrameRecorder
+from bot.core.screen_capturer import ScreenCapturer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record captured frames to a replayable file")
+    parser.add_argument("output", help="Recording directory to create")
+    parser.add_argument("--seconds", type=float, default=60)
+    parser.add_argument("--codec", choices=CODECS, default=settings.RECORDING_CODEC)
+    parser.add_argument("--chunk-size", type=int, default=settings.RECORDING_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    recorder = FrameRecorder(args.output, codec=args.codec, chunk_size=args.chunk_size)
+    capturer = ScreenCapturer(recorder=recorder)
+    capturer.start()
+
+    print(f"[INFO] Recording for {args.seconds:.0f}s to {args.output}. Press Ctrl+C to stop early.")
+    try:
+        time.sleep(args.seconds)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        capturer.stop()  # also finalizes the recording
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,10 @@
 # scripts/dataset_capture.py
 import sys
 import os
-import cv2
 import time
 import keyboard  # Install with `pip install keyboard`
-from datetime import datetime
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bot.core.dataset_writer import DatasetWriter
 from bot.core.screen_capturer import ScreenCapturer
 # Add project root to Python path
 
@@ -21,26 +20,31 @@ REGION = {"top": 0, "left": 0, "width": 2560, "height": 1600}
 def capture_training_data():
     """
     Capture screenshots only when F12 is pressed.
+    Encoding happens on DatasetWriter's threads; every press is kept (no dedup).
+    For continuous capture use scripts/dataset_capture.py.
     """
     capturer = ScreenCapturer(monitor=REGION)
     capturer.start()
+    writer = DatasetWriter(OUTPUT_DIR, dedup_threshold=-1)
 
     print("[INFO] Press F12 to capture a screenshot. Press Ctrl+C to exit.")
 
     try:
         while True:
             keyboard.wait("F12")  # Wait for F12 key press
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            frame = capturer.get_frame()  # Capture the frame
-            
-            if frame is not None:
-                filename = os.path.join(OUTPUT_DIR, f"capture_{timestamp}.jpg")
-                cv2.imwrite(filename, frame)
-                print(f"[CAPTURED] Screenshot saved: {filename}")
+            captured = capturer.get_latest_frame()  # Newest frame, no copy
+
+            if captured is not None:
+                with captured:
+                    writer.submit(captured)
+                print(f"[CAPTURED] Screenshot {captured.number} queued")
 
             time.sleep(0.2)  # Small delay to prevent multiple captures from one keypress
     except KeyboardInterrupt:
         print("\n[INFO] Screenshot capture stopped.")
+    finally:
+        capturer.stop()
+        writer.close()
 
 if __name__ == "__main__":
     capture_training_data()